@@ -1,67 +1,167 @@
 from common import Node, FileParser
+from fields import FieldSchema
+from jpeg_segments import (APP0, EOI, MARKER_DESCRIPTIONS, SOI, STANDALONE_MARKERS, START_OF_FRAME, app_identifier,
+                           marker_name, scan_segments)
+
+# https://people.cs.umass.edu/~liberato/courses/2017-spring-compsci365/assignments/05-jpeg-and-exif/
+# https://asecuritysite.com/forensics/jpeg
+# https://www.w3.org/Graphics/JPEG/jfif3.pdf
+# https://www.w3.org/Graphics/JPEG/itu-t81.pdf
+# https://en.wikipedia.org/wiki/JPEG_File_Interchange_Format
+
+
+def describe_marker(marker):
+    return f"Marker 0xFF{marker & 0xFF:02X}: {marker_description(marker & 0xFF)}"
+
+
+def marker_description(marker):
+    if marker in START_OF_FRAME:
+        return f"Start of frame, {START_OF_FRAME[marker]}"
+    if 0xE0 <= marker <= 0xEF:
+        return f"Application data {marker - 0xE0}"
+    if 0xD0 <= marker <= 0xD7:
+        return f"Restart marker {marker - 0xD0}"
+    return MARKER_DESCRIPTIONS.get(marker, "Reserved")
+
+
+SEGMENT_HEADER = FieldSchema([
+    (2, describe_marker, "Marker", lambda marker: f"0x{marker:04X}"),
+    (2, "Length of the segment, including these two bytes but not the marker: {value}", "Length"),
+], byteorder='>')
+
+JFIF_HEADER = FieldSchema([
+    (5, "Identifier. 'JFIF' and null-termination. JFIF is short for JPEG File Interchange Format, the structure "
+        "that wraps JPEG images in files with extra information that isn't part of the raw JPEG image itself.",
+     "Identifier", lambda data: data.rstrip(b'\x00').decode('latin-1'), '5s'),
+    (2, "First byte for major version, second byte for minor version (01 02 for 1.02): {value}", "Version",
+     lambda version: f"{version >> 8}.{version & 0xFF:02d}"),
+    (1, "Units for the following pixel density fields. 00: no units, width:height pixel aspect ratio = "
+        "Ydensity:Xdensity, 01: pixels per inch (2.54 cm), 02: pixels per centimeter: {value}", "Density units"),
+    (2, "Horizontal pixel density. Must not be zero: {value}", "X density"),
+    (2, "Vertical pixel density. Must not be zero: {value}", "Y density"),
+    (1, "Horizontal pixel count of the following embedded RGB thumbnail. May be zero: {value}", "Thumbnail width"),
+    (1, "Vertical pixel count of the following embedded RGB thumbnail. May be zero: {value}", "Thumbnail height"),
+], byteorder='>')
+
+FRAME_HEADER = FieldSchema([
+    (1, "Sample precision in bits: {value}", "Precision"),
+    (2, "Number of lines, the height of the image: {value}", "Height"),
+    (2, "Number of samples per line, the width of the image: {value}", "Width"),
+    (1, "Number of image components: {value}", "Components"),
+], byteorder='>')
+
+FRAME_COMPONENT = FieldSchema([
+    (1, "Component identifier: {value}", "Component {component} id"),
+    (1, lambda sampling: f"Sampling factors: {sampling >> 4} horizontal, {sampling & 0x0F} vertical",
+     "Component {component} sampling factors", lambda sampling: f"{sampling >> 4}x{sampling & 0x0F}"),
+    (1, "Quantization table the component uses: {value}", "Component {component} quantization table"),
+], byteorder='>')
+
+BAD_DATA_COLOR = "#FF0000"
+
 
 class JPEGFileParser(FileParser):
+    """
+    A parser for JPEG images.
+
+    The marker segments are walked by their length fields (see jpeg_segments), so
+    every segment from SOI to EOI gets a node over the mapped file without its
+    bytes being copied, and the entropy-coded data of each scan is one node.
+    Anything after EOI is shown as trailing data, a common place to hide data.
+    """
+    SIGNATURES = [(0, b'\xff\xd8')]  # Start of Image marker
+
     def __init__(self, file):
         super().__init__(file)
+        self.layout = None  # jpeg_segments.Layout, once the segments have been walked
 
-    def parse(self):
-        self.file.seek(0)
+    def iter_parse(self, keep_tree=True):
+        self.keep_tree = keep_tree
+        self.cursor.seek(0)
         root = Node(b'', "JPEG file")
+        yield 0, root, 0
+
+        buffer = self.cursor.buffer
+        self.layout = layout = scan_segments(buffer)
+        remaining = len(buffer) - layout.end
+        # A walk cut short by the end of the file leaves nothing unparsed, so its last node tells why
+        truncation = layout.error if layout.error is not None and not remaining else None
+        last = len(layout.segments) - 1
+        for index, segment in enumerate(layout.segments):
+            yield from self.parse_segment(root, buffer, segment, truncation if index == last else None)
+
+        if layout.error is not None:
+            if remaining:
+                yield self.emit_node(root, layout.end, remaining, f"Unparsed!\n\n{layout.error}", name="Unparsed data",
+                                     color=BAD_DATA_COLOR)
+        elif remaining:
+            info = (f"{remaining} bytes after the End of Image marker, which image viewers do not show. "
+                    "Data is often hidden, or left over, here")
+            if bytes(buffer[layout.end:layout.end + 2]) == b'\xff\xd8':
+                info += ". It starts with a Start of Image marker: another JPEG image follows"
+            yield self.emit_node(root, layout.end, remaining, info, name="Trailing data", color=BAD_DATA_COLOR,
+                                 table_value=remaining)
+
+    def parse_segment(self, root, buffer, segment, truncation=None):
+        """
+        Add the node of a segment, over its fill bytes, marker, length and content, and
+        the node of the entropy-coded data after an SOS segment.
+
+        :param truncation: Why the walk stopped, if the file ends within this segment's scan
+            data or right after the segment. It goes on the scan data node, if there is one.
+        """
+        offset, marker, fill = segment.offset, segment.marker, segment.fill
+        name = marker_name(marker)
+        note = f"\n\n{truncation}" if truncation is not None and not segment.scan_length else ""
+        if marker in STANDALONE_MARKERS:
+            info = {SOI: "Start of Image marker (SOI).", EOI: "End of Image marker (EOI)."}.get(marker, marker_description(marker))
+            node = self.node_at(offset - fill, fill + segment.length, info + note, name=name)
+            yield self.emit(root, offset - fill, node)
+            yield from self.parse_fill(node, offset, fill)
+            return
+
+        table_value = None
+        if 0xE0 <= marker <= 0xEF:
+            table_value = app_identifier(buffer, segment)
+        elif marker in START_OF_FRAME and segment.length >= 4 + FRAME_HEADER.size:
+            _, height, width, _ = FRAME_HEADER.unpack(buffer, offset + 4)
+            table_value = f"{width}x{height}"
+        info = f"{name} segment of {segment.length} bytes: {marker_description(marker)}{note}"
+        node = self.node_at(offset - fill, fill + segment.length, info, name=name, table_value=table_value)
+        yield self.emit(root, offset - fill, node)
+        yield from self.parse_fill(node, offset, fill)
+        yield from self.emit_values(node, offset, SEGMENT_HEADER, SEGMENT_HEADER.unpack(buffer, offset), depth=2)
+
+        body, end = offset + 4, offset + segment.length
+        if marker == APP0 and table_value == "JFIF" and end - body >= JFIF_HEADER.size:
+            values = JFIF_HEADER.unpack(buffer, body)
+            yield from self.emit_values(node, body, JFIF_HEADER, values, depth=2)
+            body += JFIF_HEADER.size
+            thumbnail = min(3 * values[-2] * values[-1], end - body)
+            if thumbnail:
+                yield self.emit_node(node, body, thumbnail, "Uncompressed 24 bit RGB (8 bits per color channel) raster "
+                                     "thumbnail data in the order R0, G0, B0, ... Rn-1, Gn-1, Bn-1; with n = Xthumbnail x "
+                                     "Ythumbnail (3xn)", name="Thumbnail", depth=2)
+                body += thumbnail
+        elif marker in START_OF_FRAME and end - body >= FRAME_HEADER.size:
+            values = FRAME_HEADER.unpack(buffer, body)
+            yield from self.emit_values(node, body, FRAME_HEADER, values, depth=2)
+            body += FRAME_HEADER.size
+            for component in range(min(values[-1], (end - body) // FRAME_COMPONENT.size)):
+                yield from self.emit_values(node, body, FRAME_COMPONENT, FRAME_COMPONENT.unpack(buffer, body), depth=2,
+                                            component=component + 1)
+                body += FRAME_COMPONENT.size
+        if end > body:
+            yield self.emit_node(node, body, end - body, f"Content of the {name} segment", name="Segment data", depth=2)
 
-        # https://people.cs.umass.edu/~liberato/courses/2017-spring-compsci365/assignments/05-jpeg-and-exif/
-        # https://asecuritysite.com/forensics/jpeg
-        # https://www.w3.org/Graphics/JPEG/jfif3.pdf
-        # https://www.w3.org/Graphics/JPEG/itu-t81.pdf
-        # https://en.wikipedia.org/wiki/JPEG_File_Interchange_Format
-        # root.add_child(<fileLocation>, Node(<readThisLength>, <description>))
-        """root.add_child(<fileLocation>, Node(<readThisLength>, <description>)) is adding a child node to the root node. <fileLocation> is the current position in the file (in bytes) from where you're reading the data. Node(<readThisLength>, <description>) creates a new Node object. <readThisLength> is the number of bytes to read from the file, and <description> is a string that describes what the data represents. The new child node is added to the root node's list of children, and is associated with the file location key."""
-        
-        location = self.file.tell()
-        header_check = self.file.read(2)  # adjust the number of bytes read as needed
-
-        # Compare the read bytes to the expected values
-        if header_check == b'\xff\xd8':
-            # SOI
-            start_of_image_marker = Node(header_check, "Start of Image marker (SOI).", name="Header")
-            root.add_child(location, start_of_image_marker)
-            
-            # App0 section
-            app0_marker = root.add_child(self.file.tell(), Node(self.file.read(2), "APP0 marker"))
-            
-            app0_loc = self.file.tell() # need to tell the file where we're at before reading
-            app0_length = self.file.read(2)
-            length_of_app0_section = root.add_child(app0_loc, Node(app0_length, "Length of APP0 section: \n\n" + str(app0_length) + "\t = \t" + str(int.from_bytes(app0_length, 'big'))))
-            
-            identifier = root.add_child(self.file.tell(), Node(self.file.read(5), "Identifier. 'JFIF' and null-termination. JFIF is short for JPEG Interchange Format. JPEG is short for Joint Photographic Expert Group. JFIF is a standard for compressing and decompressing digital images. When JPEG images are stored in files, they are often wrapped in a JFIF structure. This structure provides extra information that isn't part of the raw JPEG image itself."))
-            version = root.add_child(self.file.tell(), Node(self.file.read(2), "First byte for major version, second byte for minor version (01 02 for 1.02)"))
-            pixel_density_units = root.add_child(self.file.tell(), Node(self.file.read(1), "Units for the following pixel density fields 00 : No units; width:height pixel aspect ratio = Ydensity:Xdensity 01 : Pixels per inch (2.54 cm)02 : Pixels per centimeter"))
-            horizontal_pixel_density = root.add_child(self.file.tell(), Node(self.file.read(2), "Horizontal pixel density. Must not be zero"))
-            vertical_pixel_density = root.add_child(self.file.tell(), Node(self.file.read(2), "Vertical pixel density. Must not be zero"))
-            horizontal_pixel_count = root.add_child(self.file.tell(), Node(self.file.read(1), "Horizontal pixel count of the following embedded RGB thumbnail. May be zero"))
-            vertical_pixel_count = root.add_child(self.file.tell(), Node(self.file.read(1), "Vertical pixel count of the following embedded RGB thumbnail. May be zero"))
-            uncompressed_rgb_thumbnail_data = root.add_child(self.file.tell(), Node(self.file.read(1), "Uncompressed 24 bit RGB (8 bits per color channel) raster thumbnail data in the order R0, G0, B0, ... Rn-1, Gn-1, Bn-1; with n = Xthumbnail x Ythumbnail (3xn)"))
-            #The embedded RGB thumbnail data's length seems to be hardcoded to read just one byte. You might want to adjust this to read the entire thumbnail, which would be 3 x horizontal_pixel_count x vertical_pixel_count bytes.
-            # Use this to add calculated values
-            # uncompressed_rgb_thumbnail_data.add_more_description_content("test")
-
-        else:
-            start_of_image_marker = Node(header_check, "Unknown marker")
-            root.add_child(location, start_of_image_marker)
-
-        # Read the remaining data as unknown
-        remaining_data = self.file.read()
-        if remaining_data:
-            root.add_child(root.children[-1][0] + 1, Node(remaining_data, "Either the parsing function has not been finalized, the file format is not valid or you've encountered a file that we should look into. Please file an issue on the git repo."))
-
-
-
-
-
-        return root
-
-    @classmethod
-    def recognizes(cls, file):
-        file.seek(0)
-        header = file.read(2)
-        return header == b'\xff\xd8'
+        if segment.scan_length:
+            info = f"Entropy-coded data of the scan, {segment.scan_length} bytes, with any restart markers"
+            if truncation is not None:
+                info += f"\n\n{truncation}"
+            yield self.emit_node(root, end, segment.scan_length, info, name="Scan data", table_value=segment.scan_length)
 
+    def parse_fill(self, node, offset, fill):
+        """Add the 0xFF fill bytes before the marker at offset, if there are any."""
+        if fill:
+            yield self.emit_node(node, offset - fill, fill, f"{fill} fill bytes (0xFF) before the marker, which "
+                                 "encoders may pad with", name="Fill bytes", depth=2)
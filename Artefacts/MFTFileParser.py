@@ -1,96 +1,366 @@
+import logging
+import os
+from collections import Counter
+
 from common import Node, FileParser
-import struct
+from cursor import filetime_to_datetime
+from fields import FieldSchema
+from mft_attributes import (ATTRIBUTE_TYPES, FILE_NAME, FILE_NAME_NAMESPACES, FILE_NAME_SIZE, STANDARD_INFORMATION,
+                            file_reference, record_attributes)
+from mft_parallel import scan_records_in_parallel
+from mft_paths import PATH_OK, PATH_STATUS, PathIndex
+from mft_records import (BAAD_SIGNATURE, FILE_SIGNATURE, FIXUP_BATCH_RECORDS, FLAG_DIRECTORY, FLAG_IN_USE, RECORD_EMPTY,
+                         RECORD_OK, RECORD_STATUS, MFTRecords, record_size_of, volume_layout)
 
 # ChatGPT generated starter.. not looked at yet
 
+BOOT_SECTOR = FieldSchema([
+    (3, "x86 JMP and NOP instructions", "JMP and NOP"),
+    (8, "OEM ID", "NTFS String", lambda data: data.decode('ascii', errors='ignore'), '8s'),
+    (2, "Bytes per sector", "BPB"),
+    (1, "Sectors Per Cluster", "Sectors Per Cluster"),
+    (2, "Reserved Sectors, unused", "Reserved Sectors"),
+    (3, "Unused", "Unused"),
+    (2, "Unused by NTFS", "Unused by NTFS"),
+    (1, "Media Descriptor", "Media Descriptor"),
+    (2, "Unused", "Unused"),
+    (2, "Sectors Per Track", "Sectors Per Track"),
+    (2, "Number Of Heads", "Number Of Heads"),
+    (4, "Hidden Sectors", "Hidden Sectors"),
+    (4, "Unused", "Unused"),
+    (4, "EBPB Unused", "EBPB Unused"),
+    (8, "Total sectors", "Total sectors"),
+    (8, "$MFT cluster number", "$MFT cluster number"),
+    (8, "$MFTMirr cluster number", "$MFTMirr cluster number"),
+    (1, "Bytes or Clusters Per File Record Segment", "Bytes/Clusters Per File Record Segment", None, 'b'),
+    (3, "Unused", "Unused"),
+    (1, "Bytes or Clusters Per Index Buffer", "Bytes/Clusters Per Index Buffer", None, 'b'),
+    (3, "Unused", "Unused"),
+    (8, "Volume Serial Number", "Volume Serial Number", lambda serial: f"{serial:016X}"),
+    (4, "Checksum, unused", "Checksum"),
+    (426, "Bootstrap Code", "Bootstrap Code"),
+    (2, "End-of-sector Marker", "End-of-sector Marker", lambda marker: f"0x{marker:04X}"),
+])
+
+# The fixed header at the start of every FILE record
+FILE_RECORD_HEADER = FieldSchema([
+    (4, "Signature, FILE (or BAAD for a record that failed its update sequence check)", "Signature",
+     lambda data: data.decode('ascii', errors='replace'), '4s'),
+    (2, "Offset to the update sequence: {value}", "Update sequence offset"),
+    (2, "Size of the update sequence in words, including the update sequence number: {value}", "Update sequence size"),
+    (8, "$LogFile sequence number (LSN): {value}", "$LogFile sequence number"),
+    (2, "Sequence number, incremented every time the record is reused: {value}", "Sequence number"),
+    (2, "Hard link count: {value}", "Hard link count"),
+    (2, "Offset to the first attribute: {value}", "First attribute offset"),
+    (2, lambda flags: f"Flags: {flags:#06x} ({'in use' if flags & 0x01 else 'not in use'}{', directory' if flags & 0x02 else ''})", "Flags"),
+    (4, "Used size of the record: {value}", "Used size"),
+    (4, "Allocated size of the record: {value}", "Allocated size"),
+    (8, "Reference to the base record, zero for a base record: {value}", "Base record reference"),
+    (2, "Next attribute id: {value}", "Next attribute id"),
+    (2, "Padding", "Padding"),
+    (4, "Number of this MFT record: {value}", "Record number"),
+])
+
+# DOS file attributes, as in $STANDARD_INFORMATION and $FILE_NAME
+FILE_ATTRIBUTES = {
+    0x0001: "read-only", 0x0002: "hidden", 0x0004: "system", 0x0020: "archive", 0x0040: "device",
+    0x0080: "normal", 0x0100: "temporary", 0x0200: "sparse", 0x0400: "reparse point", 0x0800: "compressed",
+    0x1000: "offline", 0x2000: "not content indexed", 0x4000: "encrypted",
+    0x10000000: "directory", 0x20000000: "index view",
+}
+
+
+def filetime_value(filetime):
+    return filetime_to_datetime(filetime) or f"Invalid FILETIME: {filetime}"
+
+
+def describe_file_attributes(flags):
+    names = [name for flag, name in FILE_ATTRIBUTES.items() if flags & flag]
+    return f"File attributes: {flags:#010x} ({', '.join(names) or 'none'})"
+
+
+def describe_file_reference(reference):
+    record_number, sequence = file_reference(reference)
+    return f"MFT entry {record_number}, sequence number {sequence}"
+
+
+# https://flatcap.github.io/linux-ntfs/ntfs/concepts/attribute_header.html
+ATTRIBUTE_HEADER = FieldSchema([
+    (4, lambda value: f"Attribute type: {value:#x} ({ATTRIBUTE_TYPES.get(value, 'unknown')})", "Attribute type"),
+    (4, "Length of the attribute, including this header: {value}", "Length"),
+    (1, "Non-resident flag, 1 if the value is stored in clusters outside the record: {value}", "Non-resident flag"),
+    (1, "Length of the attribute name in characters: {value}", "Name length"),
+    (2, "Offset to the attribute name: {value}", "Name offset"),
+    (2, lambda flags: f"Flags: {flags:#06x}{' (compressed)' if flags & 0x00FF else ''}{' (encrypted)' if flags & 0x4000 else ''}{' (sparse)' if flags & 0x8000 else ''}", "Flags"),
+    (2, "Attribute id, unique within the record: {value}", "Attribute id"),
+])
+
+RESIDENT_HEADER = FieldSchema([
+    (4, "Length of the value: {value}", "Value length"),
+    (2, "Offset to the value: {value}", "Value offset"),
+    (1, "Indexed flag: {value}", "Indexed flag"),
+    (1, "Padding", "Padding"),
+])
+
+NON_RESIDENT_HEADER = FieldSchema([
+    (8, "First virtual cluster number (VCN) of the data runs: {value}", "Starting VCN"),
+    (8, "Last virtual cluster number (VCN) of the data runs: {value}", "Last VCN"),
+    (2, "Offset to the data runs: {value}", "Data runs offset"),
+    (2, "Compression unit size, as a power of two clusters (0 if not compressed): {value}", "Compression unit size"),
+    (4, "Padding", "Padding"),
+    (8, "Allocated size of the data, a whole number of clusters: {value}", "Allocated size"),
+    (8, "Real size of the data: {value}", "Real size"),
+    (8, "Initialized size of the data: {value}", "Initialized size"),
+])
+
+# https://flatcap.github.io/linux-ntfs/ntfs/attributes/standard_information.html
+STANDARD_INFORMATION_FIELDS = [
+    (8, "File created: {value}", "Created", filetime_value),
+    (8, "File last modified: {value}", "Modified", filetime_value),
+    (8, "MFT record last modified: {value}", "MFT modified", filetime_value),
+    (8, "File last accessed: {value}", "Accessed", filetime_value),
+    (4, describe_file_attributes, "File attributes"),
+    (4, "Maximum number of versions, 0 if versioning is off: {value}", "Maximum versions"),
+    (4, "Version number: {value}", "Version number"),
+    (4, "Class id: {value}", "Class id"),
+]
+STANDARD_INFORMATION_V1 = FieldSchema(STANDARD_INFORMATION_FIELDS)
+# NTFS 3.0 and later
+STANDARD_INFORMATION_V3 = FieldSchema(STANDARD_INFORMATION_FIELDS + [
+    (4, "Owner id, an index into $Quota: {value}", "Owner id"),
+    (4, "Security id, an index into $Secure: {value}", "Security id"),
+    (8, "Bytes charged to the owner's quota: {value}", "Quota charged"),
+    (8, "Update sequence number (USN) of the last change in $UsnJrnl: {value}", "USN"),
+])
+
+# https://flatcap.github.io/linux-ntfs/ntfs/attributes/file_name.html
+FILE_NAME_HEADER = FieldSchema([
+    (8, describe_file_reference, "Parent directory", describe_file_reference),
+    (8, "File created: {value}", "Created", filetime_value),
+    (8, "File last modified: {value}", "Modified", filetime_value),
+    (8, "MFT record last modified: {value}", "MFT modified", filetime_value),
+    (8, "File last accessed: {value}", "Accessed", filetime_value),
+    (8, "Allocated size of the file: {value}", "Allocated size"),
+    (8, "Real size of the file: {value}", "Real size"),
+    (4, describe_file_attributes, "Flags"),
+    (4, "Used by EAs and reparse points: {value}", "Reparse value"),
+    (1, "Length of the file name in characters: {value}", "Name length"),
+    (1, lambda namespace: f"File name namespace: {FILE_NAME_NAMESPACES.get(namespace, 'unknown')}", "Namespace"),
+])
+
+# The value schemas of each attribute type, longest first: a value is read with the first one it is long enough for
+ATTRIBUTE_SCHEMAS = {
+    STANDARD_INFORMATION: (STANDARD_INFORMATION_V3, STANDARD_INFORMATION_V1),
+    FILE_NAME: (FILE_NAME_HEADER,),
+}
+DEFAULT_ATTRIBUTES = (STANDARD_INFORMATION, FILE_NAME)
+
+BAD_RECORD_COLOR = "#FF0000"
+
+logger = logging.getLogger(__name__)
+
+
 class MFTFileParser(FileParser):
-    def __init__(self, file):
+    # An NTFS volume's boot sector (OEM ID), or an MFT starting with its first FILE record
+    SIGNATURES = [(3, b'NTFS    '), (0, b'FILE')]
+
+    def __init__(self, file, attributes=DEFAULT_ATTRIBUTES, paths=True, workers=None):
+        """
+        :param file: The open volume image or $MFT.
+        :param attributes: The attribute types to add nodes for in every record. Only these
+            are read from the records; everything else comes from the record headers.
+        :param paths: Whether to resolve the full path of every entry (see mft_paths),
+            which is then the table value of the entry.
+        :param workers: The number of processes to walk the attributes of every record
+            in before the entries are listed (see mft_parallel), or None to walk them
+            while listing. Only used when the file is on disk.
+        """
         super().__init__(file)
+        self.attributes = set(attributes)
+        self.paths = paths
+        self.workers = workers
+        self.records = None  # MFTRecords, once the record headers have been decoded
+        self.volume = False  # Whether the file is a volume image starting with the boot sector
+        self.path_index = None  # PathIndex, once the parent references have been read
+        self.decoded = None  # Record index -> attributes walked by the workers, see mft_parallel
         self.root = None
 
-    def parse(self):
-        self.file.seek(0)
-        self.root = Node(b'', "NTFS Boot Sector")
-
-        # Define and parse the boot sector fields
-        fields = [
-            (3, "x86 JMP and NOP instructions", "JMP and NOP"),
-            (8, "OEM ID", "NTFS String"),
-            (2, "Bytes per sector", "BPB"),
-            (1, "Sectors Per Cluster", "Sectors Per Cluster"),
-            (2, "Reserved Sectors, unused", "Reserved Sectors"),
-            (3, "Unused", "Unused"),
-            (2, "Unused by NTFS", "Unused by NTFS"),
-            (1, "Media Descriptor", "Media Descriptor"),
-            (2, "Unused", "Unused"),
-            (2, "Sectors Per Track", "Sectors Per Track"),
-            (2, "Number Of Heads", "Number Of Heads"),
-            (4, "Hidden Sectors", "Hidden Sectors"),
-            (4, "Unused", "Unused"),
-            (4, "EBPB Unused", "EBPB Unused"),
-            (8, "Total sectors", "Total sectors"),
-            (8, "$MFT cluster number", "$MFT cluster number"),
-            (8, "$MFTMirr cluster number", "$MFTMirr cluster number"),
-            (1, "Bytes or Clusters Per File Record Segment", "Bytes/Clusters Per File Record Segment"),
-            (3, "Unused", "Unused"),
-            (1, "Bytes or Clusters Per Index Buffer", "Bytes/Clusters Per Index Buffer"),
-            (3, "Unused", "Unused"),
-            (8, "Volume Serial Number", "Volume Serial Number"),
-            (4, "Checksum, unused", "Checksum"),
-            (426, "Bootstrap Code", "Bootstrap Code"),
-            (2, "End-of-sector Marker", "End-of-sector Marker")
-        ]
-        for length, description, name in fields:
-            data = self.file.read(length)
-            node = Node(data, description, name)
-            self.root.add_child(self.file.tell() - length, node)
+    def decode_records(self):
+        """
+        Decode the headers of every FILE record in bulk (see mft_records.MFTRecords).
 
-        # Parse MFT Entries
-        self.parse_mft_entries()
+        The records start an $MFT file. In a volume image the boot sector gives where the
+        $MFT starts and the record size (see mft_records.volume_layout); if its fields are
+        not valid, the records are looked for right after the boot sector.
+        """
+        if self.records is None:
+            buffer = self.cursor.buffer
+            self.volume = bytes(buffer[:4]) not in (FILE_SIGNATURE, BAAD_SIGNATURE)
+            layout = volume_layout(buffer[:BOOT_SECTOR.size]) if self.volume else None
+            if layout is not None:
+                start, record_size = layout
+                start = min(start, len(buffer))
+            else:
+                start = BOOT_SECTOR.size if self.volume else 0
+                record_size = record_size_of(buffer, start)
+            self.records = MFTRecords(buffer, start, record_size)
+        return self.records
+
+    def index_paths(self):
+        """
+        Read the parent reference and name of every entry, so full paths can be resolved
+        (see mft_paths.PathIndex).
+        """
+        if self.path_index is None:
+            self.path_index = PathIndex(self.decode_records(), self.decoded)
+        return self.path_index
+
+    def scan_in_parallel(self, path):
+        """
+        Walk the attributes of every record in self.workers processes, logging the progress
+        of each shard of records as it is done.
+        """
+        records = self.decode_records()
+        types = self.attributes | {FILE_NAME} if self.paths else self.attributes
+        self.decoded = scan_records_in_parallel(path, records.start, records.record_size, len(records), types,
+                                                self.workers, self.shard_done)
+
+    def shard_done(self, shard, done, count):
+        found = ", ".join(f"{number} {RECORD_STATUS[status]}" for status, number in sorted(shard.counts.items()))
+        logger.info("MFT records %d to %d scanned (%s): %d of %d records", shard.first, shard.last - 1, found, done, count)
+
+    def table_info(self):
+        counts = Counter(self.records.status)
+        found = ", ".join(f"{counts[status]} {description}" for status, description in RECORD_STATUS.items() if counts[status])
+        return f"Master File Table: {len(self.records)} records of {self.records.record_size} bytes ({found or 'none'})"
+
+    def entry_path(self, index):
+        """The full path of the entry at index, or None if it has no name."""
+        return self.index_paths().path(index)
+
+    def entry_info(self, index):
+        records = self.records
+        flags = int(records.flags[index])
+        status = int(records.status[index])
+        info = (f"MFT entry {index}, {'in use' if flags & FLAG_IN_USE else 'not in use'}"
+                f"{', a directory' if flags & FLAG_DIRECTORY else ''}, sequence number {records.sequence[index]}")
+        if status != RECORD_OK:
+            info += f". The record is {RECORD_STATUS[status]}"
+        if self.path_index is not None:
+            path, path_status = self.path_index.resolve(index)
+            if path is not None:
+                info += f". Path: {self.path_index.path(index)}"
+            if path_status != PATH_OK:
+                info += f", {PATH_STATUS[path_status]}"
+        return info
 
-        return self.root
+    def iter_parse(self, keep_tree=True):
+        self.keep_tree = keep_tree
+        self.cursor.seek(0)
+        records = self.decode_records()
+        path = getattr(self.file, "name", None)
+        # Without attributes or paths there is nothing for the workers to do
+        if (self.workers and (self.attributes or self.paths) and self.decoded is None
+                and isinstance(path, str) and os.path.isfile(path)):
+            self.scan_in_parallel(path)
+        if self.paths:
+            self.index_paths()
+        if self.volume:
+            self.root = Node(b'', "NTFS Boot Sector")
+            yield 0, self.root, 0
+            # Parse the boot sector fields
+            yield from self.emit_fields(self.root, BOOT_SECTOR)
+        else:
+            self.root = Node(b'', "NTFS Master File Table")
+            yield 0, self.root, 0
+
+        # Parse MFT Entries
+        yield from self.parse_mft_entries()
 
     def parse_mft_entries(self):
-        mft_root = Node(b'', "Master File Table")
-        self.root.add_child(self.file.tell(), mft_root)
-
-        while True:
-            entry_start = self.file.tell()
-            entry_data = self.file.read(1024)  # Standard size of an MFT entry
-            
-            if entry_data[:4] != b'FILE':
-                break
-
-            entry_node = Node(entry_data, "MFT Entry")
-            mft_root.add_child(entry_start, entry_node)
-
-            # Parse specific attributes within the MFT entry
-            self.parse_standard_information(entry_data, entry_node)
-            self.parse_file_name(entry_data, entry_node)
-            # Add more attribute parsing methods here
-
-    def parse_standard_information(self, entry_data, parent_node):
-        # Example: Parse the $STANDARD_INFORMATION attribute
-        offset = 0x30  # Example offset; actual value may vary
-        data = entry_data[offset:offset + 72]
-        node = Node(data, "$STANDARD_INFORMATION Attribute")
-        parent_node.add_child(offset, node)
-
-    def parse_file_name(self, entry_data, parent_node):
-        # Example: Parse the $FILE_NAME attribute
-        offset = 0x60  # Example offset; actual value may vary
-        length = struct.unpack_from('<I', entry_data, offset + 4)[0] - 0x18
-        data = entry_data[offset + 0x18:offset + 0x18 + length]
-        node = Node(data, "$FILE_NAME Attribute")
-        parent_node.add_child(offset, node)
-
-    # Add more parsing methods for other attributes and metafiles
-
-    @classmethod
-    def recognizes(cls, file):
-        # Read the first 4 bytes of the first MFT entry
-        file.seek(0)
-        signature = file.read(4)
-
-        # Check if the signature matches "FILE"
-        return signature == b'FILE'
+        records = self.records
+        mft_root = Node(b'', self.table_info, name="Master File Table")
+        yield self.emit(self.root, records.start, mft_root)
+
+        size = records.record_size
+        for first in range(0, len(records), FIXUP_BATCH_RECORDS):
+            last = min(first + FIXUP_BATCH_RECORDS, len(records))
+            # Attributes are read from the records with their update sequence applied
+            fixed = records.fixed(first, last) if self.attributes else None
+            for index in range(first, last):
+                status = records.status[index]
+                if status == RECORD_EMPTY:
+                    continue
+                entry_start = records.offset(index)
+                path = self.path_index.path(index) if self.path_index is not None else None
+                entry_node = self.node_at(entry_start, size, lambda index=index: self.entry_info(index), name="MFT Entry",
+                                          color=None if status == RECORD_OK else BAD_RECORD_COLOR,
+                                          table_value=index if path is None else path)
+                yield self.emit(mft_root, entry_start, entry_node, depth=2)
+                self.cursor.seek(entry_start)
+                yield from self.emit_fields(entry_node, FILE_RECORD_HEADER, depth=3)
+                if status != RECORD_OK or fixed is None:
+                    continue
+
+                entry_data = fixed[(index - first) * size:(index - first + 1) * size]
+                if self.decoded is not None:
+                    attributes = self.decoded.get(index, ())
+                else:
+                    end = min(int(records.used_size[index]), size)
+                    attributes = record_attributes(entry_data, int(records.attribute_offset[index]), end, self.attributes)
+                yield from self.parse_attributes(entry_node, entry_start, entry_data, attributes)
+
+        if records.trailing:
+            self.cursor.seek(records.offset(len(records)))
+            yield self.add_lazy_child(self.root, records.trailing, "Unparsed!\n\nAn incomplete record at the end of the file",
+                                      name="Trailing data", color=BAD_RECORD_COLOR)
+
+    def attribute_info(self, attribute, value):
+        description = f"{ATTRIBUTE_TYPES.get(attribute.type, 'Unknown')} attribute"
+        if attribute.name:
+            description += f" named {attribute.name}"
+        if attribute.non_resident:
+            return description + f", non-resident: its {attribute.value_length} bytes are in the clusters its data runs list"
+        if value is not None:
+            return description + f": {value.name}"
+        return description + f", resident: its value of {attribute.value_length} bytes is in the record"
+
+    def parse_attributes(self, entry_node, entry_start, record, attributes):
+        """
+        Add the attributes of a record whose types were asked for.
+
+        :param record: The record with its update sequence applied, which the values are
+            read from. The nodes show the bytes of the file.
+        :param attributes: The (Attribute, FileName or None) of the record, in order (see
+            mft_attributes.record_attributes).
+        """
+        for attribute, value in attributes:
+            if attribute.type not in self.attributes:
+                continue
+            offset = entry_start + attribute.offset
+            node = self.node_at(offset, attribute.length, self.attribute_info(attribute, value),
+                                name=ATTRIBUTE_TYPES.get(attribute.type, f"Attribute {attribute.type:#x}"),
+                                table_value=value.name if value is not None else attribute.name or None)
+            yield self.emit(entry_node, offset, node, depth=3)
+            yield from self.emit_values(node, offset, ATTRIBUTE_HEADER, ATTRIBUTE_HEADER.unpack(record, attribute.offset), depth=4)
+            header = NON_RESIDENT_HEADER if attribute.non_resident else RESIDENT_HEADER
+            yield from self.emit_values(node, offset + 0x10, header, header.unpack(record, attribute.offset + 0x10), depth=4)
+            if attribute.name:
+                name_offset = int.from_bytes(record[attribute.offset + 10:attribute.offset + 12], 'little')
+                yield self.emit_node(node, offset + name_offset, 2 * len(attribute.name), f"Attribute name: {attribute.name}",
+                                     name="Attribute name", table_value=attribute.name, depth=4)
+
+            value_start = entry_start + attribute.value_offset
+            if attribute.non_resident:
+                length = attribute.offset + attribute.length - attribute.value_offset
+                yield self.emit_node(node, value_start, length, "Data runs: the clusters the value is stored in",
+                                     name="Data runs", depth=4)
+                continue
+            schema = next((schema for schema in ATTRIBUTE_SCHEMAS.get(attribute.type, ()) if schema.size <= attribute.value_length), None)
+            if schema is None:
+                yield self.emit_node(node, value_start, attribute.value_length, "Value", name="Value", depth=4)
+                continue
+            yield from self.emit_values(node, value_start, schema, schema.unpack(record, attribute.value_offset), depth=4)
+            if value is not None:
+                yield self.emit_node(node, value_start + FILE_NAME_SIZE, 2 * len(value.name), f"File name: {value.name}",
+                                     name="File name", table_value=value.name, depth=4)
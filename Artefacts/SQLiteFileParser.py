@@ -1,5 +1,18 @@
-from common import Node, FileParser
 import os
+import struct
+from collections import namedtuple
+
+from common import PALETTE, Node, FileParser, map_file
+from cursor import ByteCursor
+from fields import FieldSchema
+from sqlite_carve import RecordCarver, freeblocks, rowid_alias, table_schema
+from sqlite_pages import PageReader, Payload
+from sqlite_parallel import decode_pages_in_parallel
+from sqlite_survey import PENDING_BYTE, reserved_pages, summarize, survey_pages
+from sqlite_wal import FRAME_HEADER_SIZE, WALIndex
+from sqlite_record import (INTERIOR_PAGES, LEAF_TABLE_PAGE, TEXT_ENCODINGS, CorruptCell, column_names,
+                           decode_btree_page, decode_record, describe_serial_type, find_rowid, iter_rowid_range,
+                           iter_table_rows, serial_type_length)
 # https://www.sciencedirect.com/science/article/pii/S1742287618300471
 # https://digitalforensicforest.com/2015/07/27/sqlite-data-carving-a-way-to-trace/
 # https://digitalcorpora.org/corpora/sql/sqlite-forensic-corpus/
@@ -40,21 +53,160 @@ PAGE_TYPES = {
     0x0D: "leaf_table_btree"
 }
 
+# The 100 byte database header at the start of page 1
+DB_HEADER = FieldSchema([
+    (HEADER_LENGTH, "SQLite header string. Consider this string as a validation to an SQLite file.", "Header string",
+     lambda data: data.decode('ascii', errors='ignore')),
+    (PAGE_SIZE_LENGTH, "Page size. This has to be a power of 2 byte big-endian integer between the range of 512 and 32768. The value of 1 is an exception that means that the page size is set to 65536 bytes.", "Page size"),
+    (WRITE_VERSION_LENGTH,
+     "Write version (1: legacy, 2: WAL). Write version and read version (the next sequence) are always the same.", "Write version"),
+    (READ_VERSION_LENGTH,
+     "Read version (1: legacy, 2: WAL). Write version and read version (the previous sequence) are always the same.", "Read version"),
+    (UNUSED_SPACE_LENGTH,
+     "Bytes of unused reserved space at the end of each page. Typically this is set to zero, but if another value is present, it means that the space is used for extension, most likely for encryption.", "Unused Space"),
+    (MAX_PAYLOAD_FRACTION_LENGTH,
+     "Maximum embedded payload fraction. Must be 64", "Max payload fraction"),
+    (MIN_PAYLOAD_FRACTION_LENGTH,
+     "Minimum embedded payload fraction. Must be 32", "Min. payload fraction"),
+    (LEAF_PAYLOAD_FRACTION_LENGTH,
+     "Leaf payload fraction. Must be 32", "Leaf payload fraction"),
+    (FILE_CHANGE_COUNTER_LENGTH,
+     "File change counter. This contains a value that increments every time the database is updated.", "File change counter"), # set the color of this to red? - meaning forensic value!
+    (IN_HEADER_DB_SIZE_LENGTH,
+     "Size of the database file in pages (the \"in-header database size\")", "In-header DB size"),
+    (FIRST_FREELIST_TRUNK_PAGE_LENGTH,
+     "Page number of the first freelist trunk page", "First freelist trunk page"),
+    (TOTAL_FREELIST_PAGES_LENGTH,
+     "Total number of freelist pages", "Total freelist pages"),
+    (SCHEMA_COOKIE_LENGTH, "The schema cookie", "Schema cookie"),
+    (SCHEMA_FORMAT_NUMBER_LENGTH,
+     "The schema format number. Supported schema formats are 1, 2, 3, and 4", "Schema Format Number"),
+    (DEFAULT_PAGE_CACHE_SIZE_LENGTH,
+     "Default page cache size", "Default Page Cache Size"),
+    (LARGEST_ROOT_B_TREE_LENGTH, "The page number of the largest root b-tree page when in auto-vacuum or incremental-vacuum modes, or zero otherwise", "Auto-vacuum"),
+    (DATABASE_TEXT_ENCODING_LENGTH,
+     "The database text encoding. A value of 1 means UTF-8. A value of 2 means UTF-16le. A value of 3 means UTF-16be", "DB Text Encoding"),
+    (USER_VERSION_LENGTH,
+     "The \"user version\" as read and set by the user_version pragma", "User Version"),
+    (INCREMENTAL_VACUUM_MODE_LENGTH,
+     "True (non-zero) for incremental-vacuum mode. False (zero) otherwise", "Incremental Vacuum Mode"),
+    (APP_ID_LENGTH, "The \"Application ID\" set by PRAGMA application_id", "APP ID Length"),
+    (RESERVED_EXPANSION_LENGTH,
+     "Reserved for expansion. Must be zero", "Reserved Expansion", lambda data: int.from_bytes(data, "big")),
+    (VERSION_VALID_FOR_NUMBER_LENGTH,
+     "The version-valid-for number", "Version Valid For Number"),
+    (SQLITE_VERSION_NUMBER_LENGTH, "SQLITE_VERSION_NUMBER_LENGTH", "SQLite Version")
+], byteorder='>')
+
+
+def cell_content_start(value):
+    # Zero stands for 65536, which does not fit in two bytes
+    return 65536 if value == 0 else value
+
+
+def btree_page_header(title, interior):
+    """
+    The B-tree page header of a page type; interior pages end with the right-most pointer.
+    """
+    fields = [
+        (1, "Btree page {page}: {value}.  Indicating a {page_type}", f"Page {{page}}: {title}"),
+        (2, "Start of the first freeblock is set to offset: {value}", "1st freeblock start"),
+        (2, "Number of cells: {value}", "Num. of cells"),
+        (2, "Start of the cell content area: {value}", "Cell content start", cell_content_start),
+        (1, "Fragmented free bytes: {value}", "Fragmented free bytes"),
+    ]
+    if interior:
+        fields.append((4, "Right-most pointer: {value}", "Right-most pointer"))
+    return FieldSchema(fields, byteorder='>')
+
+
+INTERIOR_INDEX_HEADER = btree_page_header("Interior Index", interior=True)
+INTERIOR_TABLE_HEADER = btree_page_header("Interior Table", interior=True)
+LEAF_INDEX_HEADER = btree_page_header("Leaf Index", interior=False)
+LEAF_TABLE_HEADER = btree_page_header("Leaf Table", interior=False)
+
+PAGE_HEADERS = {
+    0x02: INTERIOR_INDEX_HEADER,
+    0x05: INTERIOR_TABLE_HEADER,
+    0x0A: LEAF_INDEX_HEADER,
+    0x0D: LEAF_TABLE_HEADER
+}
+
+UNALLOCATED_COLOR = "#FF0000"
+CARVED_COLOR = "#FFA500"
+
+# The columns of the sqlite_master table on page 1
+SQLITE_MASTER_COLUMNS = ["type", "name", "tbl_name", "rootpage", "sql"]
+
+# BLOBs longer than this are not shown in the table, only in the description
+MAX_BLOB_VALUE = 64
+
+# A row found by SQLiteFileParser.find_row or find_rows: the page its cell is on, the offset and
+# length of the cell and the offset of its record in the file, and the node of the cell
+RowMatch = namedtuple('RowMatch', 'table rowid page_number offset length record_offset node')
+
+
+def schema_entry(values):
+    """
+    The (root page, type, name, table name, sql) of the B-tree of a decoded sqlite_master row,
+    or None for rows without one (views and triggers) and rows that are not schema entries.
+    """
+    if len(values) < 4:
+        return None
+    kind, name, table_name, root_page = values[:4]
+    sql = values[4] if len(values) > 4 and isinstance(values[4], str) else None
+    if not isinstance(root_page, int) or root_page <= 0:
+        return None
+    return root_page, kind, name, table_name, sql
+
+
 class SQLiteFileParser(FileParser):
     """
     A parser for SQLite files. This parser reads the file's header and determines
     its basic properties, such as the version of SQLite it was written with, the 
     page size, and so on.
     """
+    SIGNATURES = [(0, b"SQLite format 3\x00")]
 
-    def __init__(self, file):
+    def __init__(self, file, tables=None, workers=None, carve=True, wal=None, record_columns=True):
+        """
+        :param file: The open SQLite file.
+        :param tables: Names of the tables (and indexes) to parse, or None for the whole database.
+            The pages of other tables are not read at all.
+        :param workers: The number of processes to decode the B-tree pages of the whole database
+            with before the tree is built, or None to decode each page as it is reached.
+        :param carve: Whether to look for deleted records in freeblocks, unallocated space,
+            freelist pages and orphaned pages.
+        :param wal: The open write-ahead log (-wal file) of the database, to parse the
+            database as of its last commit, or None to parse the database file as it is.
+        :param record_columns: Whether to add a child per column of every record. Without them
+            each record is one node listing its values, which makes parsing a database with many
+            rows about twice as fast.
+        """
         super().__init__(file)
         self.parsed_fields = {}  # Dictionary to store parsed fields from dictionary way of coding
+        self.tables = set(tables) if tables is not None else None
+        self.workers = workers
+        self.decoded_pages = {}  # Page number -> cells decoded by the workers, see sqlite_parallel
+        self.carve = carve
+        self.wal = wal
+        self.record_columns = record_columns
+        self.column_colors = {}  # Table name -> the colour of the column nodes of its records
+        self.wal_index = None  # WALIndex of the log, once it has been overlaid
+        self.wal_source = None  # The log's mmap, which nodes of the pages in the log refer to
+        self.carver = None  # RecordCarver for the tables in sqlite_master, once it has been read
+        self.rowid_aliases = {}  # Table name -> the index of its INTEGER PRIMARY KEY column, if it has one
         self.page_size = None
+        self.usable_size = None
+        self.page_count = 0
+        self.pages = None  # PageReader, once the page size is known
+        self.schema = None  # Name -> (root page, sql) of each B-tree, once read by read_schema
+        self.visited = bytearray()  # Page number -> 1 once the page has been parsed
         self.autovacuum = None
+        self.encoding = "utf-8"
         self.current_color = [0x33, 0x33, 0x33]  # Initialize as a list of integers
         self.root = None
-        self.page_counter = 0
+        self.file_size = 0
 
     def determine_page_type(self, first_byte):
         """
@@ -78,357 +230,581 @@ class SQLiteFileParser(FileParser):
         """Retrieve a parsed field by its name."""
         return self.parsed_fields.get(field_name)
     
-    def get_page_offset(self, page_num, current_offset):
-        """
-            Calculate the offset of a given sequence within its own page.
-
-            Args:
-            - page_num (int): The page number where the sequence resides.
-            - current_offset (int): The current offset of the sequence in the file.
-
-            Returns:
-            - int: The offset of the sequence within its own page.
-
-            Description:
-            This function calculates the offset of a given sequence within its own page,
-            taking into account the page size and any adjustments needed for the specific
-            format of the SQLite pages. For the first page, the function returns the difference
-            between the current offset and the start of the page. For subsequent pages, the
-            function adjusts the offset to account for the page header and any other format
-            specific adjustments.
-            """        
-        page_start_offset = (page_num - 1) * self.page_size
-        if page_num == 1:
-            return current_offset - page_start_offset
-        return (current_offset - page_start_offset) - page_num + 1 - self.page_size
-
     def get_next_color(self, size):
         # Increase the color value for each channel
         self.current_color = [(c + size) % 256 for c in self.current_color]
         return f"#{self.current_color[0]:02x}{self.current_color[1]:02x}{self.current_color[2]:02x}"
-    
+
+    def overlay_wal(self):
+        """
+        Index the write-ahead log, so the database is read as of its last commit: pages the
+        log has a committed version of are read from the log (see PageReader), the others
+        from the database file, and the database has the size of that commit.
+
+        Nothing is copied. Nodes keep the offsets of the pages in the database file and
+        refer to the bytes of the log for its pages (see node_at), so the log stays mapped
+        for as long as the parser and its nodes are around.
+
+        :raises ValueError: If the log cannot be read.
+        """
+        self.cursor.seek(16)
+        page_size = self.cursor.u16be()
+        page_size = 65536 if page_size == 1 else page_size
+        self.wal_source = map_file(self.wal)
+        index = WALIndex(ByteCursor.from_file(self.wal, self.wal_source).buffer)
+        if index.page_size != page_size:
+            raise ValueError(f"The log has pages of {index.page_size} bytes and the database of {page_size}")
+        self.wal_index = index
+
+    def node_at(self, offset, length, info, name=None, color=None, table_value=None):
+        """
+        A node for length bytes at an offset of the database, which refers to the log
+        when the page holding them is read from the write-ahead log.
+        """
+        index = self.wal_index
+        if index is not None:
+            page_number = offset // index.page_size + 1
+            frame = index.latest.get(page_number)
+            start = offset - (page_number - 1) * index.page_size
+            if frame is not None and page_number <= index.database_size and start + length <= index.page_size:
+                return Node.from_source(index.buffer, frame.offset + FRAME_HEADER_SIZE + start, length, info,
+                                        name=name, color=color, table_value=table_value)
+        # As FileParser.node_at, which this is called too often to go through
+        if self.source is None:
+            return Node(bytes(self.cursor.buffer[offset:offset + length]), info, name=name, color=color, table_value=table_value)
+        return Node.from_source(self.source, offset, length, info, name=name, color=color, table_value=table_value)
+
+    def read(self, offset, length):
+        """The bytes at an offset of the database, within one page, as the PageReader has them."""
+        page_number = offset // self.page_size + 1
+        start = offset - (page_number - 1) * self.page_size
+        return self.pages.get_page(page_number)[start:start + length]
+
     def parse_unknown_data(self, interval, details=None, name="Unparsed data"):
-        unknown_data = self.file.read(interval)
-        self.root.add_child(self.file.tell() - interval, Node(unknown_data, f"Unparsed!\n\n{details}", name=f"{name}", color="#FF0000"))
-
-    def parse_payload(self, interval):
-        payload = self.file.read(interval)
-        self.root.add_child(self.file.tell() - interval, Node(payload, f"Payload: {payload}", name="Payload"))
-
-    def parse_cell_pointer(self, cellpointer_array_bytes):
-        cellpointer_offsets = []
-        for i in range(0, len(cellpointer_array_bytes), 2):
-            two_bytes = cellpointer_array_bytes[i:i+2]
-            cellpointer = int.from_bytes(two_bytes, "big")
-            cellpointer_offsets.append(cellpointer)
-            self.root.add_child(self.file.tell() - 2, Node(two_bytes, f"Cell Pointer: {cellpointer}", name=f"cellpointer: {cellpointer}"))
+        yield self.add_lazy_child(self.root, interval, f"Unparsed!\n\n{details}", name=f"{name}", color="#FF0000")
+
+    def page_offset(self, page_number):
+        return (page_number - 1) * self.page_size
+
+    def claim_page(self, page_number):
+        """
+        Mark a page as visited. Returns False for pages that do not exist or were visited
+        already, which keeps corrupt or cyclic pointers from being followed twice.
+        """
+        if not 1 <= page_number <= self.page_count or self.visited[page_number]:
+            return False
+        self.visited[page_number] = 1
+        return True
+
+    def payload_info(self, start, end):
+        return lambda: f"Payload: {bytes(self.read(start, end - start))}"
+
+    def column_info(self, name, serial_type, value, truncated):
+        if truncated and value is None and serial_type >= 12:
+            # A BLOB too long to show, whose overflow pages were not read
+            return lambda: f"{name} ({describe_serial_type(serial_type)}), continued on the overflow pages"
+        if truncated:
+            return lambda: f"{name} ({describe_serial_type(serial_type)}), continued on the overflow pages: {value!r}"
+        return lambda: f"{name} ({describe_serial_type(serial_type)}): {value!r}"
+
+    def table_color(self, table):
+        """One colour for the column nodes of every record of a table, so they are not drawn per node."""
+        color = self.column_colors.get(table)
+        if color is None:
+            color = self.column_colors[table] = PALETTE[len(self.column_colors) * 7 % len(PALETTE)]
+        return color
+
+    def overflowing_payload(self, start, local_size, overflow_page, payload_size):
+        """The Payload of a cell whose local part is at start and whose tail is on overflow pages."""
+        local = self.read(start, local_size)
+        return Payload(self.pages, local, overflow_page, payload_size, self.usable_size)
+
+    def parse_record(self, parent, page_start, cell, columns, depth, color=None, rowid_column=None):
+        """
+        Add the record header and a child per column of the record of a decoded cell,
+        with the decoded values as table values, or one node for the whole record
+        without record_columns.
+
+        :param columns: The column names, or None to number the columns.
+        :param color: The colour of the column nodes.
+        :param rowid_column: The index of the INTEGER PRIMARY KEY column, which is shown with the rowid of the cell.
+        """
+        start = page_start + cell.payload_start
+        if cell.record is False:
+            end = start + cell.local_size
+            yield self.emit_node(parent, start, end - start, self.payload_info(start, end), name="Payload", depth=depth)
+            return
+        header_end, decoded, values = cell.record
+        # The record stores NULL for the INTEGER PRIMARY KEY, whose value is the rowid
+        alias = rowid_column if rowid_column is not None and rowid_column < len(decoded) and cell.rowid is not None \
+            and decoded[rowid_column].serial_type == 0 else None
+        if not self.record_columns:
+            names = [columns[index] if columns is not None and index < len(columns) else f"Column {index}" for index in range(len(decoded))]
+            shown = list(values) if values is not None else [column.value for column in decoded]
+            if alias is not None:
+                shown[alias] = cell.rowid
+            yield self.emit_node(parent, start, cell.local_size,
+                                 lambda: "Record: " + ", ".join(f"{name}={value!r}" for name, value in zip(names, shown)),
+                                 name="Record", color=color, table_value=len(decoded), depth=depth)
+            return
+        serial_types = [column.serial_type for column in decoded]
+        yield self.emit_node(parent, start, page_start + header_end - start,
+                             lambda: "Record header: " + ", ".join(describe_serial_type(serial_type) for serial_type in serial_types),
+                             name="Record header", table_value=len(decoded), depth=depth)
+        for index, column in enumerate(decoded):
+            name = columns[index] if columns is not None and index < len(columns) else f"Column {index}"
+            value = column.value
+            truncated = column.length < serial_type_length(column.serial_type)
+            if values is not None and index < len(values):
+                value = values[index]
+            if index == alias:
+                yield self.emit_node(parent, page_start + column.offset, column.length, f"{name} (NULL, an alias for the rowid): {cell.rowid}",
+                                     name=name, color=color, table_value=cell.rowid, depth=depth)
+                continue
+            table_value = value
+            if isinstance(value, bytes) and len(value) > MAX_BLOB_VALUE:
+                table_value = None
+            yield self.emit_node(parent, page_start + column.offset, column.length, self.column_info(name, column.serial_type, value, truncated),
+                                 name=name, color=color, table_value=table_value, depth=depth)
+
+    def carve_records(self, parent, start, end, depth, tables=None, freeblock=False):
+        """
+        Add a node for each deleted record carved from [start, end), see sqlite_carve.
+
+        :param tables: The names of the tables the records may belong to, or None for any table.
+        :param freeblock: Whether [start, end) is a freeblock, whose header overwrote the start of a cell.
+        """
+        if self.carver is None:
+            return
+        carve = self.carver.carve_freeblock if freeblock else self.carver.carve
+        # [start, end) is part of a page, which is carved with offsets relative to it
+        page_number = start // self.page_size + 1
+        page_start = self.page_offset(page_number)
+        for record in carve(self.pages.get_page(page_number), start - page_start, end - page_start, tables):
+            table = record.table
+            columns = [column._replace(offset=page_start + column.offset) for column in record.columns]
+            record = record._replace(offset=page_start + record.offset, header_end=page_start + record.header_end,
+                                     end=page_start + record.end, columns=columns)
+            node = self.node_at(record.offset, record.end - record.offset,
+                                lambda: f"Deleted record of {table.name}, carved from unallocated bytes: " +
+                                        ", ".join(f"{name}={column.value!r}" for name, column in zip(table.columns, columns)),
+                                name=f"Carved record: {table.name}", color=CARVED_COLOR, table_value=table.name)
+            yield self.emit(parent, record.offset, node, depth)
+            yield self.emit_node(node, record.offset, record.header_end - record.offset,
+                                 lambda: "Record header: " + ", ".join(describe_serial_type(column.serial_type) for column in columns),
+                                 name="Record header", table_value=len(columns), depth=depth + 1)
+            color = self.table_color(table.name)
+            for name, column in zip(table.columns, columns):
+                table_value = column.value
+                if isinstance(table_value, bytes) and len(table_value) > MAX_BLOB_VALUE:
+                    table_value = None
+                yield self.emit_node(node, column.offset, column.length, self.column_info(name, column.serial_type, column.value, False),
+                                     name=name, color=color, table_value=table_value, depth=depth + 1)
+
+    def parse_freeblocks(self, parent, page_number, page_type, table, depth):
+        """
+        Add the freeblocks of a B-tree page, and the deleted records carved from those of table leaf pages.
+        """
+        page_start = self.page_offset(page_number)
+        page = self.pages.get_page(page_number)
+        header_start = 100 if page_number == 1 else 0
+        for offset, size in freeblocks(page, header_start, self.usable_size):
+            start = page_start + offset
+            next_offset = int.from_bytes(page[offset:offset + 2], 'big')
+            node = self.node_at(start, size, f"Freeblock of {size} bytes, left by a deleted cell; the next freeblock is at {next_offset}. Possible forensic value exists here!",
+                                name="Freeblock", color=UNALLOCATED_COLOR, table_value=size)
+            yield self.emit(parent, start, node, depth)
+            if page_type == LEAF_TABLE_PAGE:
+                yield from self.carve_records(node, start, start + size, depth + 1, (table,), freeblock=True)
+
+    def parse_cell_pointer(self, parent, page, page_start, start, count, depth):
+        """
+        Add the count cell pointers at start in a page's content.
+        """
+        cellpointer_offsets = struct.unpack_from(f'>{count}H', page, start)
+        for index, cellpointer in enumerate(cellpointer_offsets):
+            offset = page_start + start + 2 * index
+            yield self.emit_node(parent, offset, 2, f"Cell Pointer: {cellpointer}", name=f"cellpointer: {cellpointer}", depth=depth)
         return cellpointer_offsets
-    
-    def interior_index_btree(self):
-        flag = self.file.read(1)
-        flag_byte = int.from_bytes(flag, byteorder='big')
-        self.root.add_child(self.file.tell() - 1, Node(flag,
-                    f"Btree page {self.page_counter}: {flag_byte}.  Indicating a {self.determine_page_type(flag_byte)}", name=f"Page {self.page_counter}: Interior Index"))
-
-    def interior_table_btree(self):
-        flag = self.file.read(1)
-        flag_byte = int.from_bytes(flag, byteorder='big')
-        self.root.add_child(self.file.tell() - 1, Node(flag,
-                    f"Btree page {self.page_counter}: {flag_byte}.  Indicating a {self.determine_page_type(flag_byte)}", name=f"Page {self.page_counter}: Interior Table"))
-
-        # MISSING HEADER! ADD
-        first_freeblock_bytes = self.file.read(2)
-        first_freeblock = int.from_bytes(first_freeblock_bytes, byteorder='big')
-        self.root.add_child(self.file.tell() - 2, Node(first_freeblock_bytes,
-                    "Start of the first freeblock", name="1st freeblock start"))
-
-        num_cells_bytes = self.file.read(2)
-        num_cells = int.from_bytes(num_cells_bytes, byteorder='big')
-        self.root.add_child(self.file.tell() - 2, Node(num_cells_bytes,
-                    f"Number of cells: {num_cells}", name="Num. of cells"))
-
-        cell_content_start_bytes = self.file.read(2)
-        cell_content_start = int.from_bytes(cell_content_start_bytes, byteorder='big', signed=True)
-        cell_content_start = 65536 if cell_content_start == 0 else cell_content_start
-        self.root.add_child(self.file.tell() - 2, Node(cell_content_start_bytes,
-                    f"Start of the cell content area: {cell_content_start}", name="Cell content start"))
-
-        fragmented_free_bytes_byte = self.file.read(1)
-        fragmented_free_bytes = int.from_bytes(fragmented_free_bytes_byte, byteorder='big')
-        self.root.add_child(self.file.tell() - 1, Node(fragmented_free_bytes_byte,
-                    f"Fragmented free bytes: {fragmented_free_bytes}"))
-
-        # Handle the specific page type
-        right_most_pointer_bytes = self.file.read(4)
-        right_most_pointer = int.from_bytes(right_most_pointer_bytes, byteorder='big')
-        self.root.add_child(self.file.tell() - 4, Node(right_most_pointer_bytes,
-                    f"Right-most pointer: {right_most_pointer}"))
-
-        # Handle any remaining bytes in the page
-        remaining_bytes_in_page = self.page_size - \
-            (1 + 2 + 2 + 2 + 1 + 4)
-        remaining_data = self.file.read(remaining_bytes_in_page)
-
-        if remaining_data:
-            self.root.add_child(self.file.tell() - len(remaining_data),
-                        Node(remaining_data, f"Rest unknown currently {self.get_page_offset(self.page_counter, self.file.tell())}"))
-
-    def leaf_index_btree(self):
-        flag = self.file.read(1)
-        flag_byte = int.from_bytes(flag, byteorder='big')
-        self.root.add_child(self.file.tell() - 1, Node(flag,
-                    f"Btree page {self.page_counter}: {flag_byte}.  Indicating a {self.determine_page_type(flag_byte)}", name=f"Page {self.page_counter}: Leaf Index"))
-        # Common header for all b-tree pages
-        first_freeblock_bytes = self.file.read(2)
-        first_freeblock = int.from_bytes(first_freeblock_bytes, byteorder='big')
-        self.root.add_child(self.file.tell() - 2, Node(first_freeblock_bytes,
-                    "Start of the first freeblock", name="1st freeblock start"))
-
-        num_cells_bytes = self.file.read(2)
-        num_cells = int.from_bytes(num_cells_bytes, byteorder='big')
-        self.root.add_child(self.file.tell() - 2, Node(num_cells_bytes,
-                    f"Number of cells: {num_cells}", name="Num. of cells"))
-
-        cell_content_start_bytes = self.file.read(2)
-        cell_content_start = int.from_bytes(cell_content_start_bytes, byteorder='big', signed=True)
-        cell_content_start = 65536 if cell_content_start == 0 else cell_content_start
-        self.root.add_child(self.file.tell() - 2, Node(cell_content_start_bytes,
-                    f"Start of the cell content area: {cell_content_start}", name="Cell content start"))
-
-        fragmented_free_bytes_byte = self.file.read(1)
-        fragmented_free_bytes = int.from_bytes(fragmented_free_bytes_byte, byteorder='big')
-        self.root.add_child(self.file.tell() - 1, Node(fragmented_free_bytes_byte,
-                    f"Fragmented free bytes: {fragmented_free_bytes}"))
-
-        # Handle any remaining bytes in the page
-        remaining_bytes_in_page = self.page_size - \
-            (1 + 2 + 2 + 2 + 1)
-        remaining_data = self.file.read(remaining_bytes_in_page)
-
-        if remaining_data:
-            self.root.add_child(self.file.tell() - len(remaining_data),
-                        Node(remaining_data, f"Rest unknown currently {self.get_page_offset(self.page_counter, self.file.tell())}"))
-
-    def leaf_table_btree(self):
-
-        # Header flag
-        flag = self.file.read(1)
-        flag_byte = int.from_bytes(flag, byteorder='big')
-        self.root.add_child(self.file.tell() - 1, Node(flag,
-                    f"Btree page number {self.page_counter}.  Indicating a {self.determine_page_type(flag_byte)} based on the byte {flag}", name=f"Page {self.page_counter}: Leaf Table"))
-        
-        # First freeblock
-        first_freeblock_bytes = self.file.read(2)
-        first_freeblock = int.from_bytes(first_freeblock_bytes, byteorder='big')
-        self.root.add_child(self.file.tell() - 2, Node(first_freeblock_bytes,
-                    f"Start of the first freeblock is set to offset: {first_freeblock}", name="1st freeblock start"))
-
-        # Number of cells
-        num_cells_bytes = self.file.read(2)
-        num_cells = int.from_bytes(num_cells_bytes, byteorder='big')
-        self.root.add_child(self.file.tell() - 2, Node(num_cells_bytes,
-                    f"Number of cells: {num_cells}", name="Num. of cells"))
-
-        # First byte of content
-        cell_content_start_bytes = self.file.read(2)
-        cell_content_start = int.from_bytes(cell_content_start_bytes, byteorder='big', signed=True)
-        cell_content_start = 65536 if cell_content_start == 0 else cell_content_start
-        self.root.add_child(self.file.tell() - 2, Node(cell_content_start_bytes,
-                    f"Start of the first valid cell content: {cell_content_start}", name="Cell content start"))
-
-        fragmented_free_bytes_byte = self.file.read(1)
-        fragmented_free_bytes = int.from_bytes(fragmented_free_bytes_byte, byteorder='big')
-        self.root.add_child(self.file.tell() - 1, Node(fragmented_free_bytes_byte,
-                    f"Fragmented free bytes: {fragmented_free_bytes}", name=f"Fragmented free bytes {fragmented_free_bytes}"))
-
-        # Handle any remaining bytes in the page
-        remaining_bytes_in_page = self.page_size - \
-            (1 + 2 + 2 + 2 + 1) 
-        remaining_data = self.file.read(remaining_bytes_in_page)
-
-        if remaining_data:
-            self.root.add_child(self.file.tell() - len(remaining_data),
-                        Node(remaining_data, f"Rest unknown currently {self.get_page_offset(self.page_counter, self.file.tell())}"))
-
-    def parse(self):
-        self.file.seek(0)
-        self.root = Node(b'', "SQLite file")
-        self.page_counter = 1
-
-        PAGE_TYPES = {
-                0x02: self.interior_index_btree,
-                0x05: self.interior_table_btree,
-                0x0A: self.leaf_index_btree,
-                0x0D: self.leaf_table_btree
-            }
-
-        # read file outside loop to avoid rereading the file everytime.
-        file_size = os.path.getsize(self.file.name)
-        while True:
-            if self.page_counter == 1: # DB Header page
-                # Define fields and their respective properties
-                fields = [
-                    (HEADER_LENGTH, "SQLite header string. Consider this string as a validation to an SQLite file.", "Header string"),
-                    (PAGE_SIZE_LENGTH, "Page size. This has to be a power of 2 byte big-endian integer between the range of 512 and 32768. The value of 1 is an exception that means that the page size is set to 65536 bytes.", "Page size"),
-                    (WRITE_VERSION_LENGTH,
-                     "Write version (1: legacy, 2: WAL). Write version and read version (the next sequence) are always the same.", "Write version"),
-                    (READ_VERSION_LENGTH,
-                     "Read version (1: legacy, 2: WAL). Write version and read version (the previous sequence) are always the same.", "Read version"),
-                    (UNUSED_SPACE_LENGTH,
-                     "Bytes of unused reserved space at the end of each page. Typically this is set to zero, but if another value is present, it means that the space is used for extension, most likely for encryption.", "Unused Space"),
-                    (MAX_PAYLOAD_FRACTION_LENGTH,
-                     "Maximum embedded payload fraction. Must be 64", "Max payload fraction"),
-                    (MIN_PAYLOAD_FRACTION_LENGTH,
-                     "Minimum embedded payload fraction. Must be 32", "Min. payload fraction"),
-                    (LEAF_PAYLOAD_FRACTION_LENGTH,
-                     "Leaf payload fraction. Must be 32", "Leaf payload fraction"),
-                    (FILE_CHANGE_COUNTER_LENGTH,
-                     "File change counter. This contains a value that increments every time the database is updated.", "File change counter"), # set the color of this to red? - meaning forensic value!
-                    (IN_HEADER_DB_SIZE_LENGTH,
-                     "Size of the database file in pages (the \"in-header database size\")", "In-header DB size"),
-                    (FIRST_FREELIST_TRUNK_PAGE_LENGTH,
-                     "Page number of the first freelist trunk page", "First freelist trunk page"),
-                    (TOTAL_FREELIST_PAGES_LENGTH,
-                     "Total number of freelist pages", "Total freelist pages"),
-                    (SCHEMA_COOKIE_LENGTH, "The schema cookie", "Schema cookie"),
-                    (SCHEMA_FORMAT_NUMBER_LENGTH,
-                     "The schema format number. Supported schema formats are 1, 2, 3, and 4", "Schema Format Number"),
-                    (DEFAULT_PAGE_CACHE_SIZE_LENGTH,
-                     "Default page cache size", "Default Page Cache Size"),
-                    (LARGEST_ROOT_B_TREE_LENGTH, "The page number of the largest root b-tree page when in auto-vacuum or incremental-vacuum modes, or zero otherwise", "Auto-vacuum"),
-                    (DATABASE_TEXT_ENCODING_LENGTH,
-                     "The database text encoding. A value of 1 means UTF-8. A value of 2 means UTF-16le. A value of 3 means UTF-16be", "DB Text Encoding"),
-                    (USER_VERSION_LENGTH,
-                     "The \"user version\" as read and set by the user_version pragma", "User Version"),
-                    (INCREMENTAL_VACUUM_MODE_LENGTH,
-                     "True (non-zero) for incremental-vacuum mode. False (zero) otherwise", "Incremental Vacuum Mode"),
-                    (APP_ID_LENGTH, "The \"Application ID\" set by PRAGMA application_id", "APP ID Length"),
-                    (RESERVED_EXPANSION_LENGTH,
-                     "Reserved for expansion. Must be zero", "Reserved Expansion"),
-                    (VERSION_VALID_FOR_NUMBER_LENGTH,
-                     "The version-valid-for number", "Version Valid For Number"),
-                    (SQLITE_VERSION_NUMBER_LENGTH, "SQLITE_VERSION_NUMBER_LENGTH", "SQLite Version")
-                ]
-
-                for index, (length, description, name) in enumerate(fields):
-                    cur_col = self.get_next_color(size=0x05)
-                    data = self.file.read(length)
-
-                    if index == 0:  # First entry
-                        table_value = data.decode('ascii', errors='ignore')  # Decode bytes to ASCII
-                    else:
-                        table_value = int.from_bytes(data, byteorder="big")
-
-                    node = Node(data, description, name, table_value=table_value, color=cur_col)
-                    
-                    self.root.add_child(self.file.tell() - length, node)
-                    if name:
-                        # Store the data in the dictionary
-                        self.parsed_fields[name] = data
-
-                
-                page_size_bytes = self.get_field("Page size")
-                self.page_size = int.from_bytes(page_size_bytes, byteorder='big') # from _init_
-                
-                autovacuum_size_bytes = self.get_field("Auto-vacuum")
-                self.autovacuum = int.from_bytes(autovacuum_size_bytes, byteorder='big') # from _init_
-                
-                # PAGE START:
-                # First page page header after db header (100bytes)
-                flag = self.file.read(1)
-                flag_byte = int.from_bytes(flag, byteorder='big')
-                self.root.add_child(self.file.tell() - 1, Node(flag,
-                            f"Page header: {flag_byte}.  indicating a {self.determine_page_type(flag_byte)}. The first page of a SQLite DB is always a Table BTree type page.", name="DB Header Page Header"))
-
-                # First freeblock offset
-                first_freeblock = self.file.read(2)
-                first_freeblock_offset = int.from_bytes(first_freeblock, byteorder="big")
-                self.root.add_child(self.file.tell() - 2, Node(first_freeblock,
-                            f"First free block at offset {first_freeblock_offset}", name="First freeblock"))
-                # Number of cells in this page
-                no_of_cells = self.file.read(2)
-                no_of_cells_in_page = int.from_bytes(no_of_cells, byteorder="big")
-                self.root.add_child(self.file.tell() - 2, Node(no_of_cells,
-                            f"no_of_cells: {no_of_cells_in_page}", name="no_of_cells"))
-                
-                # First byte of content
-                first_byte_of_content = self.file.read(2)
-                first_byte_of_content_offset = int.from_bytes(first_byte_of_content, "big")
-                self.root.add_child(self.file.tell() - 2, Node(first_byte_of_content,
-                            f"First_byte_of_content: {first_byte_of_content_offset}", name="first_byte_of_content"))
-                
-                fragmented_byte_count = self.file.read(1)
-                fragmented_byte_count_offset = int.from_bytes(fragmented_byte_count, "big")
-                self.root.add_child(self.file.tell() -1, Node(fragmented_byte_count, f"Fragmented byte count: {fragmented_byte_count_offset}", name="Fragmented Byte count"))
-                
-                right_most_pointer = self.file.read(4) #  Page 1 is always using this as it always is interior btree
-                rmp_value = int.from_bytes(right_most_pointer, "big")
-                self.root.add_child(self.file.tell() - 4, Node(right_most_pointer,
-                        f"Right most pointer at page offset {rmp_value}", name="Right most pointer"))
-                
-                # TODO: ADD FREEBLOCK IF EXISTING. CALCULATE UNPARSER BEFORE AND/OR AFTER
-
-                # TODO: ADD CHECK TO SEE IF FIRST BYTE OF CONTENT MATCHES THE FIRST CELL OFFSET
-
-                cellpointer_array_bytes = self.file.read(no_of_cells_in_page * 2) # two byte long
-                cellpointer_offsets = self.parse_cell_pointer(cellpointer_array_bytes)
-
-                cellpointer_offsets.append(self.page_size) # account for the last cells end
-                # Sort the cellpointer offsets in ascending order
-                cellpointer_offsets.sort()
-
-                if len(cellpointer_offsets) >= 2:
-                    intervals = [cellpointer_offsets[i+1] - cellpointer_offsets[i] for i in range(len(cellpointer_offsets)-1)]
-                    # Unknown data between cells and cell pointers
-                    self.parse_unknown_data(cellpointer_offsets[0] - self.file.tell(), details="Possible forensic value exists here!")
-                
-                    for i, interval in enumerate(intervals):                    
-                        self.parse_payload(interval)
+
+    def parse_cell(self, parent, page_start, page_end, cell, depth, columns=None, color=None, rowid_column=None):
+        """
+        Add a cell decoded by sqlite_record.decode_cell and its fields.
+
+        :param color: The colour of the column nodes of its record.
+        :param rowid_column: The index of the INTEGER PRIMARY KEY column of its table, if any.
+
+        Returns the cell, or None if it is corrupt.
+        """
+        offset = page_start + cell.offset
+        if isinstance(cell, CorruptCell):
+            yield self.emit_node(parent, offset, page_end - offset, cell.message,
+                                 name="Corrupt cell", color=UNALLOCATED_COLOR, depth=depth)
+            return None
+
+        if cell.rowid is not None:
+            description = f"Cell with rowid {cell.rowid}"
+        else:
+            description = f"Cell with a payload of {cell.payload_size} bytes"
+        node = self.node_at(offset, cell.end - cell.offset, description, name="Cell", table_value=cell.rowid)
+        yield self.emit(parent, offset, node, depth)
+        if cell.left_child is not None:
+            yield self.emit_node(node, offset, 4, f"Left child pointer: page {cell.left_child}", name="Left child pointer", table_value=cell.left_child, depth=depth + 1)
+        if cell.payload_size is not None:
+            yield self.emit_node(node, page_start + cell.payload_size_start, cell.rowid_start - cell.payload_size_start, f"Payload size: {cell.payload_size}",
+                                 name="Payload size", table_value=cell.payload_size, depth=depth + 1)
+        if cell.rowid is not None:
+            yield self.emit_node(node, page_start + cell.rowid_start, cell.payload_start - cell.rowid_start, f"Rowid: {cell.rowid}", name="Rowid", table_value=cell.rowid, depth=depth + 1)
+        if cell.local_size:
+            yield from self.parse_record(node, page_start, cell, columns, depth + 1, color, rowid_column)
+        if cell.overflow_page is not None:
+            yield self.emit_node(node, page_start + cell.payload_start + cell.local_size, 4, f"First overflow page: {cell.overflow_page}",
+                                 name="Overflow page", table_value=cell.overflow_page, depth=depth + 1)
+        return cell
+
+    def walk_overflow(self, parent, page_number, remaining, table, depth):
+        """
+        Follow a chain of overflow pages holding the remaining bytes of a payload.
+        """
+        while page_number and remaining > 0 and self.claim_page(page_number):
+            start = self.page_offset(page_number)
+            length = min(remaining, self.usable_size - 4)
+            page = self.node_at(start, self.page_size, f"Overflow page {page_number} of {table}", name=f"Page {page_number}: Overflow")
+            yield self.emit(parent, start, page, depth)
+            next_page = int.from_bytes(self.pages.get_page(page_number)[:4], 'big')
+            yield self.emit_node(page, start, 4, f"Next overflow page: {next_page}", name="Next overflow page", table_value=next_page, depth=depth + 1)
+            yield self.emit_node(page, start + 4, length, self.payload_info(start + 4, start + 4 + length), name="Overflow payload", depth=depth + 1)
+            remaining -= length
+            page_number = next_page
+
+    def walk_btree(self, parent, page_number, table, depth, rows=None, columns=None):
+        """
+        Parse the B-tree rooted at a page depth-first: each page's header, cell pointers and
+        cells, then the pages its left child pointers and right-most pointer lead to.
+
+        :param parent: The node the pages are added under.
+        :param table: The name of the table or index, for the descriptions.
+        :param rows: A list that (rowid, payload) of every table leaf cell is appended to, if given.
+        :param columns: The column names of the table or index, if known.
+        """
+        if not self.claim_page(page_number):
+            return
+        page_start = self.page_offset(page_number)
+        page_end = page_start + self.usable_size
+        header_start = page_start + (100 if page_number == 1 else 0)
+        content = self.pages.get_page(page_number)
+        page_type = content[header_start - page_start]
+        schema = PAGE_HEADERS.get(page_type)
+        if schema is None:
+            yield self.emit_node(parent, page_start, self.page_size, f"Page {page_number} of {table} should be a B-tree page, but its type is {page_type:#04x}",
+                                 name=f"Page {page_number}: Unparsed/unknown data.", color=UNALLOCATED_COLOR, depth=depth)
+            return
+
+        description = f"Page {page_number} of {table}: {self.determine_page_type(page_type)}"
+        if self.wal_index is not None and page_number in self.wal_index.latest:
+            description += f", from frame {self.wal_index.latest[page_number].index} of the write-ahead log"
+        page = self.node_at(page_start, self.page_size, description, name=f"Page {page_number}")
+        yield self.emit(parent, page_start, page, depth)
+        values = schema.unpack(content, header_start - page_start)
+        yield from self.emit_values(page, header_start, schema, values, depth + 1, page=page_number,
+                                    page_type=self.determine_page_type(page_type))
+        header = dict(zip(schema.names, values))
+        # The cell pointer array has to fit in the page
+        pointers_start = header_start + schema.size
+        cell_count = min(header["Num. of cells"], (page_end - pointers_start) // 2)
+        yield from self.parse_cell_pointer(page, content, page_start, pointers_start - page_start, cell_count, depth + 1)
+
+        pointers_end = pointers_start + 2 * cell_count
+        content_start = page_start + cell_content_start(header["Cell content start"])
+        if pointers_end < content_start <= page_end:
+            unallocated = self.node_at(pointers_end, content_start - pointers_end, "Unallocated space between the cell pointers and the cells. Possible forensic value exists here!",
+                                       name="Unallocated space", color=UNALLOCATED_COLOR)
+            yield self.emit(page, pointers_end, unallocated, depth + 1)
+            if page_type == LEAF_TABLE_PAGE:
+                yield from self.carve_records(unallocated, pointers_end, content_start, depth + 2, (table,))
+        yield from self.parse_freeblocks(page, page_number, page_type, table, depth + 1)
+
+        # Decoded in advance by the worker processes in parallel mode
+        cells = self.decoded_pages.pop(page_number, None)
+        if cells is None:
+            cells = decode_btree_page(self.pages, page_number, self.usable_size, self.encoding, MAX_BLOB_VALUE)
+        children = []
+        color = self.table_color(table)
+        rowid_column = self.rowid_aliases.get(table) if page_type == LEAF_TABLE_PAGE else None
+        for cell in cells:
+            cell = yield from self.parse_cell(page, page_start, page_end, cell, depth + 1, columns, color, rowid_column)
+            if cell is None:
+                continue
+            if cell.left_child is not None:
+                children.append(cell.left_child)
+            payload_start = page_start + cell.payload_start
+            if rows is not None and page_type == LEAF_TABLE_PAGE:
+                if cell.overflow_page is None:
+                    payload = bytes(self.read(payload_start, cell.local_size))
                 else:
-                    # Handle the case where there are not enough offsets to compute intervals
-                    print("Not enough cellpointer_offsets to compute intervals.")
-                
-
-                
-
-                self.page_counter += 1
-                if self.file.tell() == self.page_size:
-                    continue
-                else: # Error message?
-                    pass
-            elif self.autovacuum != 0 and self.page_counter == 2:
-                self.page_counter += 1
-
-            # Read and lookup the page header
-            page_header_byte = int.from_bytes(self.file.read(1), byteorder='big')
-            self.file.seek(self.file.tell() - 1)
-            page_type = PAGE_TYPES.get(page_header_byte)
-
-            # Handle the page type
-            if page_type is not None:
-                page_type()
-                self.page_counter += 1
-            else:
-                # Unknown page - add it and mark it as unknown
-                self.parse_unknown_data(self.page_size, details=f"Page {self.page_counter}", name=f"Page {self.page_counter}: Unparsed/unknown data.")
-                """ remaining_data = self.file.read(self.page_size)
-
-                if remaining_data:
-                    self.root.add_child(self.file.tell() - len(remaining_data),
-                                Node(remaining_data, f"Rest unknown currently.", color="#DDAACC"))"""
-                self.page_counter += 1 
-                
-            
-            if self.file.tell() + self.page_size > file_size:
-                return self.root
+                    payload = self.overflowing_payload(payload_start, cell.local_size, cell.overflow_page, cell.payload_size)
+                    payload = payload.read(0, cell.payload_size)
+                rows.append((cell.rowid, payload))
+            if cell.overflow_page is not None:
+                yield from self.walk_overflow(parent, cell.overflow_page, cell.payload_size - cell.local_size, table, depth)
+        if page_type in INTERIOR_PAGES:
+            children.append(header["Right-most pointer"])
+
+        for child in children:
+            yield from self.walk_btree(parent, child, table, depth, rows, columns)
+
+    def walk_table(self, root_page, kind, name, rows=None, columns=None):
+        """
+        Parse the B-tree of a table or index from the page number sqlite_master gives as its root.
+        """
+        table = Node(b'', f"{kind.capitalize()} {name}, a B-tree rooted at page {root_page}", name=f"{kind.capitalize()}: {name}")
+        yield self.emit(self.root, self.page_offset(root_page), table)
+        yield from self.walk_btree(table, root_page, name, 2, rows, columns)
+
+    def parse_freelist(self, trunk_page):
+        """
+        Follow the chain of freelist trunk pages, adding them and the leaf pages they list.
+        """
+        if not trunk_page:
+            return
+        freelist = Node(b'', "Freelist: pages that are not in use by the database", name="Freelist")
+        yield self.emit(self.root, self.page_offset(trunk_page), freelist)
+        while trunk_page and self.claim_page(trunk_page):
+            start = self.page_offset(trunk_page)
+            page = self.node_at(start, self.page_size, f"Freelist trunk page {trunk_page}", name=f"Page {trunk_page}: Freelist trunk")
+            yield self.emit(freelist, start, page, depth=2)
+            content = self.pages.get_page(trunk_page)
+            next_trunk, leaf_count = struct.unpack_from('>2I', content)
+            yield self.emit_node(page, start, 4, f"Next freelist trunk page: {next_trunk}", name="Next trunk page", table_value=next_trunk, depth=3)
+            leaf_count = min(leaf_count, (self.usable_size - 8) // 4)
+            yield self.emit_node(page, start + 4, 4, f"Number of leaf pages listed on this trunk page: {leaf_count}", name="Leaf page count", table_value=leaf_count, depth=3)
+            leaf_pages = struct.unpack_from(f'>{leaf_count}I', content, 8)
+            for index, leaf_page in enumerate(leaf_pages):
+                yield self.emit_node(page, start + 8 + 4 * index, 4, f"Freelist leaf page: {leaf_page}", name="Leaf page number", table_value=leaf_page, depth=3)
+            yield from self.carve_records(page, start + 8 + 4 * leaf_count, start + self.usable_size, 3)
+            for leaf_page in leaf_pages:
+                if self.claim_page(leaf_page):
+                    leaf_start = self.page_offset(leaf_page)
+                    leaf = self.node_at(leaf_start, self.page_size, f"Freelist leaf page {leaf_page}. Its content is left over from before it was freed. Possible forensic value exists here!",
+                                        name=f"Page {leaf_page}: Freelist leaf", color=UNALLOCATED_COLOR)
+                    yield self.emit(freelist, leaf_start, leaf, depth=2)
+                    yield from self.carve_records(leaf, leaf_start, leaf_start + self.usable_size, 3)
+            trunk_page = next_trunk
+
+    def parse_reserved_pages(self):
+        """
+        Add the pointer map pages of auto-vacuum databases and the lock-byte page.
+        """
+        lock_page = PENDING_BYTE // self.page_size + 1
+        for page_number in reserved_pages(self.page_count, self.page_size, self.usable_size, self.autovacuum):
+            if not self.claim_page(page_number):
+                continue
+            if page_number == lock_page:
+                yield self.emit_node(self.root, self.page_offset(lock_page), self.page_size, f"Lock-byte page {lock_page}, reserved for file locking", name=f"Page {lock_page}: Lock-byte")
             else:
-                pass
+                yield self.emit_node(self.root, self.page_offset(page_number), self.page_size, f"Pointer map page {page_number}", name=f"Page {page_number}: Pointer map")
+
+    def parse_orphaned_pages(self):
+        """
+        Add the pages that neither the schema, the freelist nor anything else refers to.
+        """
+        orphans = None
+        for page_number in range(1, self.page_count + 1):
+            if self.visited[page_number]:
+                continue
+            start = self.page_offset(page_number)
+            if orphans is None:
+                orphans = Node(b'', "Pages that no B-tree, overflow chain or freelist refers to. Possible forensic value exists here!", name="Orphaned pages")
+                yield self.emit(self.root, start, orphans)
+            page_type = self.determine_page_type(self.pages.get_page(page_number)[0])
+            orphan = self.node_at(start, self.page_size, f"Orphaned page {page_number}. Its first byte suggests: {page_type}",
+                                  name=f"Page {page_number}: Orphaned", color=UNALLOCATED_COLOR)
+            yield self.emit(orphans, start, orphan, depth=2)
+            yield from self.carve_records(orphan, start, start + self.usable_size, 3)
+
+    def survey(self):
+        """
+        Count the pages of the database by type without parsing them (see sqlite_survey),
+        as a quick overview before a full parse.
+
+        Returns {page type: (page count, average fill ratio or None)}, keyed by the names in
+        PAGE_TYPES, "freelist", "reserved" (pointer map and lock-byte pages) and "unknown" (overflow pages).
+        :raises ValueError: If the page size in the header is invalid.
+        """
+        header = DB_HEADER.values(self.cursor.buffer)
+        page_size = 65536 if header["Page size"] == 1 else header["Page size"]
+        if page_size < 512 or page_size & (page_size - 1):
+            raise ValueError(f"Invalid page size {header['Page size']}")
+        survey = survey_pages(self.cursor.buffer, page_size, page_size - header["Unused Space"],
+                              header["First freelist trunk page"], header["Auto-vacuum"])
+        return summarize(survey, PAGE_TYPES)
+
+    def read_schema(self):
+        """
+        Read the database header and sqlite_master without parsing the database, so rows can be
+        looked up (see find_row). The write-ahead log, if given, is overlaid first.
+
+        Returns {name: (root page, sql)} of sqlite_master and every table and index.
+        :raises ValueError: If the page size in the header is invalid, or the log cannot be read.
+        """
+        if self.schema is not None:
+            return self.schema
+        if self.wal is not None and self.wal_index is None:
+            self.overlay_wal()
+        page_one = self.wal_index.page(1) if self.wal_index is not None else None
+        header = DB_HEADER.values(self.cursor.buffer if page_one is None else page_one)
+        page_size = 65536 if header["Page size"] == 1 else header["Page size"]
+        if page_size < 512 or page_size & (page_size - 1):
+            raise ValueError(f"Invalid page size {header['Page size']}")
+        self.page_size = page_size
+        self.usable_size = page_size - header["Unused Space"]
+        self.encoding = TEXT_ENCODINGS.get(header["DB Text Encoding"], "utf-8")
+        self.pages = PageReader(self.file, self.page_size, self.cursor.buffer, wal=self.wal_index)
+        self.page_count = self.pages.page_count
+        self.schema = {"sqlite_master": (1, None)}
+        for _, values in iter_table_rows(self.pages, 1, self.usable_size, self.encoding):
+            entry = schema_entry(values)
+            if entry is not None:
+                root_page, kind, name, _, sql = entry
+                self.schema[name] = (root_page, sql)
+                if kind == "table":
+                    self.rowid_aliases[name] = rowid_alias(sql)
+        return self.schema
+
+    def table_root(self, table):
+        """
+        The (root page, column names) of a table or index, from read_schema.
 
-        return self.root
+        :raises ValueError: If there is no such table.
+        """
+        schema = self.read_schema()
+        if table not in schema:
+            raise ValueError(f"No table {table} in sqlite_master")
+        root_page, sql = schema[table]
+        return root_page, SQLITE_MASTER_COLUMNS if root_page == 1 else column_names(sql)
+
+    def row_match(self, table, rowid, page_number, cell, columns):
+        """The RowMatch of a cell found by a lookup, with a node built for it as parse_cell would."""
+        page_start = self.page_offset(page_number)
+        holder = Node(b'', f"Rows of {table}")
+        # The node is built with its children whatever the mode of the last iter_parse, which is left as it was
+        keep_tree, self.keep_tree = self.keep_tree, True
+        try:
+            node = list(self.parse_cell(holder, page_start, page_start + self.usable_size, cell, 1, columns,
+                                        self.table_color(table), self.rowid_aliases.get(table)))[0][1]
+        finally:
+            self.keep_tree = keep_tree
+        offset = page_start + cell.offset
+        if isinstance(cell, CorruptCell):
+            return RowMatch(table, rowid, page_number, offset, self.usable_size - cell.offset, None, node)
+        return RowMatch(table, rowid, page_number, offset, cell.end - cell.offset, page_start + cell.payload_start, node)
+
+    def find_row(self, table, rowid):
+        """
+        Look up the row of a table with a rowid without parsing the database.
 
-    @classmethod
-    def recognizes(cls, file):
-        # reads the header and sets seeker here
-        file.seek(0)
-        header = file.read(16)
-        return header == b"SQLite format 3\x00"
+        The table B-tree is descended from its root by binary search (see
+        sqlite_record.find_rowid), so only one page per level of the tree is read.
+        Returns a RowMatch, or None if the table has no such row.
+        :raises ValueError: If there is no such table, or the schema cannot be read (see read_schema).
+        """
+        root_page, columns = self.table_root(table)
+        found = find_rowid(self.pages, root_page, rowid, self.usable_size, self.encoding, MAX_BLOB_VALUE)
+        if found is None:
+            return None
+        path, cell = found
+        return self.row_match(table, rowid, path[-1], cell, columns)
+
+    def find_rows(self, table, first, last):
+        """
+        Yield the RowMatch of every row of a table with a rowid from first to last (inclusive),
+        in rowid order, reading only the pages of the B-tree that can hold them.
+
+        :raises ValueError: If there is no such table, or the schema cannot be read (see read_schema).
+        """
+        root_page, columns = self.table_root(table)
+        for page_number, rowid, cell in iter_rowid_range(self.pages, root_page, first, last, self.usable_size,
+                                                         self.encoding, MAX_BLOB_VALUE):
+            yield self.row_match(table, rowid, page_number, cell, columns)
+
+    def iter_parse(self, keep_tree=True):
+        self.keep_tree = keep_tree
+        wal_error = None
+        if self.wal is not None and self.wal_index is None:
+            try:
+                self.overlay_wal()
+            except (ValueError, EOFError) as e:
+                wal_error = e
+        self.cursor.seek(0)
+        self.root = Node(b'', "SQLite file" if self.wal_index is None else "SQLite file, as of the last commit in its write-ahead log")
+        yield 0, self.root, 0
+        if wal_error is not None:
+            yield self.add_lazy_child(self.root, 0, f"The write-ahead log could not be applied: {wal_error}", name="Write-ahead log", color=UNALLOCATED_COLOR)
+
+        self.file_size = len(self.cursor)
+        # Database header, from page 1 in the log if it has one
+        page_one = self.wal_index.page(1) if self.wal_index is not None else None
+        try:
+            if page_one is None:
+                header = yield from self.emit_fields(self.root, DB_HEADER, color=lambda: self.get_next_color(size=0x05))
+            else:
+                values = DB_HEADER.unpack(page_one)
+                yield from self.emit_values(self.root, 0, DB_HEADER, values, color=lambda: self.get_next_color(size=0x05))
+                header = dict(zip(DB_HEADER.names, values))
+                self.cursor.seek(DB_HEADER.size)
+        except EOFError as e:
+            yield from self.parse_unknown_data(self.file_size, details=e)
+            return
+        # Keep the fields by name
+        self.parsed_fields.update(header)
+
+        page_size = self.get_field("Page size")
+        self.page_size = 65536 if page_size == 1 else page_size
+        if self.page_size < 512 or self.page_size & (self.page_size - 1):
+            yield from self.parse_unknown_data(self.file_size - self.cursor.tell(), details=f"Invalid page size {page_size}")
+            return
+        self.usable_size = self.page_size - self.get_field("Unused Space")
+        self.autovacuum = self.get_field("Auto-vacuum")
+        self.encoding = TEXT_ENCODINGS.get(self.get_field("DB Text Encoding"), "utf-8")
+        # The parser already has the whole file in its buffer, so pages are views of it or of the log
+        self.pages = PageReader(self.file, self.page_size, self.cursor.buffer, wal=self.wal_index)
+        self.page_count = self.pages.page_count
+        self.visited = bytearray(self.page_count + 1)
+        path = getattr(self.file, "name", None)
+        # Parsing some tables only reads their pages, which is not worth decoding every page for
+        # The workers read the database file, which does not have the pages in the log
+        if self.workers and self.tables is None and self.wal_index is None and isinstance(path, str) and os.path.isfile(path):
+            self.decoded_pages = decode_pages_in_parallel(path, self.page_size, self.page_count, self.usable_size,
+                                                          self.encoding, MAX_BLOB_VALUE, self.workers)
+
+        # Page 1 is the root of sqlite_master, which lists the root page of every other B-tree
+        schema_rows = []
+        yield from self.walk_table(1, "table", "sqlite_master", schema_rows, SQLITE_MASTER_COLUMNS)
+        btrees = []
+        for _, payload in schema_rows:
+            try:
+                entry = schema_entry(decode_record(payload, self.encoding))
+            except IndexError:
+                continue
+            if entry is not None:
+                btrees.append(entry)
+                if entry[1] == "table":
+                    self.rowid_aliases[entry[2]] = rowid_alias(entry[4])
+        if self.carve:
+            self.carver = RecordCarver([table_schema(name, sql) for _, kind, name, _, sql in btrees if kind == "table"], self.encoding)
+
+        for root_page, kind, name, table_name, sql in btrees:
+            if self.tables is not None and name not in self.tables and table_name not in self.tables:
+                continue
+            yield from self.walk_table(root_page, kind, name, columns=column_names(sql))
+
+        if self.tables is not None:
+            return
+        yield from self.parse_freelist(self.get_field("First freelist trunk page"))
+        yield from self.parse_reserved_pages()
+        yield from self.parse_orphaned_pages()
+
+        # Bytes after the last whole page, or after the header of a file cut off inside page 1
+        self.cursor.seek(max(self.page_count * self.page_size, DB_HEADER.size))
+        if self.cursor.remaining():
+            yield from self.parse_unknown_data(self.cursor.remaining(), details="Bytes after the last page", name="Trailing data")
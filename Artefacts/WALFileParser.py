@@ -0,0 +1,82 @@
+from common import Node, FileParser
+from fields import FieldSchema
+from sqlite_wal import FRAME_HEADER_SIZE, WAL_HEADER_SIZE, WALIndex
+
+# https://www.sqlite.org/fileformat.html#the_write_ahead_log
+WAL_HEADER = FieldSchema([
+    (4, lambda magic: f"Magic number: {magic:#010x}, checksums over {'big' if magic & 1 else 'little'}-endian words", "Magic number",
+     lambda magic: f"0x{magic:08X}"),
+    (4, "File format version: {value}", "File format version"),
+    (4, "Database page size: {value}", "Page size"),
+    (4, "Checkpoint sequence number: {value}", "Checkpoint sequence number"),
+    (4, "Salt-1, random and incremented with each checkpoint: {value}", "Salt-1"),
+    (4, "Salt-2, a different random number for each checkpoint: {value}", "Salt-2"),
+    (4, "Checksum-1, the first part of the checksum of the first 24 bytes of the header: {value}", "Checksum-1"),
+    (4, "Checksum-2, the second part of the checksum of the first 24 bytes of the header: {value}", "Checksum-2"),
+], byteorder='>')
+
+FRAME_HEADER = FieldSchema([
+    (4, "Page number: {value}", "Page number"),
+    (4, "For commit frames, the size of the database file in pages after the commit. Zero for all other frames: {value}", "Commit size"),
+    (4, "Salt-1, copied from the log header: {value}", "Salt-1"),
+    (4, "Salt-2, copied from the log header: {value}", "Salt-2"),
+    (4, "Checksum-1, the first part of the cumulative checksum through this frame: {value}", "Checksum-1"),
+    (4, "Checksum-2, the second part of the cumulative checksum through this frame: {value}", "Checksum-2"),
+], byteorder='>')
+
+STALE_COLOR = "#FF0000"
+
+
+class WALFileParser(FileParser):
+    """
+    A parser for SQLite write-ahead logs (the -wal file next to a database).
+
+    Every frame is a page written by a transaction. The frames are indexed by page
+    number (see sqlite_wal.WALIndex), so each frame can tell whether it holds the
+    latest version of its page, an older one, or one that was never committed.
+    """
+    SIGNATURES = [(0, b"\x37\x7f\x06\x82"), (0, b"\x37\x7f\x06\x83")]
+
+    def __init__(self, file):
+        super().__init__(file)
+        self.index = None
+        self.root = None
+
+    def frame_status(self, frame):
+        index = self.index
+        if frame.index >= index.valid_count:
+            return "not part of the log: left over from before a checkpoint, or cut off by a crash (its salts or checksum do not follow on from the frames before it)"
+        if not index.is_committed(frame):
+            return "never committed"
+        if index.latest.get(frame.page_number) is frame:
+            return "the latest version of the page"
+        return f"an older version of the page, whose latest version is in frame {index.latest[frame.page_number].index}"
+
+    def iter_parse(self, keep_tree=True):
+        self.keep_tree = keep_tree
+        self.cursor.seek(0)
+        self.root = Node(b'', "SQLite write-ahead log")
+        yield 0, self.root, 0
+
+        try:
+            self.index = index = WALIndex(self.cursor.buffer)
+        except ValueError as e:
+            yield self.add_lazy_child(self.root, len(self.cursor), f"Unparsed!\n\n{e}", name="Unparsed data", color="#FF0000")
+            return
+        yield from self.emit_fields(self.root, WAL_HEADER)
+
+        for frame in index.frames:
+            status = self.frame_status(frame)
+            color = STALE_COLOR if frame.index >= index.committed_count else None
+            node = self.node_at(frame.offset, index.frame_size, f"Frame {frame.index} holding page {frame.page_number}: {status}",
+                                name=f"Frame {frame.index}: page {frame.page_number}", color=color, table_value=frame.page_number)
+            yield self.emit(self.root, frame.offset, node)
+            self.cursor.seek(frame.offset)
+            yield from self.emit_fields(node, FRAME_HEADER, depth=2)
+            yield self.emit_node(node, frame.offset + FRAME_HEADER_SIZE, index.page_size, f"Content of page {frame.page_number}",
+                                 name="Page content", depth=2)
+
+        if index.trailing:
+            offset = WAL_HEADER_SIZE + len(index.frames) * index.frame_size
+            yield self.emit_node(self.root, offset, index.trailing, "Unparsed!\n\nAn incomplete frame at the end of the log",
+                                 name="Trailing data", color="#FF0000")
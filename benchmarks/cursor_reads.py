@@ -0,0 +1,76 @@
+"""
+Cost of reading small fields through the file object versus through ByteCursor.
+
+Reads the same sequence of big-endian 2-byte fields (like SQLite cell pointers)
+once with file.read + int.from_bytes + tell, as the parsers used to, and once
+with ByteCursor.u16be over the mapped file, then times a full parse of a file
+when one is given.
+
+    python benchmarks/cursor_reads.py [field_count] [file_to_parse]
+"""
+import mmap
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from cursor import ByteCursor  # noqa: E402
+
+
+def read_with_file(file, count):
+    file.seek(0)
+    total = 0
+    for _ in range(count):
+        data = file.read(2)
+        total += int.from_bytes(data, byteorder="big") + file.tell() - 2
+    return total
+
+
+def read_with_cursor(source, count):
+    cursor = ByteCursor(source)
+    total = 0
+    for _ in range(count):
+        offset = cursor.tell()
+        total += cursor.u16be() + offset
+    return total
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return time.perf_counter() - start, result
+
+
+def parse_time(path):
+    from main import get_file_parser
+
+    with open(path, "rb") as file:
+        parser = get_file_parser(file)
+        start = time.perf_counter()
+        events = sum(1 for _ in parser.iter_parse(keep_tree=False))
+        return time.perf_counter() - start, events
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    with tempfile.TemporaryFile() as file:
+        file.write(os.urandom(count * 2))
+        file.flush()
+        source = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        before, expected = timed(read_with_file, file, count)
+        after, result = timed(read_with_cursor, source, count)
+        source.close()
+    assert result == expected
+    print(f"{count} fields")
+    print(f"file.read + int.from_bytes: {before * 1e9 / count:8.1f} ns/field")
+    print(f"ByteCursor.u16be:           {after * 1e9 / count:8.1f} ns/field")
+    print(f"speed-up:                   {before / after:8.1f}x")
+    if len(sys.argv) > 2:
+        seconds, events = parse_time(sys.argv[2])
+        print(f"parsed {sys.argv[2]}: {events} events in {seconds * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
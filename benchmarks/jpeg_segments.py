@@ -0,0 +1,61 @@
+"""
+Walking the marker segments of a batch of JPEG photos.
+
+Copies the JPEGs in TestFiles (or the directory given) until there are
+photo_count of them, then times walking the segments of each with
+jpeg_segments.scan_segments over its mmap, and parsing each with JPEGFileParser
+(keep_tree=False), reporting photos per second.
+
+    python benchmarks/jpeg_segments.py [photo_count] [directory]
+"""
+import mmap
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+from Artefacts.JPEGFileParser import JPEGFileParser  # noqa: E402
+from jpeg_segments import scan_segments  # noqa: E402
+
+
+def scan(paths):
+    segments = 0
+    for path in paths:
+        with open(path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as source:
+            segments += len(scan_segments(source).segments)
+    return segments
+
+
+def parse(paths):
+    events = 0
+    for path in paths:
+        with open(path, "rb") as file:
+            events += sum(1 for _ in JPEGFileParser(file).iter_parse(keep_tree=False))
+    return events
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    source = sys.argv[2] if len(sys.argv) > 2 else os.path.join(ROOT, "TestFiles")
+    photos = [os.path.join(source, name) for name in sorted(os.listdir(source)) if name.lower().endswith((".jpg", ".jpeg"))]
+    with tempfile.TemporaryDirectory() as directory:
+        paths = []
+        for index in range(count):
+            path = os.path.join(directory, f"{index}.jpg")
+            shutil.copyfile(photos[index % len(photos)], path)
+            paths.append(path)
+        size = sum(os.path.getsize(path) for path in paths)
+        print(f"{count} photos, {size / 1e6:.1f} MB")
+        for name, function in (("scan_segments", scan), ("JPEGFileParser", parse)):
+            start = time.perf_counter()
+            found = function(paths)
+            seconds = time.perf_counter() - start
+            print(f"{name:15} {seconds:6.2f} s  {count / seconds:7.0f} photos/s  {size / seconds / 1e6:7.0f} MB/s  ({found})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Walking the attributes of every record of a large MFT.
+
+Writes an MFT of record_count records, each with a $STANDARD_INFORMATION, a
+$FILE_NAME and a $DATA attribute (or takes the MFT given), then times applying
+the update sequences, walking the attributes of every record and decoding the
+timestamps, parent references and names, which is the work per record of the
+attribute walker without the nodes.
+
+    python benchmarks/mft_attributes.py [record_count | mft]
+"""
+import os
+import struct
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from mft_attributes import FILE_NAME, STANDARD_INFORMATION, file_name, iter_attributes, standard_information  # noqa: E402
+from mft_records import MFTRecords, record_size_of  # noqa: E402
+
+RECORD_SIZE = 1024
+HEADER = struct.Struct('<4sHHQHHHHIIQHHI')
+RESIDENT = struct.Struct('<IIBBHHHIHBB')
+
+
+def resident(attribute_type, attribute_id, value):
+    value += bytes(-len(value) % 8)
+    return RESIDENT.pack(attribute_type, 0x18 + len(value), 0, 0, 0x18, 0, attribute_id, len(value), 0x18, 0, 0) + value
+
+
+def build(file, count):
+    for number in range(count):
+        filetime = 132000000000000000 + number * 10_000_000
+        name = f"file{number}.txt".encode('utf-16-le')
+        attributes = (resident(0x10, 0, struct.pack('<4QIIII', *[filetime] * 4, 0x20, 0, 0, 0) + bytes(24))
+                      + resident(0x30, 1, struct.pack('<Q4QQQIIBB', 5 | 5 << 48, *[filetime] * 4, 4096, 24, 0x20, 0,
+                                                      len(name) // 2, 1) + name)
+                      + resident(0x80, 2, b'hello world ' * 2)
+                      + b'\xff\xff\xff\xff' + bytes(4))
+        record = bytearray(RECORD_SIZE)
+        HEADER.pack_into(record, 0, b'FILE', 0x30, 3, number, 1, 1, 0x38, 1, 0x38 + len(attributes), RECORD_SIZE, 0, 3, 0, number)
+        record[0x38:0x38 + len(attributes)] = attributes
+        usn = number % 0xFFFE + 1
+        record[0x32:0x36] = record[510:512] + record[1022:1024]
+        struct.pack_into('<H', record, 0x30, usn)
+        struct.pack_into('<H', record, 510, usn)
+        struct.pack_into('<H', record, 1022, usn)
+        file.write(record)
+    file.flush()
+
+
+def walk(records):
+    names = 0
+    for index, record in records.iter_valid():
+        end = min(int(records.used_size[index]), records.record_size)
+        for attribute in iter_attributes(record, int(records.attribute_offset[index]), end):
+            if attribute.type == STANDARD_INFORMATION:
+                standard_information(record, attribute)
+            elif attribute.type == FILE_NAME and file_name(record, attribute) is not None:
+                names += 1
+    return names
+
+
+def main():
+    argument = sys.argv[1] if len(sys.argv) > 1 else "200000"
+    with tempfile.TemporaryDirectory() as directory:
+        path = argument
+        if argument.isdigit():
+            path = os.path.join(directory, "MFT")
+            with open(path, "wb") as file:
+                build(file, int(argument))
+        with open(path, "rb") as file:
+            source = file.read()
+    start = time.perf_counter()
+    records = MFTRecords(source, 0, record_size_of(source, 0))
+    names = walk(records)
+    seconds = time.perf_counter() - start
+    count = len(records)
+    print(f"{count} records, {names} file names, {len(source) / 1e6:.1f} MB")
+    print(f"{seconds:.2f} s, {count / seconds:.0f} records/s: {1_000_000 / (count / seconds):.1f} s per million records")
+
+
+if __name__ == "__main__":
+    main()
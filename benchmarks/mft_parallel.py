@@ -0,0 +1,84 @@
+"""
+Parsing a large MFT with and without worker processes.
+
+Writes an MFT of record_count records like benchmarks/mft_attributes.py does (or
+takes the MFT given), then parses it with MFTFileParser once walking each record
+as it is listed and once per worker count with the records walked by mft_parallel
+first, and checks every run yields the same events. Only the parse events are
+produced (keep_tree=False).
+
+    python benchmarks/mft_parallel.py [record_count | mft] [worker_count ...]
+"""
+import logging
+import os
+import struct
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from Artefacts.MFTFileParser import MFTFileParser  # noqa: E402
+
+# The shards log their progress
+logging.disable(logging.INFO)
+
+RECORD_SIZE = 1024
+HEADER = struct.Struct('<4sHHQHHHHIIQHHI')
+RESIDENT = struct.Struct('<IIBBHHHIHBB')
+
+
+def resident(attribute_type, attribute_id, value):
+    value += bytes(-len(value) % 8)
+    return RESIDENT.pack(attribute_type, 0x18 + len(value), 0, 0, 0x18, 0, attribute_id, len(value), 0x18, 0, 0) + value
+
+
+def build(file, count):
+    for number in range(count):
+        filetime = 132000000000000000 + number * 10_000_000
+        name = f"file{number}.txt".encode('utf-16-le')
+        attributes = (resident(0x10, 0, struct.pack('<4QIIII', *[filetime] * 4, 0x20, 0, 0, 0) + bytes(24))
+                      + resident(0x30, 1, struct.pack('<Q4QQQIIBB', 5 | 5 << 48, *[filetime] * 4, 4096, 24, 0x20, 0,
+                                                      len(name) // 2, 1) + name)
+                      + resident(0x80, 2, b'hello world ' * 2)
+                      + b'\xff\xff\xff\xff' + bytes(4))
+        record = bytearray(RECORD_SIZE)
+        HEADER.pack_into(record, 0, b'FILE', 0x30, 3, number, 1, 1, 0x38, 1, 0x38 + len(attributes), RECORD_SIZE, 0, 3, 0, number)
+        record[0x38:0x38 + len(attributes)] = attributes
+        usn = number % 0xFFFE + 1
+        record[0x32:0x36] = record[510:512] + record[1022:1024]
+        struct.pack_into('<H', record, 0x30, usn)
+        struct.pack_into('<H', record, 510, usn)
+        struct.pack_into('<H', record, 1022, usn)
+        file.write(record)
+    file.flush()
+
+
+def parse(path, workers):
+    with open(path, "rb") as file:
+        parser = MFTFileParser(file, workers=workers)
+        start = time.perf_counter()
+        events = [(offset, node.name, node.table_value, depth) for offset, node, depth in parser.iter_parse(keep_tree=False)]
+        return time.perf_counter() - start, events
+
+
+def main():
+    argument = sys.argv[1] if len(sys.argv) > 1 else "50000"
+    worker_counts = [int(argument) for argument in sys.argv[2:]] or sorted({1, 2, 4, os.cpu_count() or 1})
+    with tempfile.TemporaryDirectory() as directory:
+        path = argument
+        if argument.isdigit():
+            path = os.path.join(directory, "MFT")
+            with open(path, "wb") as file:
+                build(file, int(argument))
+        print(f"{os.path.getsize(path) / 1e6:.1f} MB, {os.cpu_count()} CPUs")
+        serial_time, expected = parse(path, None)
+        print(f"no workers: {serial_time:6.2f} s  {len(expected)} events")
+        for workers in worker_counts:
+            seconds, events = parse(path, workers)
+            assert events == expected
+            print(f"{workers:3} workers: {seconds:6.2f} s  {serial_time / seconds:5.2f}x")
+
+
+if __name__ == "__main__":
+    main()
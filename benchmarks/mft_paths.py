@@ -0,0 +1,82 @@
+"""
+Resolving the full path of every entry of a large MFT.
+
+Writes an MFT of record_count records in a directory tree (each entry's parent
+is a directory before it, or the root), or takes the MFT given, then times
+building the parent reference index and resolving the path of every entry.
+Both should grow linearly with the number of records.
+
+    python benchmarks/mft_paths.py [record_count | mft]
+"""
+import os
+import random
+import struct
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from mft_paths import PathIndex  # noqa: E402
+from mft_records import MFTRecords, record_size_of  # noqa: E402
+
+RECORD_SIZE = 1024
+HEADER = struct.Struct('<4sHHQHHHHIIQHHI')
+RESIDENT = struct.Struct('<IIBBHHHIHBB')
+ROOT_DIRECTORY = 5
+
+
+def resident(attribute_type, attribute_id, value):
+    value += bytes(-len(value) % 8)
+    return RESIDENT.pack(attribute_type, 0x18 + len(value), 0, 0, 0x18, 0, attribute_id, len(value), 0x18, 0, 0) + value
+
+
+def build(file, count):
+    directories = [ROOT_DIRECTORY]
+    for number in range(count):
+        directory = number < 16 or number % 5 == 0
+        parent = random.choice(directories[-1000:]) if number > ROOT_DIRECTORY else ROOT_DIRECTORY
+        name = (f"dir{number}" if directory else f"file{number}.txt").encode('utf-16-le')
+        attributes = (resident(0x30, 1, struct.pack('<Q4QQQIIBB', parent | 1 << 48, 0, 0, 0, 0, 0, 0, 0, 0,
+                                                    len(name) // 2, 1) + name)
+                      + b'\xff\xff\xff\xff' + bytes(4))
+        record = bytearray(RECORD_SIZE)
+        HEADER.pack_into(record, 0, b'FILE', 0x30, 3, number, 1, 1, 0x38, 3 if directory else 1,
+                         0x38 + len(attributes), RECORD_SIZE, 0, 2, 0, number)
+        record[0x38:0x38 + len(attributes)] = attributes
+        usn = number % 0xFFFE + 1
+        record[0x32:0x36] = record[510:512] + record[1022:1024]
+        struct.pack_into('<H', record, 0x30, usn)
+        struct.pack_into('<H', record, 510, usn)
+        struct.pack_into('<H', record, 1022, usn)
+        file.write(record)
+        if directory and number != ROOT_DIRECTORY:
+            directories.append(number)
+    file.flush()
+
+
+def main():
+    argument = sys.argv[1] if len(sys.argv) > 1 else "200000"
+    random.seed(0)
+    with tempfile.TemporaryDirectory() as directory:
+        path = argument
+        if argument.isdigit():
+            path = os.path.join(directory, "MFT")
+            with open(path, "wb") as file:
+                build(file, int(argument))
+        with open(path, "rb") as file:
+            source = file.read()
+    records = MFTRecords(source, 0, record_size_of(source, 0))
+    start = time.perf_counter()
+    index = PathIndex(records)
+    built = time.perf_counter()
+    paths = sum(index.path(number) is not None for number in range(len(records)))
+    seconds = time.perf_counter() - built
+    count = len(records)
+    print(f"{count} records, {paths} paths, {len(index.cache)} cached directories")
+    print(f"Index: {built - start:.2f} s, {1_000_000 * (built - start) / count:.1f} s per million records")
+    print(f"Paths: {seconds:.2f} s, {1_000_000 * seconds / count:.1f} s per million records")
+
+
+if __name__ == "__main__":
+    main()
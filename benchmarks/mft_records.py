@@ -0,0 +1,75 @@
+"""
+Decoding the FILE record headers of a large MFT with and without NumPy.
+
+Writes an MFT of record_count 1024-byte FILE records (or takes the MFT given),
+then times mft_records.MFTRecords over the mapped file, once with NumPy's
+structured view and once with the per-record fallback, plus applying the update
+sequence of every record, and checks both give the same results.
+
+    python benchmarks/mft_records.py [record_count | mft]
+"""
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import mft_records  # noqa: E402
+
+RECORD_SIZE = 1024
+HEADER = struct.Struct('<4sHHQHHHHIIQHHI')
+
+
+def build(file, count):
+    for number in range(count):
+        record = bytearray(RECORD_SIZE)
+        usn = number % 0xFFFE + 1
+        HEADER.pack_into(record, 0, b'FILE', 0x30, 3, number, 1, 1, 0x38, 1, 0x98, RECORD_SIZE, 0, 3, 0, number)
+        record[0x38:0x3C] = b'\xff\xff\xff\xff'
+        # Save the last word of each sector in the update sequence array and put the number in its place
+        struct.pack_into('<3H', record, 0x30, usn, number & 0xFFFF, ~number & 0xFFFF)
+        struct.pack_into('<H', record, 510, usn)
+        struct.pack_into('<H', record, 1022, usn)
+        file.write(record)
+    file.flush()
+
+
+def decode(source, numpy):
+    saved, mft_records.np = mft_records.np, mft_records.np if numpy else None
+    start = time.perf_counter()
+    records = mft_records.MFTRecords(source, 0, mft_records.record_size_of(source, 0))
+    decoded = time.perf_counter() - start
+    start = time.perf_counter()
+    fixed = records.fixed(0, len(records))
+    fixups = time.perf_counter() - start
+    result = (list(records.status), [int(sequence) for sequence in records.sequence], bytes(fixed[:1 << 20]))
+    mft_records.np = saved
+    return decoded, fixups, len(records), result
+
+
+def main():
+    argument = sys.argv[1] if len(sys.argv) > 1 else "200000"
+    with tempfile.TemporaryDirectory() as directory:
+        path = argument
+        if argument.isdigit():
+            path = os.path.join(directory, "MFT")
+            with open(path, "wb") as file:
+                build(file, int(argument))
+        with open(path, "rb") as file:
+            # Copied, so the arrays viewing it do not keep a mapping open
+            source = bytes(mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ))
+        if mft_records.np is not None:
+            numpy_time, numpy_fixups, count, expected = decode(source, True)
+        fallback_time, fallback_fixups, count, result = decode(source, False)
+    print(f"{count} records, {len(source) / 1e6:.1f} MB")
+    if mft_records.np is not None:
+        assert expected == result
+        print(f"NumPy:    {numpy_time:6.3f} s headers  {numpy_fixups:6.3f} s fixups  {count / numpy_time:12.0f} records/s")
+    print(f"fallback: {fallback_time:6.3f} s headers  {fallback_fixups:6.3f} s fixups  {count / fallback_time:12.0f} records/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Per-node memory of a parsed tree, before and after the columnar NodeTable.
+
+Builds the same flat tree (similar to the SQLite cell pointer nodes) with the
+previous dict-based Node and with the current common.Node, and reports the
+traced allocations per node.
+
+    python benchmarks/node_memory.py [node_count]
+"""
+import os
+import random
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from common import Node  # noqa: E402
+
+
+class LegacyNode:
+    """The Node implementation before NodeTable, kept here for comparison."""
+
+    def __init__(self, data, info, name=None, color=None, table_value=None):
+        self.data = data
+        self.info = info
+        self.color = color if color else '#' + ''.join(["{:06x}".format(random.randint(0, 0xFFFFFF))])
+        self.children = []
+        self.name = name
+        self.table_value = table_value
+
+    def add_child(self, key, node):
+        self.children.append((key, node))
+        return node
+
+
+def build(node_class, count, source):
+    root = node_class(b'', "Benchmark file")
+    for index in range(count):
+        offset = index * 2
+        if node_class is Node:
+            node = Node.from_source(source, offset, 2, f"Cell Pointer: {index % 4096}", name="Cell pointer",
+                                    table_value=index % 4096)
+        else:
+            node = LegacyNode(source[offset:offset + 2], f"Cell Pointer: {index % 4096}", name="Cell pointer",
+                              table_value=index % 4096)
+        root.add_child(offset, node)
+    return root
+
+
+def measure(node_class, count, source):
+    tracemalloc.start()
+    root = build(node_class, count, source)
+    used, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del root
+    return used / count
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    source = os.urandom(count * 2)
+    before = measure(LegacyNode, count, source)
+    after = measure(Node, count, source)
+    print(f"{count} nodes")
+    print(f"before (dict-based Node): {before:8.1f} bytes/node")
+    print(f"after  (NodeTable rows):  {after:8.1f} bytes/node")
+    print(f"reduction:                {before / after:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Scanning a SQLite table with sqlite_record versus the sqlite3 module.
+
+Builds a database with one table of integers, floats, text and small BLOBs
+(every hundredth row large enough to overflow), then reads every row once with
+sqlite3 and by decoding the B-tree pages with sqlite_record.iter_table_rows,
+over the mapped file and through PageReader's file reads, and checks they all
+return the same rows.
+
+    python benchmarks/record_decode.py [row_count]
+"""
+import mmap
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from sqlite_pages import PageReader  # noqa: E402
+from sqlite_carve import rowid_alias  # noqa: E402
+from sqlite_record import iter_table_rows  # noqa: E402
+
+
+def build(path, count):
+    db = sqlite3.connect(path)
+    db.execute("CREATE TABLE item (id INTEGER PRIMARY KEY, size INTEGER, score REAL, title TEXT, digest BLOB)")
+    db.executemany("INSERT INTO item VALUES (?, ?, ?, ?, ?)",
+                   ((index, index * 7919 % 100000, index / 7, f"Title {index}" * (1 + index % 3),
+                     os.urandom(8000 if index % 100 == 0 else 16))
+                    for index in range(1, count + 1)))
+    db.commit()
+    root_page, sql = db.execute("SELECT rootpage, sql FROM sqlite_master WHERE name = 'item'").fetchone()
+    page_size, = db.execute("PRAGMA page_size").fetchone()
+    db.close()
+    return root_page, page_size, rowid_alias(sql)
+
+
+def read_with_sqlite3(path):
+    db = sqlite3.connect(path)
+    rows = db.execute("SELECT * FROM item").fetchall()
+    db.close()
+    return rows
+
+
+def read_with_decoder(path, root_page, page_size, alias, mapped=True):
+    with open(path, "rb") as file:
+        source = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) if mapped else None
+        pages = PageReader(file, page_size, source)
+        # The INTEGER PRIMARY KEY is stored as the rowid, with NULL in the record
+        rows = [tuple(values[:alias]) + (rowid,) + tuple(values[alias + 1:])
+                for rowid, values in iter_table_rows(pages, root_page, page_size)]
+        del pages
+        if source is not None:
+            source.close()
+    return rows
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "benchmark.sqlite")
+        root_page, page_size, alias = build(path, count)
+        size = os.path.getsize(path)
+        expected_time, expected = timed(read_with_sqlite3, path)
+        decoded_time, decoded = timed(read_with_decoder, path, root_page, page_size, alias)
+        unmapped_time, unmapped = timed(read_with_decoder, path, root_page, page_size, alias, False)
+    assert decoded == expected and unmapped == expected
+    print(f"{count} rows, {size / 1e6:.1f} MB")
+    print(f"sqlite3 SELECT *:          {expected_time:6.2f} s  {count / expected_time:10.0f} rows/s")
+    print(f"sqlite_record page decode: {decoded_time:6.2f} s  {count / decoded_time:10.0f} rows/s")
+    print(f"  without mmap (PageReader): {unmapped_time:6.2f} s  {count / unmapped_time:10.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Looking up SQLite rows by rowid against parsing the whole database.
+
+Builds a database with one table (or takes the database and table given), then
+looks up random rowids with SQLiteFileParser.find_row, and reports how many pages
+a lookup reads next to the time a full parse takes.
+
+    python benchmarks/rowid_lookup.py [row_count | database table]
+"""
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from Artefacts.SQLiteFileParser import SQLiteFileParser  # noqa: E402
+from sqlite_pages import PageReader  # noqa: E402
+from sqlite_record import find_rowid  # noqa: E402
+
+LOOKUPS = 1000
+
+
+def build(path, count):
+    db = sqlite3.connect(path)
+    db.execute("CREATE TABLE item (id INTEGER PRIMARY KEY, title TEXT, digest BLOB)")
+    db.executemany("INSERT INTO item VALUES (?, ?, ?)",
+                   ((index, f"Title {index}", os.urandom(32)) for index in range(1, count + 1)))
+    db.commit()
+    db.close()
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        if len(sys.argv) > 2:
+            path, table = sys.argv[1], sys.argv[2]
+        else:
+            path, table = os.path.join(directory, "benchmark.sqlite"), "item"
+            build(path, int(sys.argv[1]) if len(sys.argv) > 1 else 50000)
+        db = sqlite3.connect(path)
+        rowids = [rowid for rowid, in db.execute(f'SELECT rowid FROM "{table}"')]
+        db.close()
+        row_count = len(rowids)
+        rowids = random.sample(rowids, min(LOOKUPS, row_count))
+
+        with open(path, "rb") as file:
+            parser = SQLiteFileParser(file)
+            start = time.perf_counter()
+            parser.read_schema()
+            schema_time = time.perf_counter() - start
+            start = time.perf_counter()
+            for rowid in rowids:
+                match = parser.find_row(table, rowid)
+                assert match is not None and match.rowid == rowid
+            lookup_time = time.perf_counter() - start
+
+            # Without a source or a cache, every page a lookup reads is read from the file
+            pages = PageReader(file, parser.page_size, cache_size=0)
+            root_page = parser.schema[table][0]
+            reads = 0
+            for rowid in rowids:
+                path_pages, _ = find_rowid(pages, root_page, rowid, parser.usable_size, parser.encoding)
+                reads += len(path_pages)
+            assert reads == pages.misses
+
+            start = time.perf_counter()
+            for _ in SQLiteFileParser(file).iter_parse(keep_tree=False):
+                pass
+            parse_time = time.perf_counter() - start
+            size = os.path.getsize(path)
+
+    print(f"{row_count} rows in {table}, {size / 1e6:.1f} MB")
+    print(f"schema:     {schema_time * 1e3:8.2f} ms")
+    print(f"lookup:     {lookup_time / len(rowids) * 1e6:8.1f} us per row, {reads / len(rowids):.1f} pages read")
+    print(f"full parse: {parse_time:8.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Carving deleted SQLite records out of unallocated bytes.
+
+Builds a database, deletes every seventh row without secure_delete so the rows
+are left in freeblocks and freelist pages, then carves the whole file as
+unallocated bytes with sqlite_carve.RecordCarver and reports the throughput and
+how many of the deleted rows were recovered.
+
+    python benchmarks/sqlite_carve.py [row_count]
+"""
+import mmap
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from sqlite_carve import RecordCarver, table_schema  # noqa: E402
+
+SQL = "CREATE TABLE person (id INTEGER PRIMARY KEY, name TEXT, age INTEGER, score REAL, photo BLOB)"
+
+
+def build(path, count):
+    db = sqlite3.connect(path)
+    db.execute("PRAGMA secure_delete = OFF")
+    db.execute(SQL)
+    db.executemany("INSERT INTO person VALUES (?, ?, ?, ?, ?)",
+                   ((index, f"Person {index}", index % 90, index / 3, os.urandom(16)) for index in range(1, count + 1)))
+    db.commit()
+    db.execute("DELETE FROM person WHERE id % 7 = 0")
+    db.commit()
+    db.close()
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "benchmark.sqlite")
+        build(path, count)
+        carver = RecordCarver([table_schema("person", SQL)])
+        with open(path, "rb") as file:
+            source = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            start = time.perf_counter()
+            names = {record.columns[1].value for record in carver.carve(source, 0, len(source))}
+            seconds = time.perf_counter() - start
+            size = len(source)
+            source.close()
+    deleted = [f"Person {index}" for index in range(7, count + 1, 7)]
+    recovered = sum(1 for name in deleted if name in names)
+    print(f"{count} rows, {size / 1e6:.1f} MB carved in {seconds:.2f} s ({size / 1e6 / seconds:.1f} MB/s)")
+    print(f"{len(names)} records found, {recovered} of the {len(deleted)} deleted rows among them")
+
+
+if __name__ == "__main__":
+    main()
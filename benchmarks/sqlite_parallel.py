@@ -0,0 +1,58 @@
+"""
+Parsing a SQLite database with and without worker processes.
+
+Builds a database of a few tables, then parses it with SQLiteFileParser once
+decoding each page as the walk reaches it and once per worker count with the
+pages decoded by sqlite_parallel first, and checks every run yields the same
+events. Only the parse events are produced (keep_tree=False).
+
+    python benchmarks/sqlite_parallel.py [row_count] [worker_count ...]
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from Artefacts.SQLiteFileParser import SQLiteFileParser  # noqa: E402
+
+
+def build(path, count):
+    db = sqlite3.connect(path)
+    db.execute("CREATE TABLE item (id INTEGER PRIMARY KEY, size INTEGER, score REAL, title TEXT, digest BLOB)")
+    db.execute("CREATE INDEX item_title ON item (title)")
+    db.executemany("INSERT INTO item VALUES (?, ?, ?, ?, ?)",
+                   ((index, index * 7919 % 100000, index / 7, f"Title {index}" * (1 + index % 3),
+                     os.urandom(8000 if index % 100 == 0 else 16))
+                    for index in range(1, count + 1)))
+    db.commit()
+    db.close()
+
+
+def parse(path, workers):
+    with open(path, "rb") as file:
+        parser = SQLiteFileParser(file, workers=workers)
+        start = time.perf_counter()
+        events = [(offset, node.name, node.table_value, depth) for offset, node, depth in parser.iter_parse(keep_tree=False)]
+        return time.perf_counter() - start, events
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    worker_counts = [int(argument) for argument in sys.argv[2:]] or sorted({1, 2, 4, os.cpu_count() or 1})
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "benchmark.sqlite")
+        build(path, count)
+        print(f"{count} rows, {os.path.getsize(path) / 1e6:.1f} MB, {os.cpu_count()} CPUs")
+        serial_time, expected = parse(path, None)
+        print(f"no workers: {serial_time:6.2f} s  {len(expected)} events")
+        for workers in worker_counts:
+            seconds, events = parse(path, workers)
+            assert events == expected
+            print(f"{workers:3} workers: {seconds:6.2f} s  {serial_time / seconds:5.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Surveying the page types of a SQLite database with and without NumPy.
+
+Builds a database with a table and an index (or takes the database given), maps
+it and classifies every page with sqlite_survey.survey_pages, once with NumPy's
+strided views and once with the extended-slice fallback, and checks both give
+the same counts.
+
+    python benchmarks/sqlite_survey.py [row_count | database]
+"""
+import mmap
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import sqlite_survey  # noqa: E402
+from Artefacts.SQLiteFileParser import DB_HEADER, PAGE_TYPES  # noqa: E402
+
+
+def build(path, count):
+    db = sqlite3.connect(path)
+    db.execute("CREATE TABLE item (id INTEGER PRIMARY KEY, title TEXT, digest BLOB)")
+    db.execute("CREATE INDEX item_title ON item (title)")
+    db.executemany("INSERT INTO item VALUES (?, ?, ?)",
+                   ((index, f"Title {index}", os.urandom(32)) for index in range(1, count + 1)))
+    db.commit()
+    db.close()
+
+
+def survey(path, numpy):
+    with open(path, "rb") as file:
+        source = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        header = DB_HEADER.values(source)
+        page_size = 65536 if header["Page size"] == 1 else header["Page size"]
+        saved, sqlite_survey.np = sqlite_survey.np, sqlite_survey.np if numpy else None
+        start = time.perf_counter()
+        result = sqlite_survey.survey_pages(source, page_size, page_size - header["Unused Space"],
+                                            header["First freelist trunk page"], header["Auto-vacuum"])
+        counts = sqlite_survey.summarize(result, PAGE_TYPES)
+        seconds = time.perf_counter() - start
+        sqlite_survey.np = saved
+        source.close()
+    return seconds, counts
+
+
+def main():
+    argument = sys.argv[1] if len(sys.argv) > 1 else "1000000"
+    with tempfile.TemporaryDirectory() as directory:
+        path = argument
+        if argument.isdigit():
+            path = os.path.join(directory, "benchmark.sqlite")
+            build(path, int(argument))
+        size = os.path.getsize(path)
+        numpy_time, expected = survey(path, True) if sqlite_survey.np is not None else (None, None)
+        fallback_time, counts = survey(path, False)
+    print(f"{size / 1e6:.1f} MB")
+    for name, (count, fill) in counts.items():
+        print(f"  {name:22} {count:8} pages" + (f", {fill:.0%} full on average" if fill is not None else ""))
+    if numpy_time is not None:
+        assert [count for count, _ in expected.values()] == [count for count, _ in counts.values()]
+        print(f"NumPy:    {numpy_time:6.3f} s  {size / 1e9 / numpy_time:6.1f} GB/s")
+    print(f"fallback: {fallback_time:6.3f} s  {size / 1e9 / fallback_time:6.1f} GB/s")
+
+
+if __name__ == "__main__":
+    main()
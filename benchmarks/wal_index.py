@@ -0,0 +1,58 @@
+"""
+Building the page index of a large SQLite write-ahead log.
+
+Writes a log of frame_count frames of 1024-byte pages, spread over a few
+thousand pages and committed every hundred frames, with a valid checksum
+chain, then times building sqlite_wal.WALIndex over the mapped file, which
+follows the chain through every page.
+
+    python benchmarks/wal_index.py [frame_count]
+"""
+import mmap
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from sqlite_wal import FRAME_HEADER, WAL_HEADER, WAL_MAGIC_BE, WALIndex, wal_checksum  # noqa: E402
+
+PAGE_SIZE = 1024
+PAGES = 5000
+SALTS = (0x1234, 0x5678)
+
+
+def build(file, count):
+    header = WAL_HEADER.pack(WAL_MAGIC_BE, 3007000, PAGE_SIZE, 0, *SALTS, 0, 0)[:24]
+    s0, s1 = wal_checksum(header, 0, 0, True)
+    file.write(header + WAL_HEADER.pack(*(0,) * 6, s0, s1)[24:])
+    page = bytes(PAGE_SIZE)
+    for index in range(count):
+        commit_size = PAGES if index % 100 == 99 else 0
+        frame_header = FRAME_HEADER.pack(index * 7919 % PAGES + 1, commit_size, *SALTS, 0, 0)
+        s0, s1 = wal_checksum(frame_header[:8], s0, s1, True)
+        s0, s1 = wal_checksum(page, s0, s1, True)
+        file.write(frame_header[:16] + FRAME_HEADER.pack(*(0,) * 4, s0, s1)[16:])
+        file.write(page)
+    file.flush()
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 300_000
+    with tempfile.TemporaryFile() as file:
+        build(file, count)
+        source = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        start = time.perf_counter()
+        index = WALIndex(source)
+        seconds = time.perf_counter() - start
+        size = len(source)
+        del index.buffer
+        source.close()
+    assert len(index.frames) == index.valid_count == count
+    print(f"{count} frames, {size / 1e6:.1f} MB: indexed in {seconds:.3f} s ({count / seconds:.0f} frames/s)")
+    print(f"{len(index.latest)} pages in the log, {index.committed_count} committed frames")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,294 @@
 from abc import ABC, abstractmethod
+from array import array
+import io
+import mmap
 import random
 
+from cursor import ByteCursor
+
+
+def map_file(file):
+    """
+    Map an open binary file read-only so nodes can share it instead of copying bytes.
+
+    Returns None when the file cannot be mapped (empty files, in-memory streams).
+    """
+    try:
+        return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    except (AttributeError, OSError, ValueError, io.UnsupportedOperation):
+        return None
+
+
+# Default colours are drawn from a fixed palette so NodeTable can store them as small ids
+PALETTE = ['#' + "{:06x}".format(random.randint(0, 0xFFFFFF)) for _ in range(256)]
+
+
+class NodeTable:
+    """
+    Columnar storage for a parsed tree.
+
+    Every node is a row in a set of parallel arrays (key, data offset, length,
+    parent and sibling links, name/colour/info ids). Names, colours and info
+    strings are interned, so a tree of millions of nodes costs tens of bytes
+    per node instead of a Python object, a dict and a children list each.
+    """
+
+    def __init__(self, source=None):
+        self.source = source  # Shared mmap/bytes that source-backed rows slice from
+        self.keys = array('q')
+        self.offsets = array('q')  # Offset into source, -1 for inline data
+        self.lengths = array('q')
+        self.parents = array('q')
+        self.first_child = array('q')
+        self.last_child = array('q')
+        self.next_sibling = array('q')
+        self.name_ids = array('i')
+        self.color_ids = array('i')
+        self.info_ids = array('i')
+        self.names = []
+        self.colors = []
+        self.infos = []  # Strings, or callables formatted on first access
+        self._interned = ({}, {}, {})
+        self.inline = {}  # Row -> bytes for data that does not come from source
+        self.table_values = []
+
+    def __len__(self):
+        return len(self.keys)
+
+    def intern(self, kind, value):
+        """Return the id of value in the names (0), colours (1) or infos (2) table."""
+        values = (self.names, self.colors, self.infos)[kind]
+        if kind == 2 and callable(value):
+            values.append(value)  # Lazy info, one per row
+            return len(values) - 1
+        lookup = self._interned[kind]
+        value_id = lookup.get(value)
+        if value_id is None:
+            value_id = lookup[value] = len(values)
+            values.append(value)
+        return value_id
+
+    def add_row(self, parent, key, data, source, offset, length, info, name, color, table_value):
+        """Append a row under parent (-1 for none) and return its index."""
+        index = len(self.keys)
+        if source is not None and self.source is None:
+            self.source = source
+        if source is not None and source is self.source:
+            self.offsets.append(offset)
+            self.lengths.append(length)
+        else:
+            data = data if source is None else memoryview(source)[offset:offset + length]
+            if data:
+                self.inline[index] = data
+            self.offsets.append(-1)
+            self.lengths.append(len(data) if data is not None else 0)
+        self.keys.append(key)
+        self.parents.append(parent)
+        self.first_child.append(-1)
+        self.last_child.append(-1)
+        self.next_sibling.append(-1)
+        self.name_ids.append(self.intern(0, name))
+        self.color_ids.append(self.intern(1, color) if color else random.randrange(len(PALETTE)) - len(PALETTE))
+        self.info_ids.append(self.intern(2, info))
+        self.table_values.append(table_value)
+        if parent >= 0:
+            if self.last_child[parent] < 0:
+                self.first_child[parent] = index
+            else:
+                self.next_sibling[self.last_child[parent]] = index
+            self.last_child[parent] = index
+        return index
+
+    def data(self, index):
+        offset = self.offsets[index]
+        if offset >= 0:
+            return memoryview(self.source)[offset:offset + self.lengths[index]]
+        return self.inline.get(index, b'')
+
+    def info(self, index):
+        info = self.infos[self.info_ids[index]]
+        if callable(info):
+            info = self.infos[self.info_ids[index]] = info()
+        return info
+
+    def color(self, index):
+        color_id = self.color_ids[index]
+        return PALETTE[color_id] if color_id < 0 else self.colors[color_id]
+
+    def graft(self, other, parent, key):
+        """
+        Copy the tree stored in another table under parent and return the new index of its root.
+
+        Rows keep their order, so row r of other becomes row base + r. The other table is
+        left as it was: Node facades over its rows still point at it, so they read the old
+        copy and changes made through them do not reach this table. They are invalid once
+        the tree has been grafted; get the nodes again from the children of the new root.
+        """
+        base = len(self.keys)
+        for row in range(len(other)):
+            offset = other.offsets[row]
+            self.add_row(parent if row == 0 else base + other.parents[row],
+                         key if row == 0 else other.keys[row],
+                         other.inline.get(row, b''),
+                         other.source if offset >= 0 else None, offset, other.lengths[row],
+                         other.infos[other.info_ids[row]], other.names[other.name_ids[row]],
+                         other.color(row), other.table_values[row])
+        return base
+
+    def children(self, index):
+        """Yield (key, row) for the children of a row in insertion order."""
+        child = self.first_child[index]
+        while child >= 0:
+            yield self.keys[child], child
+            child = self.next_sibling[child]
+
+
+class _Detached:
+    """Fields of a node that has not been added to a tree yet."""
+    __slots__ = ('data', 'source', 'offset', 'length', 'info', 'name', 'color', 'table_value')
+
+
 class Node:
+    """
+    A parsed sequence of the file.
+
+    Nodes are thin facades over a row in a NodeTable. A freshly created node
+    keeps its fields on the side until it is added with add_child, at which
+    point it moves into the parent's table. A detached node that gets a child
+    becomes the root of a new table.
+    """
+    __slots__ = ('table', 'index', '_detached')
+
     def __init__(self, data, info, name=None, color=None, table_value=None):
-        self.data = data
-        self.info = info
-        self.color = color if color else '#' + ''.join(["{:06x}".format(random.randint(0, 0xFFFFFF))])
-        self.children = []
-        self.name = name
-        self.table_value = table_value  # or some default value
+        self.table = None
+        self.index = -1
+        detached = self._detached = _Detached()
+        detached.data = data
+        detached.source = None  # Shared mmap/bytes the data is sliced from, if any
+        detached.offset = None
+        detached.length = None
+        detached.info = info
+        detached.name = name
+        detached.color = color
+        detached.table_value = table_value  # or some default value
+
+    @classmethod
+    def from_source(cls, source, offset, length, info, name=None, color=None, table_value=None):
+        """
+        Create a node that refers to source[offset:offset + length] without copying it.
+        """
+        node = cls(None, info, name=name, color=color, table_value=table_value)
+        node._detached.source = source
+        node._detached.offset = offset
+        node._detached.length = length
+        return node
+
+    def _attach(self, table, parent, key):
+        detached = self._detached
+        self.table = table
+        self.index = table.add_row(parent, key, detached.data, detached.source, detached.offset, detached.length,
+                                   detached.info, detached.name, detached.color, detached.table_value)
+        self._detached = None
+
+    @property
+    def data(self):
+        """The node's bytes; a zero-copy memoryview slice for source-backed nodes."""
+        if self.table is not None:
+            return self.table.data(self.index)
+        detached = self._detached
+        if detached.source is not None:
+            return memoryview(detached.source)[detached.offset:detached.offset + detached.length]
+        return detached.data
+
+    @property
+    def info(self):
+        if self.table is not None:
+            return self.table.info(self.index)
+        info = self._detached.info
+        return info() if callable(info) else info
+
+    @info.setter
+    def info(self, value):
+        if self.table is not None:
+            self.table.info_ids[self.index] = self.table.intern(2, value)
+        else:
+            self._detached.info = value
+
+    @property
+    def name(self):
+        if self.table is not None:
+            return self.table.names[self.table.name_ids[self.index]]
+        return self._detached.name
+
+    @name.setter
+    def name(self, value):
+        if self.table is not None:
+            self.table.name_ids[self.index] = self.table.intern(0, value)
+        else:
+            self._detached.name = value
+
+    @property
+    def color(self):
+        if self.table is not None:
+            return self.table.color(self.index)
+        if self._detached.color is None:
+            self._detached.color = random.choice(PALETTE)
+        return self._detached.color
+
+    @color.setter
+    def color(self, value):
+        if self.table is not None:
+            self.table.color_ids[self.index] = self.table.intern(1, value)
+        else:
+            self._detached.color = value
+
+    @property
+    def table_value(self):
+        if self.table is not None:
+            return self.table.table_values[self.index]
+        return self._detached.table_value
 
+    @table_value.setter
+    def table_value(self, value):
+        if self.table is not None:
+            self.table.table_values[self.index] = value
+        else:
+            self._detached.table_value = value
+
+    @property
+    def children(self):
+        if self.table is None:
+            return []
+        table = self.table
+        return [(key, Node._row(table, row)) for key, row in table.children(self.index)]
+
+    @classmethod
+    def _row(cls, table, index):
+        node = cls.__new__(cls)
+        node.table = table
+        node.index = index
+        node._detached = None
+        return node
 
     def add_child(self, key, node):
-        self.children.append((key, node))
+        """
+        Add node under this node with key and return it.
+
+        A node that is the root of a tree built on its own is copied over with its
+        subtree (see NodeTable.graft) and rebound to the copy. Other nodes of that
+        subtree held by the caller still refer to the old tree and are invalid; get them
+        again through the children of the returned node.
+        """
+        if self.table is None:
+            # The first child turns a detached node into the root of its own table
+            self._attach(NodeTable(), -1, 0)
+        if node.table is None:
+            node._attach(self.table, self.index, key)
+        elif node.index == 0 and node.table is not self.table:
+            # A subtree built on its own is copied over in one go
+            node.table, node.index = self.table, self.table.graft(node.table, self.index, key)
+        else:
+            raise ValueError("Node is already part of a tree.")
         return node
     
     def add_more_description_content(self, more_info):
@@ -24,21 +300,190 @@ class Node:
                 return child_node
         raise ValueError(f"No child with key {key} found.")
 
+class UnknownFileTypeException(Exception):
+    """Raised when no registered parser recognizes a file."""
+
+
+class InvalidFileException(Exception):
+    """Raised when a file is not valid for the parser it was given to."""
+
+
+class SignatureTable:
+    """
+    Dispatch from a file's header to the parser that handles it.
+
+    Parsers declare (offset, magic) signatures. They are grouped by offset and
+    length into dicts, so identifying a file takes one read of its header and
+    one dict lookup per distinct signature position, however many parsers are
+    registered. Longer signatures are tried first, as they are more specific.
+    """
+
+    def __init__(self):
+        self.parsers = []
+        self.probes = []  # Parsers without signatures, asked through recognizes
+        self.groups = None  # [((offset, length), {magic: parser})], compiled on first use
+        self.header_size = 0
+
+    def register(self, parser):
+        if parser.SIGNATURES:
+            self.parsers.append(parser)
+        else:
+            self.probes.append(parser)
+        self.groups = None
+
+    def compile(self):
+        groups = {}
+        for parser in self.parsers:
+            for offset, magic in parser.SIGNATURES:
+                group = groups.setdefault((offset, len(magic)), {})
+                if group.get(magic, parser) is not parser:
+                    raise ValueError(f"{parser.__name__} and {group[magic].__name__} share the signature {magic!r} at offset {offset}")
+                group[magic] = parser
+        self.groups = sorted(groups.items(), key=lambda item: (-item[0][1], item[0][0]))
+        self.header_size = max((offset + length for (offset, length), _ in self.groups), default=0)
+
+    def match(self, header):
+        """Return the parser whose signature matches header (the start of a file), or None."""
+        if self.groups is None:
+            self.compile()
+        for (offset, length), magics in self.groups:
+            parser = magics.get(header[offset:offset + length])
+            if parser is not None:
+                return parser
+        return None
+
+    def identify(self, file):
+        """Return the parser class for an open binary file, or None."""
+        if self.groups is None:
+            self.compile()
+        file.seek(0)
+        parser = self.match(file.read(self.header_size))
+        if parser is None:
+            parser = next((probe for probe in self.probes if probe.recognizes(file)), None)
+        file.seek(0)
+        return parser
+
+
 class FileParser(ABC):
+    # (offset, magic bytes) pairs identifying the files a parser handles; subclasses
+    # that declare them are registered in FileParser.registry when they are defined
+    SIGNATURES = ()
+    registry = SignatureTable()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if cls.SIGNATURES or cls.recognizes.__func__ is not FileParser.recognizes.__func__:
+            FileParser.registry.register(cls)
+
     def __init__(self, file):
         self.file = file
+        self.source = map_file(file)
+        # Parsers read through the cursor rather than the file object
+        self.cursor = ByteCursor.from_file(file, self.source)
+        self.keep_tree = True
+
+    def emit(self, parent, key, node, depth=1):
+        """
+        Add node under parent (unless the tree is not kept) and return its parse event.
+
+        Parsers yield the returned (offset, node, depth) tuple from iter_parse.
+        """
+        if self.keep_tree:
+            parent.add_child(key, node)
+        return key, node, depth
+
+    def node_at(self, offset, length, info, name=None, color=None, table_value=None):
+        """
+        Create a node for length bytes of the file at offset.
+
+        The node refers to the mapped file instead of holding a copy of the bytes,
+        which keeps large regions from costing memory.
+        """
+        if self.source is None:
+            return Node(bytes(self.cursor.buffer[offset:offset + length]), info, name=name, color=color, table_value=table_value)
+        return Node.from_source(self.source, offset, length, info, name=name, color=color, table_value=table_value)
+
+    def emit_node(self, parent, offset, length, info, name=None, color=None, table_value=None, depth=1):
+        """
+        Add a child for length bytes at offset (see node_at) and return its parse event.
+        """
+        return self.emit(parent, offset, self.node_at(offset, length, info, name, color, table_value), depth)
+
+    def add_lazy_child(self, parent, length, info, name=None, color=None, table_value=None, depth=1):
+        """
+        Add a child for the next length bytes of the file, move past them and return its parse event.
+        """
+        offset = self.cursor.tell()
+        length = max(0, min(length, self.cursor.remaining()))
+        self.cursor.skip(length)
+        return self.emit_node(parent, offset, length, info, name, color, table_value, depth)
+
+    def emit_fields(self, parent, schema, depth=1, color=None, **context):
+        """
+        Add a child per field of a fixed-layout header at the current position,
+        move past the header and yield their parse events.
+
+        The header is unpacked in one go (see fields.FieldSchema), and the children
+        refer to the mapped file rather than holding copies of their bytes.
+        Returns the unpacked values by field name.
+
+        :param color: A colour for every field, or a callable returning the next colour.
+        :param context: Values for the placeholders in the field names and descriptions.
+        """
+        offset = self.cursor.tell()
+        if self.cursor.remaining() < schema.size:
+            raise EOFError(f"Header at offset {offset} is truncated")
+        values = schema.unpack(self.cursor.buffer, offset)
+        self.cursor.skip(schema.size)
+        yield from self.emit_values(parent, offset, schema, values, depth, color, **context)
+        return dict(zip(schema.names, values))
+
+    def emit_values(self, parent, offset, schema, values, depth=1, color=None, **context):
+        """
+        Like emit_fields, for a header at offset whose values were unpacked from elsewhere,
+        such as a copy of the bytes with corrections applied. The nodes show the file's bytes.
+        """
+        for index, field in enumerate(schema.fields):
+            value = values[index]
+            table_value = schema.table_value(index, value)
+            yield self.emit_node(parent, offset + schema.offsets[index], field.length,
+                                 schema.info(index, value, table_value, context),
+                                 schema.name(index, table_value, context),
+                                 color() if callable(color) else color,
+                                 table_value, depth)
 
-    @abstractmethod
     def parse(self):
+        """
+        Parse the whole file and return the root node.
+        """
+        root = None
+        for _, node, depth in self.iter_parse():
+            if depth == 0:
+                root = node
+        return root
+
+    @abstractmethod
+    def iter_parse(self, keep_tree=True):
+        """
+        Parse the file incrementally, yielding (offset, node, depth) as nodes are produced.
+
+        The root comes first with depth 0. With keep_tree=False nodes are not added
+        to their parents, so memory stays bounded when the consumer does not keep them.
+        """
         pass
 
     @classmethod
-    @abstractmethod
     def recognizes(cls, file):
-        pass
+        """
+        Return True if the file starts with one of the parser's signatures.
+
+        Parsers that cannot be identified by signatures override this instead.
+        """
+        file.seek(0)
+        header = file.read(max((offset + len(magic) for offset, magic in cls.SIGNATURES), default=0))
+        return any(header[offset:offset + len(magic)] == magic for offset, magic in cls.SIGNATURES)
 
     @classmethod
     def validate(cls, file):
         if not cls.recognizes(file):
-            # TODO: create exception
             raise InvalidFileException(f"File {file.name} is not a valid {cls.__name__} file")
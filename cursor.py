@@ -0,0 +1,144 @@
+import struct
+from datetime import datetime, timedelta
+
+_U16BE = struct.Struct('>H').unpack_from
+_U16LE = struct.Struct('<H').unpack_from
+_U32BE = struct.Struct('>I').unpack_from
+_U32LE = struct.Struct('<I').unpack_from
+_U64BE = struct.Struct('>Q').unpack_from
+_U64LE = struct.Struct('<Q').unpack_from
+
+# FILETIME counts 100 nanosecond intervals since 1601-01-01
+FILETIME_EPOCH = datetime(1601, 1, 1)
+MAX_FILETIME = int((datetime.max - FILETIME_EPOCH).total_seconds()) * 10_000_000
+
+
+def filetime_to_datetime(filetime):
+    """
+    Convert a FILETIME integer to a datetime, or None if it is out of range.
+    """
+    if not 0 <= filetime <= MAX_FILETIME:
+        return None
+    return FILETIME_EPOCH + timedelta(microseconds=filetime // 10)
+
+
+class ByteCursor:
+    """
+    A read position over an mmap or another bytes-like buffer.
+
+    Typed reads unpack straight from the buffer, so reading a field costs
+    neither a syscall nor a short-lived bytes object, and the absolute
+    position is a plain attribute instead of a tell() on the file.
+    Typed reads past the end raise EOFError; read() returns what is left.
+    """
+    __slots__ = ('buffer', 'pos', 'size')
+
+    def __init__(self, buffer, pos=0):
+        self.buffer = buffer
+        self.pos = pos
+        self.size = len(buffer)
+
+    @classmethod
+    def from_file(cls, file, source=None):
+        """
+        A cursor over source (usually the file's mmap), or over the file's
+        content when it could not be mapped.
+        """
+        if source is None:
+            file.seek(0)
+            source = file.read()
+        return cls(source)
+
+    def __len__(self):
+        return self.size
+
+    def tell(self):
+        return self.pos
+
+    def seek(self, pos):
+        self.pos = pos
+
+    def skip(self, length):
+        self.pos += length
+
+    def remaining(self):
+        return max(0, self.size - self.pos)
+
+    def read(self, length):
+        """Return the next length bytes (fewer at the end of the buffer) and move past them."""
+        pos = self.pos
+        data = bytes(self.buffer[pos:pos + length])
+        self.pos = pos + len(data)
+        return data
+
+    def view(self, length):
+        """Like read, but return a zero-copy memoryview of the buffer."""
+        pos = self.pos
+        data = memoryview(self.buffer)[pos:pos + length]
+        self.pos = pos + len(data)
+        return data
+
+    def peek(self, length=1):
+        """Return the next length bytes without moving."""
+        return bytes(self.buffer[self.pos:self.pos + length])
+
+    def peek_u8(self):
+        if self.pos >= self.size:
+            raise EOFError(f"No byte at offset {self.pos}")
+        return self.buffer[self.pos]
+
+    def _unpack(self, unpack, length):
+        pos = self.pos
+        try:
+            value, = unpack(self.buffer, pos)
+        except struct.error:
+            raise EOFError(f"Cannot read {length} bytes at offset {pos}") from None
+        self.pos = pos + length
+        return value
+
+    def u8(self):
+        value = self.peek_u8()
+        self.pos += 1
+        return value
+
+    def u16be(self):
+        return self._unpack(_U16BE, 2)
+
+    def u16le(self):
+        return self._unpack(_U16LE, 2)
+
+    def u32be(self):
+        return self._unpack(_U32BE, 4)
+
+    def u32le(self):
+        return self._unpack(_U32LE, 4)
+
+    def u64be(self):
+        return self._unpack(_U64BE, 8)
+
+    def u64le(self):
+        return self._unpack(_U64LE, 8)
+
+    def varint(self):
+        """
+        Read a SQLite variable-length integer: up to nine bytes, big-endian,
+        seven bits from each byte with the high bit set and all eight of the ninth.
+        """
+        buffer, pos = self.buffer, self.pos
+        value = 0
+        try:
+            for index in range(8):
+                byte = buffer[pos + index]
+                value = (value << 7) | (byte & 0x7F)
+                if byte < 0x80:
+                    self.pos = pos + index + 1
+                    return value
+            value = (value << 8) | buffer[pos + 8]
+        except IndexError:
+            raise EOFError(f"Truncated varint at offset {pos}") from None
+        self.pos = pos + 9
+        return value
+
+    def filetime(self):
+        """Read a FILETIME; returns the datetime, or None if it is out of range."""
+        return filetime_to_datetime(self.u64le())
@@ -0,0 +1,79 @@
+import struct
+from collections import namedtuple
+
+# A header field: its length in bytes, description and name, an optional converter from the
+# unpacked value to the table value and an optional struct code overriding the default one
+Field = namedtuple('Field', 'length description name convert fmt', defaults=(None, None))
+
+# Struct codes for the integer widths; fields of any other length are kept as raw bytes
+INTEGER_FORMATS = {1: 'B', 2: 'H', 4: 'I', 8: 'Q'}
+
+
+class FieldSchema:
+    """
+    A fixed-layout header, declared as (length, description, name[, convert[, fmt]]) fields.
+
+    The layout is compiled into one struct.Struct, so a header is read with a
+    single read and decoded with a single unpack instead of a read and an
+    int.from_bytes per field.
+
+    Names and descriptions may be templates: "{value}" is the field's table
+    value, "{raw}" its unpacked value and any other placeholder comes from the
+    context given when the fields are emitted. A description may also be a
+    callable of the unpacked value. Descriptions are only formatted when a
+    node's info is first shown.
+    """
+
+    def __init__(self, fields, byteorder='<'):
+        """
+        Compile the layout.
+
+        :param fields: Tuples of (length, description, name[, convert[, fmt]]).
+        :param byteorder: '<' for little-endian or '>' for big-endian integers.
+        """
+        self.fields = [Field(*field) for field in fields]
+        self.offsets = []
+        formats = []
+        offset = 0
+        for field in self.fields:
+            self.offsets.append(offset)
+            formats.append(field.fmt or INTEGER_FORMATS.get(field.length, f"{field.length}s"))
+            offset += field.length
+        self.struct = struct.Struct(byteorder + ''.join(formats))
+        if self.struct.size != offset:
+            raise ValueError("Field formats do not add up to the field lengths")
+        self.size = offset
+        self.names = [field.name for field in self.fields]
+
+    def __len__(self):
+        return len(self.fields)
+
+    def unpack(self, buffer, offset=0):
+        """Return the unpacked value of every field of the header at buffer[offset:]."""
+        return self.struct.unpack_from(buffer, offset)
+
+    def values(self, buffer, offset=0):
+        """Return the unpacked values of the header at buffer[offset:] by field name."""
+        return dict(zip(self.names, self.unpack(buffer, offset)))
+
+    def table_value(self, index, value):
+        """The value shown in the table for a field; raw bytes are not shown unless converted."""
+        convert = self.fields[index].convert
+        if convert is not None:
+            return convert(value)
+        return None if isinstance(value, bytes) else value
+
+    def name(self, index, table_value, context):
+        name = self.fields[index].name
+        if name is None or '{' not in name:
+            return name
+        return name.format(value=table_value, **context)
+
+    def info(self, index, value, table_value, context):
+        """The description of a field: a string, or a callable formatting it on first use."""
+        description = self.fields[index].description
+        if callable(description):
+            return lambda: description(value)
+        if '{' not in description:
+            return description
+        return lambda: description.format(value=table_value, raw=value, **context)
@@ -4,6 +4,11 @@ import threading
 import time
 import csv
 import hashlib
+import mmap
+import queue
+from array import array
+from bisect import bisect_left
+from collections import deque
 
 # Third-Party Libraries
 from tkinter import Tk, Text, N, S, E, W
@@ -11,17 +16,132 @@ from tkinter import filedialog, Button, Scrollbar, Label
 from tkinter import SEL, SEL_LAST, SEL_FIRST, END
 from tkinter import TclError, Entry, Listbox, ttk
 from tkinter import StringVar, DoubleVar, NO, Toplevel, BOTH
+from tkinter import font as tkfont
+from tkinter import messagebox
 from tkhtmlview import HTMLText
 
 # Application-specific
 from main import get_file_parser
+from intervals import IntervalIndex
+from search import SearchIndex, BYTE_SEARCH_MODES, byte_pattern, iter_byte_hits
+
+
+BYTES_PER_ROW = 16
+# Rows rendered above and below the visible window so small scrolls only move the view
+OVERSCAN_ROWS = 8
+# Nodes shown between progress and hex view refreshes while parsing
+PROGRESS_INTERVAL = 500
+# Render commands handed from the parser thread to the main loop per batch
+RENDER_BATCH_SIZE = 200
+# Batches allowed to wait before the parser thread has to wait for the GUI
+RENDER_QUEUE_BATCHES = 50
+# How often the main loop drains render commands, and how long it may spend per tick
+FRAME_INTERVAL_MS = 16
+FRAME_BUDGET = 0.012
+# Byte search hits listed before the search stops by itself
+MAX_BYTE_HITS = 100000
+# Rows listed by a rowid range lookup
+MAX_ROW_HITS = 10000
+# Printable ASCII maps to itself, everything else to '.'
+ASCII_TABLE = bytes(byte if 32 <= byte < 127 else ord('.') for byte in range(256))
+
+
+def open_source(filename):
+    """
+    Map a file read-only so the views can slice it without loading it into memory.
+
+    :param filename: The path to the file to map.
+    :return: An mmap of the file, or empty bytes for an empty file.
+    """
+    with open(filename, "rb") as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return b''
+        return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class RenderQueue:
+    """
+    A bounded hand-off of render commands from a worker thread to the Tk main loop.
+
+    Tk widgets may only be touched from the main loop. The worker pushes
+    (command, args) pairs, which are handed over in batches through a bounded
+    queue; when the GUI falls behind, the worker waits for room (backpressure).
+    The main loop runs queued commands on an after() tick, within a per-frame
+    time budget so the window stays responsive while a parse is running.
+    """
+
+    def __init__(self, master, cancelled=None):
+        """
+        Start draining the queue on the main loop.
+
+        :param master: The Tk widget whose main loop runs the commands.
+        :param cancelled: Optional callable; while it returns True the worker stops waiting for room.
+        """
+        self.master = master
+        self.cancelled = cancelled
+        self.batches = queue.Queue(maxsize=RENDER_QUEUE_BATCHES)
+        self.pending = []  # Worker side: the batch being filled
+        self.current = deque()  # Main loop side: the batch being run
+        self.master.after(FRAME_INTERVAL_MS, self.drain)
+
+    def push(self, command, *args):
+        """
+        Queue command(*args) to run on the main loop. Called from the worker thread.
+        """
+        self.pending.append((command, args))
+        if len(self.pending) >= RENDER_BATCH_SIZE:
+            self.flush()
 
+    def flush(self, force=False):
+        """
+        Hand the pending commands to the main loop, waiting while the queue is full.
 
+        :param force: Keep waiting even when cancelled, for commands that must run.
+        :return: False if the batch was dropped because the work was cancelled.
+        """
+        batch, self.pending = self.pending, []
+        while batch:
+            try:
+                self.batches.put(batch, timeout=0.1)
+                break
+            except queue.Full:
+                if not force and self.cancelled is not None and self.cancelled():
+                    return False
+        return True
+
+    def clear(self):
+        """
+        Drop every command that has not run yet. Called from the main loop.
+        """
+        self.current.clear()
+        while True:
+            try:
+                self.batches.get_nowait()
+            except queue.Empty:
+                break
+
+    def drain(self):
+        """
+        Run queued commands until the queue is empty or the frame budget is spent.
+        """
+        self.master.after(FRAME_INTERVAL_MS, self.drain)
+        deadline = time.perf_counter() + FRAME_BUDGET
+        while time.perf_counter() < deadline:
+            if not self.current:
+                try:
+                    self.current.extend(self.batches.get_nowait())
+                except queue.Empty:
+                    break
+            command, args = self.current.popleft()
+            command(*args)
 
 
 class TextWidget:
     """
     A class to create and manage text widgets for displaying hex and ASCII data.
+
+    The widgets are virtualized: only the rows currently on screen (plus a small
+    overscan) are formatted and inserted, straight from the mapped file.
     """
 
     def __init__(self, master):
@@ -43,8 +163,16 @@ class TextWidget:
         self.asciiText = Text(master, exportselection=False, width=16, height=43, font=(
             'Courier 10 bold'), padx=5, bg='black', fg='green', relief='flat', bd=2)
 
-        self.textWidget.configure(yscrollcommand=self.scrollbar.set)
-        self.asciiText.configure(yscrollcommand=self.scrollbar.set)
+        # The scrollbar follows the file position, not the rendered text, so the
+        # text widgets do not report their own yview to it.
+        self.source = b''
+        self.total_rows = 0
+        self.top_row = 0
+        self.visible_rows = int(self.textWidget.cget('height'))
+        self.rendered_rows = (0, 0)
+        self.intervals = IntervalIndex()  # Byte range -> node, filled while parsing
+        self.color_tags = set()
+        self.line_height = tkfont.Font(font=self.textWidget.cget('font')).metrics('linespace')
 
         self.textWidget.grid(row=1, column=0, pady=15,
                              padx=(20, 0), sticky=W+E+N+S)
@@ -60,6 +188,158 @@ class TextWidget:
         # Link the scrollbars
         self.textWidget.bind("<MouseWheel>", self.scrollBoth)
         self.asciiText.bind("<MouseWheel>", self.scrollBoth)
+        self.textWidget.bind("<Configure>", self.resize)
+
+    def load(self, source):
+        """
+        Show a new file in the hex and ASCII views, starting at the top.
+
+        :param source: An mmap or bytes-like object holding the file content.
+        """
+        self.source = source
+        self.total_rows = -(-len(source) // BYTES_PER_ROW)
+        self.intervals = IntervalIndex()
+        self.render(0)
+
+    def color_tag(self, color):
+        """
+        Return the text tag for a background colour, creating it on first use.
+
+        Tags are pooled by colour so the widgets only ever hold one tag per colour.
+
+        :param color: The background colour, e.g. "#33aa55".
+        """
+        tag = "c" + color.lstrip('#')
+        if tag not in self.color_tags:
+            self.textWidget.tag_configure(tag, background=color)
+            self.asciiText.tag_configure(tag, background=color)
+            self.color_tags.add(tag)
+        return tag
+
+    def resize(self, event):
+        """
+        Recompute how many rows fit on screen when the hex view changes size.
+
+        :param event: Event object containing the new widget size.
+        """
+        visible_rows = max(1, event.height // self.line_height)
+        if visible_rows != self.visible_rows:
+            self.visible_rows = visible_rows
+            self.render()
+
+    def render(self, top_row=None):
+        """
+        Format the rows around top_row into both text widgets.
+
+        :param top_row: The file row to show at the top, or None to keep the current one.
+        """
+        if top_row is not None:
+            self.top_row = max(0, min(top_row, self.total_rows - self.visible_rows))
+        start_row = max(0, self.top_row - OVERSCAN_ROWS)
+        end_row = min(self.total_rows, self.top_row + self.visible_rows + OVERSCAN_ROWS)
+        start, end = start_row * BYTES_PER_ROW, end_row * BYTES_PER_ROW
+        chunk = bytes(self.source[start:end])
+
+        hex_lines = []
+        ascii_lines = []
+        for pos in range(0, len(chunk), BYTES_PER_ROW):
+            row = chunk[pos:pos + BYTES_PER_ROW]
+            hex_lines.append(row.hex(' ') + ' ')
+            ascii_lines.append(row.translate(ASCII_TABLE).decode('ascii'))
+
+        for widget, lines in ((self.textWidget, hex_lines), (self.asciiText, ascii_lines)):
+            widget.configure(state='normal')
+            widget.delete('1.0', 'end')
+            widget.insert('1.0', '\n'.join(lines))
+        self.rendered_rows = (start_row, end_row)
+        self.apply_spans(start, end)
+        for widget in (self.textWidget, self.asciiText):
+            widget.configure(state='disabled')
+        self.align()
+
+    def apply_spans(self, start, end):
+        """
+        Colour the rendered window with the nodes that overlap it, nested nodes on top.
+
+        :param start: The first rendered byte offset.
+        :param end: The byte offset just past the rendered window.
+        """
+        colors = [None] * (end - start)
+        for span_start, span_end, node in self.intervals.overlapping(start, end):
+            low, high = max(span_start, start) - start, min(span_end, end) - start
+            colors[low:high] = [node.color] * (high - low)
+
+        # One tag_add per run of equally coloured bytes
+        pos = 0
+        while pos < len(colors):
+            color = colors[pos]
+            run_end = pos + 1
+            while run_end < len(colors) and colors[run_end] == color:
+                run_end += 1
+            if color:
+                tag = self.color_tag(color)
+                self.textWidget.tag_add(tag, self.hex_index(start + pos), self.hex_index(start + run_end - 1, 3))
+                self.asciiText.tag_add(tag, self.ascii_index(start + pos), self.ascii_index(start + run_end - 1, 1))
+            pos = run_end
+
+    def hex_index(self, offset, extra=0):
+        """Text index of a byte in the rendered hex view (every byte is 3 characters, e.g. "FF ")."""
+        return f"{offset // BYTES_PER_ROW - self.rendered_rows[0] + 1}.{(offset % BYTES_PER_ROW) * 3 + extra}"
+
+    def ascii_index(self, offset, extra=0):
+        """Text index of a byte in the rendered ASCII view."""
+        return f"{offset // BYTES_PER_ROW - self.rendered_rows[0] + 1}.{offset % BYTES_PER_ROW + extra}"
+
+    def offset_at(self, widget, x, y):
+        """
+        Map a pixel position in one of the text widgets to a file offset.
+
+        :param widget: The hex or ASCII text widget.
+        :param x: The x coordinate within the widget.
+        :param y: The y coordinate within the widget.
+        :return: The byte offset in the file.
+        """
+        row, col = map(int, widget.index(f"@{x},{y}").split('.'))
+        if widget == self.textWidget:
+            col //= 3
+        return (self.rendered_rows[0] + row - 1) * BYTES_PER_ROW + col
+
+    def align(self):
+        """
+        Scroll the rendered text so top_row is the first line and update the scrollbar.
+        """
+        line = self.top_row - self.rendered_rows[0] + 1
+        self.textWidget.yview(f"{line}.0")
+        self.asciiText.yview(f"{line}.0")
+        if self.total_rows:
+            self.scrollbar.set(self.top_row / self.total_rows,
+                               min(1.0, (self.top_row + self.visible_rows) / self.total_rows))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def scroll_to_row(self, top_row):
+        """
+        Show top_row at the top, re-rendering only when it leaves the overscan window.
+
+        :param top_row: The file row to show at the top.
+        """
+        top_row = max(0, min(top_row, self.total_rows - self.visible_rows))
+        start_row, end_row = self.rendered_rows
+        if start_row <= top_row and top_row + self.visible_rows <= end_row:
+            self.top_row = top_row
+            self.align()
+        else:
+            self.render(top_row)
+
+    def see_offset(self, offset):
+        """
+        Scroll both views so the byte at offset is on screen.
+
+        :param offset: The byte offset in the file.
+        """
+        row = offset // BYTES_PER_ROW
+        if not self.top_row <= row < self.top_row + self.visible_rows:
+            self.scroll_to_row(row - self.visible_rows // 3)
 
     def yscroll(self, *args):
         """
@@ -67,8 +347,13 @@ class TextWidget:
 
         :param args: Scrolling arguments passed by the scrollbar.
         """
-        self.textWidget.yview(*args)
-        self.asciiText.yview(*args)
+        if args[0] == "moveto":
+            self.scroll_to_row(int(float(args[1]) * self.total_rows))
+        elif args[0] == "scroll":
+            amount = int(args[1])
+            if args[2] == "pages":
+                amount *= self.visible_rows
+            self.scroll_to_row(self.top_row + amount)
 
     def scrollBoth(self, event):
         """
@@ -78,8 +363,7 @@ class TextWidget:
         """
         adjusted_delta = int(-(event.delta / 10))
 
-        self.textWidget.yview("scroll", adjusted_delta, "units")
-        self.asciiText.yview("scroll", adjusted_delta, "units")
+        self.scroll_to_row(self.top_row + adjusted_delta)
         return "break"
 
     def update_popup_text(self, text, tag):
@@ -92,6 +376,327 @@ class TextWidget:
         self.popupText.delete("1.0", "end")
         self.popupText.set_html(text)
 
+class SequenceView:
+    """
+    A virtual list of the parsed nodes for the sequence Treeview.
+
+    The Treeview only ever holds one item per visible line. The rows live in a
+    backing store of offsets and nodes, and scrolling, sorting and filtering
+    only change which rows are copied into those items, so a redraw costs the
+    same for a hundred nodes as for a million.
+    """
+
+    COLUMNS = ('Offset', 'Name', 'Value')
+
+    def __init__(self, master, height, on_select=None):
+        """
+        Create the Treeview and its scrollbar.
+
+        :param master: The parent widget for this view.
+        :param height: The initial number of visible rows.
+        :param on_select: Optional callable(offset, node) run when the user selects a row.
+        """
+        self.on_select = on_select
+        self.row_height = tkfont.nametofont('TkDefaultFont').metrics('linespace') + 4
+        ttk.Style(master).configure('Treeview', rowheight=self.row_height)
+        self.treeview = ttk.Treeview(master, columns=self.COLUMNS, height=height, selectmode='browse')
+        self.scrollbar = Scrollbar(master, orient="vertical", command=self.yview)
+        self.treeview.configure(yscrollcommand=lambda first, last: None)  # Scrolling is ours
+        self.treeview.tag_configure('selected', background='#3874d8', foreground='white')
+
+        self.offsets = array('q')
+        self.nodes = []
+        self.filtered = None  # Row ids passing the filter in row order, or None for all
+        self.order = None  # Row ids in display order, or None for all rows in row order
+        self.positions = None  # Index in order of each row id (-1 if filtered out) while sorted
+        self.offset_rows = {}  # Offset -> first row id at it
+        self.shared_offsets = {}  # Offset -> the other row ids at it, for offsets several rows share
+        self.sort_column = None
+        self.sort_reverse = False
+        self.unsorted = False  # Rows were appended to a sorted order without sorting
+        self.top = 0
+        self.visible_rows = height
+        self.shown_rows = []  # Row id per Treeview item
+        self.selected_row = None
+        self.color_tags = set()
+        self.render_pending = False
+
+        for column in self.COLUMNS:
+            self.treeview.heading(column, text=column, command=lambda column=column: self.sort_by(column))
+        self.treeview.bind("<<TreeviewSelect>>", self.item_selected)
+        self.treeview.bind("<MouseWheel>", lambda e: self.scroll(-3 if e.delta > 0 else 3))
+        self.treeview.bind("<Button-4>", lambda e: self.scroll(-3))
+        self.treeview.bind("<Button-5>", lambda e: self.scroll(3))
+        self.treeview.bind("<Up>", lambda e: self.move_selection(-1))
+        self.treeview.bind("<Down>", lambda e: self.move_selection(1))
+        self.treeview.bind("<Configure>", self.resize)
+
+    def __len__(self):
+        return len(self.order) if self.order is not None else len(self.offsets)
+
+    def clear(self):
+        """
+        Drop every row, keeping the sort column and whether a filter is active.
+        """
+        self.offsets = array('q')
+        self.nodes = []
+        self.offset_rows = {}
+        self.shared_offsets = {}
+        self.filtered = None if self.filtered is None else array('I')
+        self.order = self.filtered if self.sort_column is None else []
+        self.positions = None if self.sort_column is None else array('q')
+        self.unsorted = False
+        self.top = 0
+        self.selected_row = None
+        self.render()
+
+    def append(self, offset, node, visible=True):
+        """
+        Add a row for node and return its row id.
+
+        :param offset: The absolute file offset of the node.
+        :param node: The node to show.
+        :param visible: False if the row does not pass the current filter.
+        """
+        row = len(self.offsets)
+        self.offsets.append(offset)
+        self.nodes.append(node)
+        first = self.offset_rows.setdefault(offset, row)
+        if first != row:
+            self.shared_offsets.setdefault(offset, []).append(row)
+        if self.positions is not None:
+            self.positions.append(-1)
+        if not visible:
+            return row
+        if self.filtered is not None:
+            self.filtered.append(row)
+        if self.sort_column is not None:
+            # Keeping the order sorted per row would be quadratic while parsing,
+            # so the row waits at the end until resort()
+            self.positions[row] = len(self.order)
+            self.order.append(row)
+            self.unsorted = True
+        # New rows are always last in the order, which is first when reversed
+        position = 0 if self.sort_reverse and self.sort_column is not None else len(self) - 1
+        if self.top <= position < self.top + self.visible_rows:
+            self.schedule_render()
+        return row
+
+    def set_filter(self, rows):
+        """
+        Show only the given rows.
+
+        :param rows: Row ids in row order, or None to show every row.
+        """
+        self.filtered = None if rows is None else array('I', rows)
+        self.resort()
+
+    def sort_key(self):
+        if self.sort_column == 'Offset':
+            return self.offsets.__getitem__
+        if self.sort_column == 'Name':
+            return lambda row: self.nodes[row].name or ''
+        return lambda row: str(self.nodes[row].table_value or '')
+
+    def sort_by(self, column):
+        """
+        Sort by column, or reverse the order if already sorted by it.
+
+        :param column: One of COLUMNS.
+        """
+        if self.sort_column == column:
+            self.sort_reverse = not self.sort_reverse
+        else:
+            self.sort_column, self.sort_reverse = column, False
+        for name in self.COLUMNS:
+            arrow = (' \u25bc' if self.sort_reverse else ' \u25b2') if name == column else ''
+            self.treeview.heading(name, text=name + arrow)
+        self.resort()
+
+    def resort(self):
+        """
+        Rebuild the display order from the filter and sort column.
+        """
+        if self.sort_column is None:
+            self.order = self.filtered
+            self.positions = None
+        else:
+            rows = self.filtered if self.filtered is not None else range(len(self.offsets))
+            # Sorted ascending; a reversed sort reads the order backwards
+            self.order = sorted(rows, key=self.sort_key())
+            self.positions = array('q', [-1]) * len(self.offsets)
+            for position, row in enumerate(self.order):
+                self.positions[row] = position
+        self.unsorted = False
+        self.render()
+
+    def row_at(self, position):
+        """Row id shown at a display position."""
+        if self.sort_reverse and self.sort_column is not None:
+            position = len(self) - 1 - position
+        return self.order[position] if self.order is not None else position
+
+    def position(self, row):
+        """
+        Display position of a row id, or -1 if it is filtered out.
+        """
+        if self.order is None:
+            position = row
+        elif self.sort_column is None:
+            # The filtered rows are in row order
+            position = bisect_left(self.order, row)
+            if position == len(self.order) or self.order[position] != row:
+                return -1
+        else:
+            position = self.positions[row]
+            if position < 0:
+                return -1
+        if self.sort_reverse and self.sort_column is not None:
+            position = len(self) - 1 - position
+        return position
+
+    def rows(self):
+        """
+        Yield (offset, name, value) for every row in display order.
+        """
+        for position in range(len(self)):
+            row = self.row_at(position)
+            node = self.nodes[row]
+            yield self.offsets[row], node.name, node.table_value or ''
+
+    def schedule_render(self):
+        if not self.render_pending:
+            self.render_pending = True
+            self.treeview.after_idle(self.render)
+
+    def render(self):
+        """
+        Copy the rows in the visible window into the Treeview items.
+        """
+        self.render_pending = False
+        count = len(self)
+        self.top = max(0, min(self.top, count - self.visible_rows))
+        self.shown_rows = [self.row_at(position)
+                           for position in range(self.top, min(count, self.top + self.visible_rows))]
+
+        items = self.treeview.get_children()
+        for slot in range(len(items), len(self.shown_rows)):
+            self.treeview.insert('', 'end', iid=str(slot))
+        if len(items) > len(self.shown_rows):
+            self.treeview.delete(*items[len(self.shown_rows):])
+        for slot, row in enumerate(self.shown_rows):
+            node = self.nodes[row]
+            tag = 'selected' if row == self.selected_row else self.color_tag(node.color)
+            self.treeview.item(str(slot), values=(self.offsets[row], node.name, node.table_value or ''), tags=(tag,))
+
+        if count:
+            self.scrollbar.set(self.top / count, min(1, (self.top + len(self.shown_rows)) / count))
+        else:
+            self.scrollbar.set(0, 1)
+
+    def color_tag(self, color):
+        """
+        Return the item tag for a background colour, creating it on first use.
+
+        :param color: The background colour, e.g. "#33aa55".
+        """
+        tag = "c" + color.lstrip('#')
+        if tag not in self.color_tags:
+            self.treeview.tag_configure(tag, background=color)
+            self.color_tags.add(tag)
+        return tag
+
+    def resize(self, event):
+        """
+        Recompute how many rows fit when the Treeview changes size.
+
+        :param event: Event object containing the new widget size.
+        """
+        # One row height is taken by the headings
+        visible_rows = max(1, event.height // self.row_height - 1)
+        if visible_rows != self.visible_rows:
+            self.visible_rows = visible_rows
+            self.render()
+
+    def scroll(self, rows):
+        self.top += rows
+        self.render()
+        return "break"
+
+    def yview(self, *args):
+        """
+        Scroll the view from the scrollbar ("moveto" fraction or "scroll" count units/pages).
+        """
+        if args[0] == 'moveto':
+            self.top = int(float(args[1]) * len(self))
+        elif args[0] == 'scroll':
+            step = self.visible_rows if args[2] == 'pages' else 1
+            self.top += int(args[1]) * step
+        self.render()
+
+    def select(self, row):
+        """
+        Select a row and scroll it into view.
+
+        :param row: The row id, or None to clear the selection.
+        """
+        self.selected_row = row
+        position = self.position(row) if row is not None else -1
+        if position >= 0 and not self.top <= position < self.top + self.visible_rows:
+            self.top = position - self.visible_rows // 3
+        self.render()
+
+    def selected(self):
+        """
+        Return (offset, node) of the selected row, or None.
+        """
+        if self.selected_row is None:
+            return None
+        return self.offsets[self.selected_row], self.nodes[self.selected_row]
+
+    def item_selected(self, event):
+        """
+        Turn a click on a Treeview item into a selected row.
+
+        The Treeview selection itself is cleared right away, since its items are
+        reused for other rows when the view scrolls.
+        """
+        items = self.treeview.selection()
+        if not items:
+            return
+        self.treeview.selection_remove(*items)
+        slot = int(items[0])
+        if slot < len(self.shown_rows):
+            self.select(self.shown_rows[slot])
+            if self.on_select is not None:
+                self.on_select(*self.selected())
+
+    def move_selection(self, step):
+        position = self.position(self.selected_row) if self.selected_row is not None else -1
+        position = max(0, min(len(self) - 1, position + step if position >= 0 else self.top))
+        if len(self):
+            self.select(self.row_at(position))
+            if self.on_select is not None:
+                self.on_select(*self.selected())
+        return "break"
+
+    def jump_to_offset(self, offset, node=None):
+        """
+        Select the first row at offset, or the row of node when several share it.
+
+        :param offset: The absolute file offset to jump to.
+        :param node: Optional node to prefer among the rows at offset.
+        :return: True if a row was found.
+        """
+        found = self.offset_rows.get(offset)
+        if found is None:
+            return False
+        if node is not None and self.nodes[found] is not node:
+            found = next((row for row in self.shared_offsets.get(offset, ()) if self.nodes[row] is node), found)
+        self.select(found)
+        return True
+
+
 class Main:
     """
     The main class of the application, containing the logic for the GUI layout, file parsing, and other functionalities.
@@ -104,8 +709,16 @@ class Main:
         :param master: The parent widget for this application.
         """
         self.master = master
+        self.source = b''
+        self.processed_nodes = 0
         self.bookmark_treeview = None
         self.bookmark_window = None
+        self.current_file = None
+        self.byte_search_window = None
+        self.byte_search_cancel = threading.Event()
+        self.byte_hits = []  # (start, end) for every line of the byte search results
+        self.row_search_window = None
+        self.row_hits = []  # RowMatch for every line of the row lookup results
 
         # Stop parsing button
         self.stop_parsing = False
@@ -135,6 +748,14 @@ class Main:
         master.grid_columnconfigure(7, weight=0)
 
         self.text_widget = TextWidget(master)
+        self.render_queue = RenderQueue(master, cancelled=lambda: self.stop_parsing)
+        # Byte searches run next to a parse, so their hits get a queue of their own
+        self.byte_hits_queue = RenderQueue(master, cancelled=lambda: self.byte_search_cancel.is_set())
+
+        # Mark text mirror, and one click handler per widget that looks the node up by offset
+        for widget in (self.text_widget.textWidget, self.text_widget.asciiText):
+            widget.bind("<ButtonRelease-1>", lambda e: self.mirror_highlight(e.widget))
+            widget.bind("<Button-1>", self.handle_click)
 
         # Open file button
         self.open_button = Button(
@@ -167,19 +788,25 @@ class Main:
         self.file_info_button = Button(master, text="File Info", command=self.show_file_info)
         self.file_info_button.grid(row=5, column=6, padx=10, pady=10, sticky=W+E)
 
+        # Find bytes button
+        self.find_bytes_button = Button(master, text="Find Bytes", command=self.show_byte_search)
+        self.find_bytes_button.grid(row=5, column=5, padx=10, pady=10, sticky=W+E)
+
+        # Find row button
+        self.find_row_button = Button(master, text="Find Row", command=self.show_row_search)
+        self.find_row_button.grid(row=6, column=5, padx=10, pady=10, sticky=W+E)
+
         # Start in fullscreen mode
         self.master.attributes("-fullscreen", True)
 
         # Allow toggling fullscreen mode with F11
         self.master.bind("<F11>", self.toggle_fullscreen)
 
-        self.sequence_treeview = ttk.Treeview(
-            self.master, columns=('Offset', 'Name', "Value"), height=43)
+        # Virtual list: the Treeview only holds the visible rows
+        self.sequence_view = SequenceView(self.master, height=43, on_select=self.listbox_item_selected)
+        self.sequence_treeview = self.sequence_view.treeview
         # Heading for the first implicit column
         self.sequence_treeview.heading('#0', text='')
-        self.sequence_treeview.heading('Offset', text='Offset')
-        self.sequence_treeview.heading('Name', text='Name')
-        self.sequence_treeview.heading('Value', text='Value')
 
         # Hide the first implicit column
         self.sequence_treeview.column('#0', stretch=NO, width=0)
@@ -207,11 +834,12 @@ class Main:
             master, text="Clear", command=self.clear_search)
         self.clear_button.grid(row=0, column=5, padx=10, pady=10, sticky=W+E)
 
-        # Store original sequence items
-        self.sequence_items = []
+        # Index of the sequence rows, whose ids are also the treeview item ids
+        self.search_index = SearchIndex()
+        self.search_term = ''
 
         # Bind the search entry to update the list on every key press
-        # self.search_entry.bind("<KeyRelease>", self.search_sequence)
+        self.search_entry.bind("<KeyRelease>", self.search_sequence)
 
         # Progress bar
         self.progress_var = DoubleVar()  # Variable to track progress bar value
@@ -226,11 +854,8 @@ class Main:
             row=5, column=0, columnspan=5, sticky=W+E+S, pady=(0, 0))
 
         # Vertical Scrollbar
-        self.sequence_vscrollbar = Scrollbar(self.master, orient="vertical")
+        self.sequence_vscrollbar = self.sequence_view.scrollbar
         self.sequence_vscrollbar.grid(row=1, column=7, sticky=E+N+S)
-        self.sequence_treeview.configure(
-            yscrollcommand=self.sequence_vscrollbar.set)
-        self.sequence_vscrollbar.config(command=self.sequence_treeview.yview)
 
         # Horizontal Scrollbar
         self.sequence_hscrollbar = Scrollbar(self.master, orient="horizontal")
@@ -241,6 +866,13 @@ class Main:
         self.sequence_hscrollbar.config(command=self.sequence_treeview.xview)
 
     def export_to_csv(self):
+        """
+        Write the rows of the sequence view to a CSV file, in the order and with the
+        filter they are shown with.
+        """
+        if self.current_file is None:
+            self.update_status("Open a file first.")
+            return
         # Ask the user where to save the CSV file
         filename = filedialog.asksaveasfilename(defaultextension=".csv", 
                                                 filetypes=[("CSV files", "*.csv")])
@@ -249,10 +881,8 @@ class Main:
                 csvwriter = csv.writer(csvfile)
                 # Write the headers
                 csvwriter.writerow(["Offset", "Name", "Value"])
-                # Iterate through the Treeview items and write them to the CSV
-                for item in self.sequence_treeview.get_children():
-                    item_data = self.sequence_treeview.item(item)
-                    csvwriter.writerow([item_data['values'][0], item_data['values'][1], item_data['values'][2], item_data.get('value', '')])
+                # The view already holds every parsed row, so nothing is parsed again
+                csvwriter.writerows(self.sequence_view.rows())
 
     def exit_app(self):
         """
@@ -261,25 +891,22 @@ class Main:
         self.master.quit()
         self.master.destroy()
 
-    def search_sequence(self):
+    def search_sequence(self, event=None):
         """
-        Search the sequence items based on the search term entered by the user.
+        Filter the sequence rows on the search term entered by the user, matching
+        both the Name and Value columns.
+
+        :param event: The key event when called while typing.
         """
         search_term = self.search_var.get().strip().lower()
-        matching_items = [item for item in self.sequence_items if item[0][1] and search_term in item[0][1].lower()]
-        self.sequence_treeview.delete(*self.sequence_treeview.get_children())
-        for values, tags in matching_items:
-            item_id = self.sequence_treeview.insert('', 'end', values=values, tags=tags)
-            if values and len(values) >= 3:  # Assuming table_value is the 3rd value in the tuple
-                self.sequence_treeview.item(item_id, values=(values[0], values[1], values[2]))
+        if search_term == self.search_term:
+            return
+        self.search_term = search_term
+        self.sequence_view.set_filter(self.search_index.search(search_term) if search_term else None)
 
     def clear_search(self):
         self.search_var.set('')
-        self.sequence_treeview.delete(*self.sequence_treeview.get_children())
-        for values, tags in self.sequence_items:
-            item_id = self.sequence_treeview.insert('', 'end', values=values, tags=tags)
-            if values and len(values) >= 3:  # Assuming table_value is the 3rd value in the tuple
-                self.sequence_treeview.item(item_id, values=(values[0], values[1], values[2]))
+        self.search_sequence()
 
     def get_complementary_color(hex_color):
         # TODO: add posibility to change text color to this to avoid "hiding" text in same color
@@ -308,29 +935,18 @@ class Main:
         Stop the file parsing process and update the buttons' states accordingly.
         """
         self.stop_parsing = True
-        self.open_button.config(state="normal")
+        self.render_queue.clear()
         self.stop_button.config(state="disabled")
 
-    def listbox_item_selected(self, event):
+    def listbox_item_selected(self, offset, node):
         """
-        Handle the selection event in the sequence treeview, scrolling to the corresponding position.
+        Handle the selection of a row in the sequence view, scrolling to the corresponding position.
 
-        :param event: Event object containing information about the selection event.
+        :param offset: The absolute file offset of the selected node.
+        :param node: The selected node.
         """
-        # Get selected index
-        selected = self.sequence_treeview.selection()
-        if selected:
-            item = self.sequence_treeview.item(selected)
-            offset = int(item['values'][0])
-
-            # Calculate the corresponding row and column in the Text widget
-            row = offset // 16 + 1  # Adding 1 because Text widget indices start from 1
-            # Every byte in hex view is 3 characters (e.g., "FF ")
-            col_hex = (offset % 16) * 3
-            col_ascii = offset % 16
-            # Scroll both views to the selected position
-            self.text_widget.textWidget.see(f"{row}.{col_hex}")
-            self.text_widget.asciiText.see(f"{row}.{col_ascii}")
+        # Scroll both views to the selected position
+        self.text_widget.see_offset(offset)
 
     def show_bookmarks(self):
         """
@@ -362,30 +978,23 @@ class Main:
             item = self.bookmark_treeview.item(selected)
             offset = int(item['values'][1])
 
-            # Calculate the corresponding row and column in the Text widget
-            row = offset // 16 + 1  # Adding 1 because Text widget indices start from 1
-            # Every byte in hex view is 3 characters (e.g., "FF ")
-            col_hex = (offset % 16) * 3
-            col_ascii = offset % 16
             # Scroll both views to the selected position
-            self.text_widget.textWidget.see(f"{row}.{col_hex}")
-            self.text_widget.asciiText.see(f"{row}.{col_ascii}")
+            self.text_widget.see_offset(offset)
 
     def add_bookmark(self):
         """
         Add a bookmark for the selected item in the sequence treeview.
         """
         if self.bookmark_treeview is not None:
-            selected = self.sequence_treeview.selection()
+            selected = self.sequence_view.selected()
             if selected:
-                item = self.sequence_treeview.item(selected)
-                name, offset, *_ = item['values']
+                offset, node = selected
                 # Add to the bookmarks if it doesn't exist already
                 bookmarks = [self.bookmark_treeview.item(
                     bookmark)['values'] for bookmark in self.bookmark_treeview.get_children()]
-                if (name, offset) not in bookmarks:
+                if [offset, node.name] not in bookmarks:
                     self.bookmark_treeview.insert(
-                        '', 'end', values=(name, offset))
+                        '', 'end', values=(offset, node.name))
 
     def bookmark_item_selected(self, event):
         """
@@ -399,14 +1008,284 @@ class Main:
             item = self.bookmark_treeview.item(selected)
             offset = int(item['values'][0])
 
-            # Calculate the corresponding row and column in the Text widget
-            row = offset // 16 + 1  # Adding 1 because Text widget indices start from 1
-            # Every byte in hex view is 3 characters (e.g., "FF ")
-            col_hex = (offset % 16) * 3
-            col_ascii = offset % 16
             # Scroll both views to the selected position
-            self.text_widget.textWidget.see(f"{row}.{col_hex}")
-            self.text_widget.asciiText.see(f"{row}.{col_ascii}")
+            self.text_widget.see_offset(offset)
+
+    def show_byte_search(self):
+        """
+        Display the window for searching the bytes of the open file.
+        """
+        if self.byte_search_window is not None:
+            self.byte_search_window.deiconify()
+            self.byte_search_window.lift()
+            return
+        self.byte_search_window = Toplevel(self.master)
+        self.byte_search_window.title("Find Bytes")
+        # Closing only hides the window, so a running search keeps its results
+        self.byte_search_window.protocol("WM_DELETE_WINDOW", self.hide_byte_search)
+
+        self.byte_search_var = StringVar()
+        self.byte_search_entry = Entry(self.byte_search_window, textvariable=self.byte_search_var, width=40)
+        self.byte_search_entry.grid(row=0, column=0, padx=10, pady=10, sticky=W+E)
+        self.byte_search_entry.bind("<Return>", lambda e: self.find_bytes())
+        self.byte_search_mode = StringVar(value=BYTE_SEARCH_MODES[0])
+        ttk.Combobox(self.byte_search_window, textvariable=self.byte_search_mode,
+                     values=BYTE_SEARCH_MODES, state="readonly", width=10).grid(row=0, column=1, pady=10)
+        self.find_button = Button(self.byte_search_window, text="Find", command=self.find_bytes)
+        self.find_button.grid(row=0, column=2, padx=10, pady=10, sticky=W+E)
+        self.stop_find_button = Button(self.byte_search_window, text="Stop",
+                                       command=self.byte_search_cancel.set, state="disabled")
+        self.stop_find_button.grid(row=0, column=3, padx=(0, 10), pady=10, sticky=W+E)
+
+        self.byte_hits_listbox = Listbox(self.byte_search_window, width=70, height=25, font="TkFixedFont")
+        self.byte_hits_listbox.grid(row=1, column=0, columnspan=4, padx=10, sticky=W+E+N+S)
+        self.byte_hits_listbox.bind("<<ListboxSelect>>", self.byte_hit_selected)
+        self.byte_search_message = StringVar()
+        Label(self.byte_search_window, textvariable=self.byte_search_message, anchor=W).grid(
+            row=2, column=0, columnspan=4, padx=10, pady=(0, 10), sticky=W+E)
+        self.byte_search_window.grid_rowconfigure(1, weight=1)
+        self.byte_search_window.grid_columnconfigure(0, weight=1)
+
+    def hide_byte_search(self):
+        """
+        Hide the byte search window, stopping a running search.
+        """
+        self.byte_search_cancel.set()
+        self.byte_search_window.withdraw()
+
+    def find_bytes(self):
+        """
+        Start searching the open file for the pattern entered by the user.
+        """
+        if self.current_file is None:
+            self.byte_search_message.set("Open a file first.")
+            return
+        try:
+            pattern, max_match = byte_pattern(self.byte_search_var.get(), self.byte_search_mode.get())
+        except ValueError as e:
+            self.byte_search_message.set(str(e))
+            return
+        self.clear_byte_hits()
+        self.byte_search_cancel = threading.Event()
+        self.find_button.config(state="disabled")
+        self.stop_find_button.config(state="normal")
+        self.byte_search_message.set("Searching...")
+        threading.Thread(target=self.search_bytes,
+                         args=(self.current_file, pattern, max_match, self.byte_search_cancel),
+                         daemon=True).start()
+
+    def search_bytes(self, filename, pattern, max_match, cancel):
+        """
+        Search a file on a worker thread, queueing the hits for the main loop as they are found.
+
+        The file gets a mapping of its own, so the search is not affected by the
+        hex view switching files.
+
+        :param filename: The path to the file to be searched.
+        :param pattern: A compiled bytes pattern.
+        :param max_match: The longest match the pattern can produce.
+        :param cancel: The threading.Event that stops this search.
+        """
+        push = self.byte_hits_queue.push
+        found = 0
+        try:
+            source = open_source(filename)
+            try:
+                for hits in iter_byte_hits(source, pattern, max_match, cancel):
+                    if hits:
+                        push(self.show_byte_hits, cancel, hits[:MAX_BYTE_HITS - found])
+                        found += len(hits)
+                        push(self.byte_search_message.set, f"Searching... {found} hits so far")
+                    if found >= MAX_BYTE_HITS:
+                        break
+            finally:
+                if isinstance(source, mmap.mmap):
+                    source.close()
+            if found >= MAX_BYTE_HITS:
+                message = f"Stopped after the first {MAX_BYTE_HITS} hits."
+            elif cancel.is_set():
+                message = f"Search stopped, {found} hits."
+            else:
+                message = f"{found} hits."
+        except Exception as e:
+            message = f"Could not search file: {e}"
+        push(self.byte_search_finished, message)
+        self.byte_hits_queue.flush(force=True)
+
+    def show_byte_hits(self, cancel, hits):
+        """
+        List byte search hits with the innermost node each one falls in.
+
+        :param cancel: The threading.Event of the search that found the hits.
+        :param hits: A list of (start, end) byte ranges.
+        """
+        if cancel.is_set():
+            return  # Queued before the search was stopped or its file closed
+        lines = []
+        for start, end in hits:
+            node = self.text_widget.intervals.find(start)
+            name = node.name if node is not None else "(no node)"
+            lines.append(f"0x{start:08X}  {end - start:>6}  {name}")
+        self.byte_hits.extend(hits)
+        self.byte_hits_listbox.insert(END, *lines)
+
+    def byte_search_finished(self, message):
+        """
+        Show the outcome of a byte search and re-enable the Find button.
+
+        :param message: The status message to be displayed.
+        """
+        self.byte_search_message.set(message)
+        self.find_button.config(state="normal")
+        self.stop_find_button.config(state="disabled")
+
+    def clear_byte_hits(self):
+        """
+        Empty the byte search results.
+        """
+        self.byte_hits = []
+        if self.byte_search_window is not None:
+            self.byte_hits_listbox.delete(0, END)
+
+    def byte_hit_selected(self, event):
+        """
+        Scroll to the selected byte search hit and show the node it falls in.
+
+        :param event: Event object containing information about the selection event.
+        """
+        selected = self.byte_hits_listbox.curselection()
+        if selected:
+            start, end = self.byte_hits[selected[0]]
+            self.text_widget.see_offset(start)
+            node = self.text_widget.intervals.find(start)
+            if node is not None:
+                self.popItUp(node.info, self.text_widget.color_tag(node.color))
+            self.status_bar.config(
+                text=f"File: {(self.current_file)}\t\tOffset Decimal: {start} \tOffset Hexadecimal: 0x{start:X}")
+
+    def show_row_search(self):
+        """
+        Display the window for looking up the rows of a SQLite table by rowid.
+        """
+        if self.row_search_window is not None:
+            self.row_search_window.deiconify()
+            self.row_search_window.lift()
+            return
+        self.row_search_window = Toplevel(self.master)
+        self.row_search_window.title("Find Row")
+        self.row_search_window.protocol("WM_DELETE_WINDOW", self.row_search_window.withdraw)
+
+        Label(self.row_search_window, text="Table").grid(row=0, column=0, padx=(10, 0), pady=10)
+        self.row_table_var = StringVar()
+        self.row_table_combobox = ttk.Combobox(self.row_search_window, textvariable=self.row_table_var, width=30,
+                                               postcommand=self.list_row_tables)
+        self.row_table_combobox.grid(row=0, column=1, padx=10, pady=10, sticky=W+E)
+        Label(self.row_search_window, text="Rowid").grid(row=0, column=2, pady=10)
+        self.row_first_var = StringVar()
+        first_entry = Entry(self.row_search_window, textvariable=self.row_first_var, width=12)
+        first_entry.grid(row=0, column=3, padx=10, pady=10)
+        Label(self.row_search_window, text="to").grid(row=0, column=4, pady=10)
+        self.row_last_var = StringVar()
+        last_entry = Entry(self.row_search_window, textvariable=self.row_last_var, width=12)
+        last_entry.grid(row=0, column=5, padx=10, pady=10)
+        for entry in (first_entry, last_entry):
+            entry.bind("<Return>", lambda e: self.find_rows())
+        Button(self.row_search_window, text="Find", command=self.find_rows).grid(
+            row=0, column=6, padx=10, pady=10, sticky=W+E)
+
+        self.row_hits_listbox = Listbox(self.row_search_window, width=70, height=25, font="TkFixedFont")
+        self.row_hits_listbox.grid(row=1, column=0, columnspan=7, padx=10, sticky=W+E+N+S)
+        self.row_hits_listbox.bind("<<ListboxSelect>>", self.row_hit_selected)
+        self.row_search_message = StringVar(value="Leave \"to\" empty to look up a single rowid.")
+        Label(self.row_search_window, textvariable=self.row_search_message, anchor=W).grid(
+            row=2, column=0, columnspan=7, padx=10, pady=(0, 10), sticky=W+E)
+        self.row_search_window.grid_rowconfigure(1, weight=1)
+        self.row_search_window.grid_columnconfigure(1, weight=1)
+
+    def row_parser(self):
+        """
+        A parser of the open file for row lookups, or None (with a message) if it cannot look up rows.
+        """
+        if self.current_file is None:
+            self.row_search_message.set("Open a file first.")
+            return None
+        # The parser maps the file, so the file can be closed once the parser has been created
+        with open(self.current_file, 'rb') as file:
+            parser = get_file_parser(file)
+        if not hasattr(parser, "find_row"):
+            self.row_search_message.set("Rows can only be looked up in SQLite files.")
+            return None
+        return parser
+
+    def list_row_tables(self):
+        """
+        Offer the tables of the open file in the table box.
+        """
+        try:
+            parser = self.row_parser()
+            tables = sorted(parser.read_schema()) if parser is not None else []
+        except Exception as e:
+            self.row_search_message.set(f"Could not read the tables: {e}")
+            tables = []
+        self.row_table_combobox.config(values=tables)
+
+    def find_rows(self):
+        """
+        Look up the rowid, or range of rowids, entered by the user in the table entered.
+
+        Only the pages on the way down the table's B-tree are read, so this does not
+        wait for the file to be parsed.
+        """
+        self.row_hits = []
+        self.row_hits_listbox.delete(0, END)
+        try:
+            first = int(self.row_first_var.get(), 0)
+            last = int(self.row_last_var.get(), 0) if self.row_last_var.get().strip() else None
+        except ValueError:
+            self.row_search_message.set("Rowids are integers.")
+            return
+        try:
+            parser = self.row_parser()
+            if parser is None:
+                return
+            table = self.row_table_var.get()
+            if last is None:
+                match = parser.find_row(table, first)
+                matches = [match] if match is not None else []
+            else:
+                matches = []
+                for match in parser.find_rows(table, first, last):
+                    matches.append(match)
+                    if len(matches) >= MAX_ROW_HITS:
+                        break
+        except Exception as e:
+            self.row_search_message.set(f"Could not look up rows: {e}")
+            return
+        self.row_hits = matches
+        self.row_hits_listbox.insert(END, *(f"0x{match.offset:08X}  page {match.page_number:>8}  rowid {match.rowid}"
+                                            for match in matches))
+        if len(matches) >= MAX_ROW_HITS:
+            self.row_search_message.set(f"Stopped after the first {MAX_ROW_HITS} rows.")
+        else:
+            self.row_search_message.set(f"{len(matches)} rows.")
+        if len(matches) == 1:
+            self.row_hits_listbox.selection_set(0)
+            self.row_hit_selected()
+
+    def row_hit_selected(self, event=None):
+        """
+        Scroll to the cell of the selected row and show its description.
+
+        :param event: Event object containing information about the selection event.
+        """
+        selected = self.row_hits_listbox.curselection()
+        if selected:
+            match = self.row_hits[selected[0]]
+            self.text_widget.see_offset(match.offset)
+            self.sequence_view.jump_to_offset(match.offset)
+            self.popItUp(match.node.info, self.text_widget.color_tag(match.node.color))
+            self.status_bar.config(
+                text=f"File: {(self.current_file)}\t\tOffset Decimal: {match.offset} \tOffset Hexadecimal: 0x{match.offset:X}")
 
     def generate_file_hash(self):
         # Assuming the file is stored in self.current_file
@@ -442,55 +1321,79 @@ class Main:
                                                          ("LNK Files", "*.lnk")))
         if filename:
             # reset previous file treeview
-            self.sequence_treeview.delete(
-                *self.sequence_treeview.get_children())  # Clear previous entries
+            self.sequence_view.clear()
             # Reset progress bar and show it
             self.progress_var.set(0)
             self.progress_bar.grid(
                 row=3, column=0, columnspan=5, sticky=W+E+S, pady=(5, 0))
             self.progress_message.set("Loading...")
-            threading.Thread(target=self.parse_file, args=(filename,)).start()
+            self.render_queue.clear()
+            # Hits from a search of the previous file no longer apply
+            self.byte_search_cancel.set()
+            self.clear_byte_hits()
+            self.stop_parsing = False
+            self.open_button.config(state="disabled")
+            self.stop_button.config(state="normal")
+            self.current_file = filename
+            threading.Thread(target=self.parse_file, args=(filename,), daemon=True).start()
 
     def parse_file(self, filename):
         """
-        Parse the selected file, displaying the content and controlling the progress.
+        Parse the selected file on a worker thread, queueing everything that touches
+        the widgets for the main loop.
 
         :param filename: The path to the file to be parsed.
         """
-        self.stop_parsing = False
-        self.open_button.config(state="disabled")
-        self.stop_button.config(state="normal")
-        self.current_file = filename
+        push = self.render_queue.push
         try:
+            push(self.show_parsed_data, open_source(filename))
             with open(filename, "rb") as file:
                 parser = get_file_parser(file)
-                self.root = parser.parse()  # Store the root node
-                self.total_nodes = self.count_nodes(self.root)
-                self.processed_nodes = 0
-                self.show_parsed_data(self.root)
+                # Show nodes as the parser produces them instead of after the whole tree is built
+                for offset, node, depth in parser.iter_parse():
+                    if self.stop_parsing:
+                        break
+                    if depth == 0:
+                        self.root = node  # Store the root node
+                    else:
+                        push(self.show_node, offset, node)
             if self.stop_parsing:
-                self.update_status(f"Parsing of {filename} stopped.")
+                message = f"Parsing of {filename} stopped."
             else:
-                self.update_status(f"{filename} completed successfully.")
+                message = f"{filename} completed successfully."
         except Exception as e:
-            self.update_status(f"Could not parse file: {e}")
+            message = f"Could not parse file: {e}"
+            # Tk may only be used from the main loop, so the error is shown from there
+            push(messagebox.showerror, "Parsing Error", message)
+        push(self.parse_finished, message)
+        self.render_queue.flush(force=True)
+
+    def parse_finished(self, message):
+        """
+        Show the outcome of a parse and re-enable the buttons.
 
+        :param message: The status message to be displayed.
+        """
+        self.text_widget.render()
+        if self.sequence_view.unsorted:
+            self.sequence_view.resort()
+        self.update_progress(100)
+        self.update_status(message)
         # Schedule a callback to clear the status after 10 seconds
         self.master.after(10000, self.clear_status)
         self.open_button.config(state="normal")
         self.stop_button.config(state="disabled")
 
-    def count_nodes(self, node):
+    def set_source(self, source):
         """
-        Recursively count the total number of nodes in the given node.
+        Replace the mapped file shown in the hex view, closing the previous mapping.
 
-        :param node: The root node for counting.
-        :return: The total number of nodes.
+        :param source: An mmap or bytes-like object holding the new file content.
         """
-        count = 1
-        for _, child in node.children:
-            count += self.count_nodes(child)
-        return count
+        previous, self.source = self.source, source
+        self.text_widget.load(source)
+        if isinstance(previous, mmap.mmap):
+            previous.close()
 
     def update_progress(self, progress):
         """
@@ -544,32 +1447,15 @@ class Main:
             # This exception is raised when there's no selection.
             pass
 
-    def show_parsed_data(self, root):
+    def show_parsed_data(self, source):
         """
-        Display the parsed data from the given root node.
+        Prepare the views for displaying the nodes of a new parse.
 
-        :param root: The root node of the parsed data.
+        :param source: An mmap or bytes-like object holding the file content.
         """
-        self.sequence_items = []  # Initialize the sequence items list
-        self.text_widget.textWidget.configure(
-            state='normal')  # Temporarily enable the widget
-        self.text_widget.asciiText.configure(
-            state='normal')  # Temporarily enable the widget
-
-        self.text_widget.textWidget.delete('1.0', 'end')
-        self.text_widget.asciiText.delete('1.0', 'end')
-
-        # Mark text mirror
-        self.text_widget.textWidget.bind(
-            "<ButtonRelease-1>", lambda e: self.mirror_highlight(self.text_widget.textWidget))
-        self.text_widget.asciiText.bind(
-            "<ButtonRelease-1>", lambda e: self.mirror_highlight(self.text_widget.asciiText))
-        self.text_widget.textWidget.bind(
-            "<Button-1>", lambda e: self.clear_mirror_highlight())
-        self.text_widget.asciiText.bind(
-            "<Button-1>", lambda e: self.clear_mirror_highlight())
-
-        self.iterNode(root)
+        self.set_source(source)
+        self.search_index = SearchIndex()
+        self.processed_nodes = 0
 
     def mirror_highlight(self, source_widget):
         try:
@@ -611,81 +1497,36 @@ class Main:
         for widget in [self.text_widget.textWidget, self.text_widget.asciiText]:
             widget.tag_remove("mirror_highlight", "1.0", END)
 
-    def iterNode(self, node):
+    def show_node(self, offset, child):
         """
-        Iterate through the node tree, displaying the content and handling the user interactions.
+        Display a single parsed node, handling the user interactions for it.
 
-        :param node: The current node in the iteration.
+        :param offset: The absolute file offset of the node.
+        :param child: The node to display.
         """
-        if self.stop_parsing:
-            return
-        byte_counter = 0
-        for idx, (key, child) in enumerate(node.children):
-            if self.stop_parsing:
-                return
-            tag = f"color{idx}"  # Create a unique tag for each item
-            color = child.color  # Use the color from the Node
-            table_val = child.table_value
-            offset = byte_counter
+        table_val = child.table_value
 
-            if table_val:
-                text_from_popup_text = table_val
-            else:
-                text_from_popup_text = ''
-
-            item_id = self.sequence_treeview.insert('', 'end', values=(
-                offset, child.name, text_from_popup_text), tags=(tag,))
-            
-            # Update the Value column if needed
-            if text_from_popup_text:
-                self.sequence_treeview.item(
-                    item_id, values=(offset, child.name, text_from_popup_text))
-
-            self.sequence_treeview.tag_configure(tag, background=child.color)
-
-
-            # Search in treeview and place it after search
-            self.sequence_items.append(((offset, child.name, text_from_popup_text), (tag,)))
-
-
-            self.text_widget.textWidget.tag_configure(tag, background=color)
-            self.text_widget.asciiText.tag_configure(tag, background=color)
-            self.text_widget.textWidget.configure(
-                state='normal')  # Temporarily enable the widget
-            self.text_widget.asciiText.configure(
-                state='normal')  # Temporarily enable the widget
-            for byte in child.data:
-                text = f'{byte:02x} '
-                self.text_widget.textWidget.insert('end', text, (tag,))
-                # Insert ASCII representation into the asciiText widget
-                if 32 <= byte < 127:
-                    ascii_char = chr(byte)
-                else:
-                    ascii_char = '.'
-                self.text_widget.asciiText.insert('end', ascii_char, (tag,))
-                byte_counter += 1
-                if byte_counter % 16 == 0:
-                    self.text_widget.textWidget.insert('end', '\n')
-                    self.text_widget.asciiText.insert('end', '\n')
-
-            self.text_widget.textWidget.configure(
-                state='disabled')  # Make the widget read-only
-            self.text_widget.asciiText.configure(
-                state='disabled')  # Make the widget read-only
-
-            self.text_widget.textWidget.tag_bind(tag, "<Button-1>",
-                                                 lambda event, currentTag=tag, child=child: self.handle_click(event, currentTag, child))
-            self.text_widget.asciiText.tag_bind(tag, "<Button-1>",
-                                                lambda event, currentTag=tag, child=child: self.handle_click(event, currentTag, child))
-            # Bind the selection event
-            self.sequence_treeview.bind(
-                "<<TreeviewSelect>>", self.listbox_item_selected)
-
-            self.iterNode(child)
-
-            self.processed_nodes += 1
-            progress = (self.processed_nodes / self.total_nodes) * 100
-            self.master.after(0, self.update_progress, progress)
+        if table_val:
+            text_from_popup_text = table_val
+        else:
+            text_from_popup_text = ''
+
+        # The view only keeps the node; its columns are read when the row is on screen
+        row = self.search_index.add(child.name, text_from_popup_text)
+        visible = not self.search_term or self.search_index.matches(row, self.search_term)
+        self.sequence_view.append(offset, child, visible)
+
+        # The bytes themselves are rendered on demand by the hex view, which
+        # also uses the index to map clicks back to this node
+        self.text_widget.intervals.add(offset, offset + len(child.data), child)
+
+        self.processed_nodes += 1
+        if self.processed_nodes % PROGRESS_INTERVAL == 0:
+            # Offsets only roughly increase, so this is an estimate of how far the parse is
+            progress = min(99, offset * 100 / max(1, len(self.source)))
+            self.update_progress(progress)
+            self.text_widget.render()
+            self.sequence_view.schedule_render()
 
     def popItUp(self, text, currTag):
         """
@@ -696,28 +1537,24 @@ class Main:
         """
         self.text_widget.update_popup_text(text, currTag)
 
-    def handle_click(self, event, tag, child):
+    def handle_click(self, event):
         """
-        Handle a mouse click event in the text widgets, displaying additional information.
+        Handle a mouse click event in the text widgets, displaying additional information
+        about the innermost node at the clicked offset.
 
         :param event: Event object containing information about the click event.
-        :param tag: The tag associated with the clicked text.
-        :param child: The child node associated with the clicked text.
         """
-        self.last_clicked = child
-        self.popItUp(child.info, tag)
+        self.clear_mirror_highlight()
 
         # Calculate the exact offset
-        if event.widget == self.text_widget.textWidget:
-            clicked_index = self.text_widget.textWidget.index(
-                f"@{event.x},{event.y}")
-            row, col = map(int, clicked_index.split('.'))
-            byte_offset = (row - 1) * 16 + col // 3
-        elif event.widget == self.text_widget.asciiText:
-            clicked_index = self.text_widget.asciiText.index(
-                f"@{event.x},{event.y}")
-            row, col = map(int, clicked_index.split('.'))
-            byte_offset = (row - 1) * 16 + col
+        byte_offset = self.text_widget.offset_at(event.widget, event.x, event.y)
+        interval = self.text_widget.intervals.find_interval(byte_offset)
+        if interval is not None:
+            start, _, child = interval
+            self.last_clicked = child
+            self.popItUp(child.info, self.text_widget.color_tag(child.color))
+            # Show the clicked node in the sequence view as well
+            self.sequence_view.jump_to_offset(start, child)
 
         self.status_bar.config(
             text=f"File: {(self.current_file)}\t\tOffset Decimal: {byte_offset} \tOffset Hexadecimal: 0x{byte_offset:X}")
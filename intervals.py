@@ -0,0 +1,125 @@
+from array import array
+from bisect import bisect_left, bisect_right
+
+# Intervals collected before they are sorted into a run
+BUFFER_SIZE = 1024
+
+
+class _Run:
+    """
+    A sorted, immutable block of intervals.
+
+    Intervals are ordered by start, outer ones first, and each one points at the
+    latest-starting interval that was still open when it began. Following those
+    links from any interval visits every earlier interval that can contain a
+    given offset, which makes point lookups O(log n + nesting depth).
+    """
+
+    def __init__(self, intervals):
+        intervals.sort(key=lambda interval: (interval[0], -interval[1]))
+        self.starts = array('q', [interval[0] for interval in intervals])
+        self.ends = array('q', [interval[1] for interval in intervals])
+        self.values = [interval[2] for interval in intervals]
+        self.parents = array('q', bytes(8 * len(intervals)))
+        open_intervals = []
+        for index, start in enumerate(self.starts):
+            while open_intervals and self.ends[open_intervals[-1]] <= start:
+                open_intervals.pop()
+            self.parents[index] = open_intervals[-1] if open_intervals else -1
+            open_intervals.append(index)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def items(self):
+        return zip(self.starts, self.ends, self.values)
+
+    def find(self, offset):
+        """Index of the innermost interval containing offset, or -1."""
+        index = bisect_right(self.starts, offset) - 1
+        while index >= 0 and self.ends[index] <= offset:
+            index = self.parents[index]
+        return index
+
+    def overlapping(self, start, end):
+        """Yield indexes of the intervals overlapping [start, end)."""
+        index = self.find(start)
+        enclosing = []
+        while index >= 0:
+            if self.ends[index] > start:
+                enclosing.append(index)
+            index = self.parents[index]
+        yield from reversed(enclosing)
+        yield from range(bisect_right(self.starts, start), bisect_left(self.starts, end))
+
+
+class IntervalIndex:
+    """
+    An index from byte ranges (start, end) to values, such as parsed nodes.
+
+    Intervals can be added in any order while a file is being parsed. They are
+    kept in a handful of sorted runs whose sizes double, so adding stays cheap
+    and lookups never need a full re-sort: finding the innermost node at a byte
+    offset costs O(log n) per run.
+    """
+
+    def __init__(self):
+        self.runs = []
+        self.buffer = []
+
+    def __len__(self):
+        return sum(len(run) for run in self.runs) + len(self.buffer)
+
+    def add(self, start, end, value):
+        """
+        Index value for the byte range [start, end). Empty ranges are ignored.
+        """
+        if end <= start:
+            return
+        self.buffer.append((start, end, value))
+        if len(self.buffer) >= BUFFER_SIZE:
+            self._flush()
+
+    def _flush(self):
+        if not self.buffer:
+            return
+        intervals, self.buffer = self.buffer, []
+        # Merge runs of similar size so there are only O(log n) of them
+        while self.runs and len(self.runs[-1]) <= len(intervals):
+            intervals.extend(self.runs.pop().items())
+        self.runs.append(_Run(intervals))
+
+    def find(self, offset):
+        """
+        Return the value of the innermost interval containing offset, or None.
+        """
+        interval = self.find_interval(offset)
+        return interval[2] if interval is not None else None
+
+    def find_interval(self, offset):
+        """
+        Return (start, end, value) of the innermost interval containing offset, or None.
+        """
+        self._flush()
+        best = None
+        for run in self.runs:
+            index = run.find(offset)
+            if index < 0:
+                continue
+            interval = (run.starts[index], run.ends[index], run.values[index])
+            if best is None or (interval[0], -interval[1]) > (best[0], -best[1]):
+                best = interval
+        return best
+
+    def overlapping(self, start, end):
+        """
+        Return (start, end, value) for every interval overlapping [start, end),
+        outer intervals before the ones nested in them.
+        """
+        self._flush()
+        found = []
+        for run in self.runs:
+            found.extend((run.starts[index], run.ends[index], run.values[index])
+                         for index in run.overlapping(start, end))
+        found.sort(key=lambda interval: (interval[0], -interval[1]))
+        return found
@@ -0,0 +1,109 @@
+import re
+from collections import namedtuple
+
+# https://www.w3.org/Graphics/JPEG/itu-t81.pdf, table B.1
+SOI = 0xD8
+EOI = 0xD9
+SOS = 0xDA
+APP0 = 0xE0
+MARKER_NAMES = {
+    **{marker: f"SOF{marker - 0xC0}" for marker in range(0xC0, 0xD0)},
+    0xC4: "DHT", 0xC8: "JPG", 0xCC: "DAC",
+    **{marker: f"RST{marker - 0xD0}" for marker in range(0xD0, 0xD8)},
+    0xD8: "SOI", 0xD9: "EOI", 0xDA: "SOS", 0xDB: "DQT", 0xDC: "DNL", 0xDD: "DRI", 0xDE: "DHP", 0xDF: "EXP",
+    **{marker: f"APP{marker - 0xE0}" for marker in range(0xE0, 0xF0)},
+    **{marker: f"JPG{marker - 0xF0}" for marker in range(0xF0, 0xFE)},
+    0xFE: "COM", 0x01: "TEM",
+}
+MARKER_DESCRIPTIONS = {
+    0xC4: "Define Huffman tables", 0xCC: "Define arithmetic coding conditioning",
+    0xD8: "Start of image", 0xD9: "End of image", 0xDA: "Start of scan", 0xDB: "Define quantization tables",
+    0xDC: "Define number of lines", 0xDD: "Define restart interval", 0xDE: "Define hierarchical progression",
+    0xDF: "Expand reference components", 0xFE: "Comment", 0x01: "Temporary private use in arithmetic coding",
+}
+# Start of frame markers, which give the coding process; the rest of 0xC0 to 0xCF are DHT, JPG and DAC
+START_OF_FRAME = {
+    0xC0: "baseline DCT", 0xC1: "extended sequential DCT, Huffman coding", 0xC2: "progressive DCT, Huffman coding",
+    0xC3: "lossless, Huffman coding", 0xC5: "differential sequential DCT, Huffman coding",
+    0xC6: "differential progressive DCT, Huffman coding", 0xC7: "differential lossless, Huffman coding",
+    0xC9: "extended sequential DCT, arithmetic coding", 0xCA: "progressive DCT, arithmetic coding",
+    0xCB: "lossless, arithmetic coding", 0xCD: "differential sequential DCT, arithmetic coding",
+    0xCE: "differential progressive DCT, arithmetic coding", 0xCF: "differential lossless, arithmetic coding",
+}
+# Markers without a length or segment: SOI, EOI, the restart markers and TEM
+STANDALONE_MARKERS = frozenset([0x01, *range(0xD0, 0xDA)])
+
+# The end of the entropy-coded data of a scan: a marker other than a stuffed zero byte (0xFF00)
+# or a restart marker. A single 0xFF rather than \xff+ for the fill bytes before it, which is
+# an order of magnitude faster to search for.
+_SCAN_END = re.compile(rb'\xff[^\x00\xd0-\xd7\xff]')
+
+# A marker segment: the offset of its 0xFF, the marker, its length including the marker, for
+# SOS the length of the entropy-coded data that follows the segment (0 for other markers), and
+# the number of 0xFF fill bytes right before the marker
+Segment = namedtuple('Segment', 'offset marker length scan_length fill')
+# The segments of a file, where the walk ended (after EOI, or at the damage) and why, if not at EOI
+Layout = namedtuple('Layout', 'segments end error')
+
+
+def marker_name(marker):
+    return MARKER_NAMES.get(marker, f"Marker 0x{marker:02X}")
+
+
+def scan_segments(buffer, start=0):
+    """
+    Walk the marker segments of a JPEG from the SOI marker at start to EOI.
+
+    Each segment is skipped by its length field, and the entropy-coded data of a
+    scan is skipped with one regular expression search for the next marker, so
+    nothing is copied: buffer can be the file's mmap. The walk stops at EOI, at
+    the first byte that is not a marker, and at a segment running past the end.
+    Fill bytes before a marker belong to its segment, so the end of a damaged walk
+    is where the fill bytes before the damage start.
+    """
+    segments = []
+    size = len(buffer)
+    offset = start
+    while offset < size:
+        if buffer[offset] != 0xFF:
+            return Layout(segments, offset, f"No marker at offset {offset}")
+        # Markers may be preceded by any number of 0xFF fill bytes
+        fill_start = offset
+        while offset + 1 < size and buffer[offset + 1] == 0xFF:
+            offset += 1
+        fill = offset - fill_start
+        if offset + 2 > size:
+            return Layout(segments, fill_start, "The file ends in a marker")
+        marker = buffer[offset + 1]
+        if marker in STANDALONE_MARKERS:
+            segments.append(Segment(offset, marker, 2, 0, fill))
+            offset += 2
+            if marker == EOI:
+                return Layout(segments, offset, None)
+            continue
+        if offset + 4 > size:
+            return Layout(segments, fill_start, f"The file ends in the length of a {marker_name(marker)} segment")
+        length = 2 + (buffer[offset + 2] << 8 | buffer[offset + 3])
+        if length < 4 or offset + length > size:
+            return Layout(segments, fill_start, f"The {marker_name(marker)} segment at offset {offset} runs past the end of the file")
+        scan_length = 0
+        if marker == SOS:
+            match = _SCAN_END.search(buffer, offset + length)
+            scan_end = match.start() if match else size
+            # Inside the data 0xFF is always followed by 0x00 or a restart marker, so these are
+            # fill bytes, which go with the next marker
+            while scan_end > offset + length and buffer[scan_end - 1] == 0xFF:
+                scan_end -= 1
+            scan_length = scan_end - offset - length
+        segments.append(Segment(offset, marker, length, scan_length, fill))
+        offset += length + scan_length
+    return Layout(segments, offset, "The file ends before the EOI marker")
+
+
+def app_identifier(buffer, segment):
+    """The zero-terminated identifier an APPn segment starts with (JFIF, Exif, ...), or None."""
+    body = bytes(buffer[segment.offset + 4:segment.offset + min(segment.length, 4 + 64)])
+    end = body.find(b'\x00')
+    if end <= 0:
+        return None
+    return body[:end].decode('latin-1')
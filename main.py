@@ -1,27 +1,35 @@
+import importlib
 import logging
-from abc import ABC, abstractmethod
-from Artefacts.SQLiteFileParser import *
-from Artefacts.JPEGFileParser import *
-from Artefacts.MFTFileParser import *
-from Artefacts.LNKFileParser import *
-from common import Node, FileParser
+import os
+import pkgutil
+from common import Node, FileParser, UnknownFileTypeException
 
 logging.basicConfig(level=logging.INFO)
 
+ARTEFACTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Artefacts")
+
+
+def load_parsers():
+    """
+    Import every module in Artefacts/ so its parsers register themselves with FileParser.registry.
+    """
+    for module in pkgutil.iter_modules([ARTEFACTS_DIR]):
+        importlib.import_module(f"Artefacts.{module.name}")
+
+
+load_parsers()
+
+
 def get_file_parser(file):
-    parsers = [SQLiteFileParser, JPEGFileParser, MFTFileParser, LNKFileParser]
-    for Parser in parsers:
-        print(Parser.recognizes(file))
-        if Parser.recognizes(file):
-            return Parser(file)
-    raise UnknownFileTypeException("Unknown file type")
+    Parser = FileParser.registry.identify(file)
+    if Parser is None:
+        raise UnknownFileTypeException("Unknown file type")
+    return Parser(file)
 
 
 def print_node(node, indent=0):
     data_str = ' '.join(f'{byte:02x}' for byte in node.data)
     print(' ' * indent + node.info + data_str)
-    for _, child in node.children:
-        print_node(child, indent + 2)
 
 
 def find_node(node, key):
@@ -35,8 +43,9 @@ def main():
         with open("", "rb") as file: # enter your file here
             parser = get_file_parser(file)
             parser.validate(file)
-            root = parser.parse()
-            print_node(root)
+            # Print nodes as they are parsed instead of building the whole tree first
+            for _, node, depth in parser.iter_parse(keep_tree=False):
+                print_node(node, depth * 2)
     except Exception as e:
         logging.exception(str(e))
 
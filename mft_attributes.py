@@ -0,0 +1,112 @@
+import struct
+from collections import namedtuple
+
+# https://flatcap.github.io/linux-ntfs/ntfs/concepts/attribute_header.html
+ATTRIBUTE_TYPES = {
+    0x10: "$STANDARD_INFORMATION",
+    0x20: "$ATTRIBUTE_LIST",
+    0x30: "$FILE_NAME",
+    0x40: "$OBJECT_ID",
+    0x50: "$SECURITY_DESCRIPTOR",
+    0x60: "$VOLUME_NAME",
+    0x70: "$VOLUME_INFORMATION",
+    0x80: "$DATA",
+    0x90: "$INDEX_ROOT",
+    0xA0: "$INDEX_ALLOCATION",
+    0xB0: "$BITMAP",
+    0xC0: "$REPARSE_POINT",
+    0xD0: "$EA_INFORMATION",
+    0xE0: "$EA",
+    0x100: "$LOGGED_UTILITY_STREAM",
+}
+STANDARD_INFORMATION = 0x10
+FILE_NAME = 0x30
+DATA = 0x80
+END_OF_ATTRIBUTES = 0xFFFFFFFF
+
+FILE_NAME_NAMESPACES = {0: "POSIX", 1: "Win32", 2: "DOS", 3: "Win32 and DOS"}
+
+# The header every attribute starts with, then the rest of the header of resident and non-resident attributes
+_COMMON_HEADER = struct.Struct('<IIBBHHH')
+_RESIDENT_HEADER = struct.Struct('<IH')
+_NON_RESIDENT_HEADER = struct.Struct('<QQHH4xQQQ')
+RESIDENT_HEADER_SIZE = 0x18
+NON_RESIDENT_HEADER_SIZE = 0x40
+
+# The values of $STANDARD_INFORMATION (timestamps as FILETIMEs) and $FILE_NAME up to the name
+_STANDARD_INFORMATION = struct.Struct('<4QI')
+_FILE_NAME = struct.Struct('<Q4QQQIIBB')
+STANDARD_INFORMATION_SIZE = 48
+FILE_NAME_SIZE = _FILE_NAME.size
+
+# An attribute of a record, with offsets relative to the record. For resident attributes value_offset
+# and value_length are those of the value; for non-resident ones, of the data runs and the real size of the data.
+Attribute = namedtuple('Attribute', 'offset type length non_resident name flags attribute_id value_offset value_length')
+StandardInformation = namedtuple('StandardInformation', 'created modified mft_modified accessed file_attributes')
+FileName = namedtuple('FileName', 'parent_record parent_sequence created modified mft_modified accessed '
+                                  'allocated_size real_size flags namespace name')
+
+
+def file_reference(reference):
+    """Split a file reference into (record number, sequence number): 48 and 16 bits."""
+    return reference & 0xFFFFFFFFFFFF, reference >> 48
+
+
+def iter_attributes(record, start, end):
+    """
+    Yield the Attributes of a record with its update sequence applied, following the
+    length of each attribute from the first one at start.
+
+    The walk stops at the end marker, at end (the used size of the record), and at the
+    first attribute whose header or length does not fit, so corrupt records yield the
+    attributes before the damage.
+    """
+    unpack_common = _COMMON_HEADER.unpack_from
+    offset = start
+    while offset + RESIDENT_HEADER_SIZE <= end:
+        attribute_type, length, non_resident, name_length, name_offset, flags, attribute_id = unpack_common(record, offset)
+        if attribute_type == END_OF_ATTRIBUTES:
+            return
+        if length & 7 or offset + length > end or length < (NON_RESIDENT_HEADER_SIZE if non_resident else RESIDENT_HEADER_SIZE):
+            return
+        if non_resident:
+            _, _, runs_offset, _, _, value_length, _ = _NON_RESIDENT_HEADER.unpack_from(record, offset + 0x10)
+            value_offset = offset + runs_offset
+        else:
+            value_length, value_offset = _RESIDENT_HEADER.unpack_from(record, offset + 0x10)
+            if value_offset + value_length > length:
+                return
+            value_offset += offset
+        name = ''
+        if name_length:
+            name = str(record[offset + name_offset:offset + name_offset + 2 * name_length], 'utf-16-le', 'replace')
+        yield Attribute(offset, attribute_type, length, bool(non_resident), name, flags, attribute_id, value_offset, value_length)
+        offset += length
+
+
+def standard_information(record, attribute):
+    """The StandardInformation of a resident $STANDARD_INFORMATION attribute, or None if it is too short."""
+    if attribute.non_resident or attribute.value_length < STANDARD_INFORMATION_SIZE:
+        return None
+    return StandardInformation(*_STANDARD_INFORMATION.unpack_from(record, attribute.value_offset))
+
+
+def file_name(record, attribute):
+    """The FileName of a resident $FILE_NAME attribute, or None if it is too short for its name."""
+    if attribute.non_resident or attribute.value_length < FILE_NAME_SIZE:
+        return None
+    parent, *times, allocated_size, real_size, flags, _, name_length, namespace = _FILE_NAME.unpack_from(record, attribute.value_offset)
+    start = attribute.value_offset + FILE_NAME_SIZE
+    if FILE_NAME_SIZE + 2 * name_length > attribute.value_length:
+        return None
+    name = str(record[start:start + 2 * name_length], 'utf-16-le', 'replace')
+    return FileName(*file_reference(parent), *times, allocated_size, real_size, flags, namespace, name)
+
+
+def record_attributes(record, start, end, types):
+    """
+    The attributes of a record whose type is in types, as a list of (Attribute, FileName
+    or None): $FILE_NAME values are decoded along the way (see iter_attributes).
+    """
+    return [(attribute, file_name(record, attribute) if attribute.type == FILE_NAME else None)
+            for attribute in iter_attributes(record, start, end) if attribute.type in types]
@@ -0,0 +1,72 @@
+import mmap
+import os
+from collections import Counter, namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from mft_attributes import record_attributes
+from mft_records import MFTRecords
+
+# Ranges per worker, so workers that finish early pick up more
+CHUNKS_PER_WORKER = 4
+MIN_CHUNK_RECORDS = 4096
+
+# What a worker found in records first to last (exclusive): the number of records of each
+# status (see mft_records.RECORD_STATUS) and index -> [(Attribute, FileName or None)] for
+# the valid records
+Shard = namedtuple('Shard', 'first last counts attributes')
+
+# The mapped file of a worker process, opened once by _open_mft
+_source = None
+
+
+def _open_mft(path):
+    global _source
+    with open(path, "rb") as file:
+        _source = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _scan_range(start, record_size, first, last, types):
+    view = memoryview(_source)[start + first * record_size:start + last * record_size]
+    records = MFTRecords(view, 0, record_size)
+    counts = Counter(int(status) for status in records.status)
+    attributes = {}
+    for index, record in records.iter_valid():
+        end = min(int(records.used_size[index]), record_size)
+        attributes[first + index] = record_attributes(record, int(records.attribute_offset[index]), end, types)
+    return Shard(first, last, counts, attributes)
+
+
+def scan_records_in_parallel(path, start, record_size, count, types, workers=None, progress=None):
+    """
+    Walk the attributes of every record of an MFT in worker processes.
+
+    The record range is split into shards and each worker maps the file itself, applies
+    the update sequences of its shard and walks the attributes of every valid record,
+    so only the attributes (see mft_attributes.record_attributes) are sent back. Every
+    slot is scanned, whatever the status of the records before it.
+
+    :param path: The path of the file holding the MFT.
+    :param start: The offset of the first record.
+    :param types: The attribute types to return.
+    :param workers: The number of processes, or None for one per CPU.
+    :param progress: Called with each Shard as it is done, then the number of records
+        done so far and in all, in the order the shards finish.
+    :return: A dict of record index -> [(Attribute, FileName or None)], in record order.
+    """
+    workers = workers or os.cpu_count() or 1
+    chunk_records = max(MIN_CHUNK_RECORDS, -(-count // (workers * CHUNKS_PER_WORKER)))
+    with ProcessPoolExecutor(workers, initializer=_open_mft, initargs=(path,)) as pool:
+        futures = [pool.submit(_scan_range, start, record_size, first, min(first + chunk_records, count), tuple(types))
+                   for first in range(0, count, chunk_records)]
+        shards = []
+        done = 0
+        for future in as_completed(futures):
+            shard = future.result()
+            shards.append(shard)
+            done += shard.last - shard.first
+            if progress is not None:
+                progress(shard, done, count)
+    attributes = {}
+    for shard in sorted(shards, key=lambda shard: shard.first):
+        attributes.update(shard.attributes)
+    return attributes
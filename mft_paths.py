@@ -0,0 +1,121 @@
+from array import array
+
+from mft_attributes import FILE_NAME, record_attributes
+from mft_records import FLAG_DIRECTORY
+
+# https://flatcap.github.io/linux-ntfs/ntfs/files/root.html
+ROOT_DIRECTORY = 5
+SEPARATOR = "\\"
+# Where entries whose parent is gone are put, as The Sleuth Kit does
+ORPHAN_DIRECTORY = SEPARATOR + "$OrphanFiles"
+DOS_NAMESPACE = 2
+
+# The status of a resolved path
+PATH_OK = 0
+PATH_NO_NAME = 1  # The entry has no $FILE_NAME
+PATH_ORPHAN = 2  # A parent reference points to an entry that does not exist, has no name or is not a directory
+PATH_SEQUENCE_MISMATCH = 3  # A parent entry was reused since: its sequence number is not the reference's
+PATH_CYCLE = 4  # The parent references lead back to an entry on the way
+PATH_STATUS = {
+    PATH_OK: "resolved",
+    PATH_NO_NAME: "unnamed: the entry has no $FILE_NAME attribute",
+    PATH_ORPHAN: "orphaned: a parent directory does not exist",
+    PATH_SEQUENCE_MISMATCH: "orphaned: a parent directory entry has been reused since (its sequence number differs)",
+    PATH_CYCLE: "orphaned: the parent references form a cycle",
+}
+
+
+class PathIndex:
+    """
+    The parent reference and name of every entry of an MFT, and the full paths they lead to.
+
+    The index is built in one pass over the valid base records, from the $FILE_NAME of
+    each (a long name rather than a DOS 8.3 one). Parents are kept in flat arrays,
+    so it costs a few bytes per entry besides the name.
+
+    Paths are resolved by following parent references up to the root or to the first
+    directory resolved before, and every directory on the way is cached. Each directory
+    is therefore resolved once, which makes resolving every entry linear, and only the
+    paths of directories are kept.
+    """
+
+    def __init__(self, records, decoded=None):
+        """
+        :param records: The mft_records.MFTRecords of the MFT.
+        :param decoded: The attributes of the valid records, already read, as a dict of
+            index -> [(Attribute, FileName or None)] including every $FILE_NAME (see
+            mft_parallel). Without it they are read from the records.
+        """
+        count = len(records)
+        self.count = count
+        self.sequences = array('H', records.column('sequence'))
+        self.directories = bytearray(flags & FLAG_DIRECTORY for flags in records.column('flags'))
+        self.names = [None] * count
+        self.parents = array('q', [-1]) * count
+        self.parent_sequences = array('H', [0]) * count
+        self.cache = {ROOT_DIRECTORY: ("", PATH_OK)}  # Directory entry -> (path, status)
+        for index, attributes in (decoded.items() if decoded is not None else self.read_file_names(records)):
+            if records.base_reference[index]:
+                continue  # An extension record: its base record has the names
+            best = None
+            for attribute, value in attributes:
+                if value is not None and (best is None or best.namespace == DOS_NAMESPACE):
+                    best = value
+            if best is not None:
+                self.names[index] = best.name
+                self.parents[index] = best.parent_record
+                self.parent_sequences[index] = best.parent_sequence
+
+    @staticmethod
+    def read_file_names(records):
+        """Yield (index, [(Attribute, FileName or None)]) for the $FILE_NAME attributes of each valid record."""
+        for index, record in records.iter_valid():
+            end = min(int(records.used_size[index]), records.record_size)
+            yield index, record_attributes(record, int(records.attribute_offset[index]), end, (FILE_NAME,))
+
+    def resolve(self, index):
+        """
+        The (full path, status) of an entry. The path is None for entries without a name,
+        and starts with ORPHAN_DIRECTORY where a parent cannot be followed.
+        """
+        cached = self.cache.get(index)
+        if cached is not None:
+            return cached
+        if self.names[index] is None:
+            return None, PATH_NO_NAME
+        # The entries waiting on the path of their parent, the topmost last
+        chain = [index]
+        waiting = {index}
+        while True:
+            entry = chain[-1]
+            parent = self.parents[entry]
+            base = self.cache.get(parent)
+            # The root is cached even in an MFT too short to have it
+            if base is not None and parent < self.count and self.sequences[parent] == self.parent_sequences[entry]:
+                break
+            if not 0 <= parent < self.count or self.names[parent] is None or not self.directories[parent]:
+                base = ORPHAN_DIRECTORY, PATH_ORPHAN
+                break
+            if self.sequences[parent] != self.parent_sequences[entry]:
+                base = ORPHAN_DIRECTORY, PATH_SEQUENCE_MISMATCH
+                break
+            if parent in waiting:
+                base = ORPHAN_DIRECTORY, PATH_CYCLE
+                break
+            chain.append(parent)
+            waiting.add(parent)
+
+        path, status = base
+        for entry in reversed(chain):
+            path = path + SEPARATOR + self.names[entry]
+            if entry != index or self.directories[entry]:
+                # Only the paths of directories (parents are too) are kept, for the entries below them
+                self.cache[entry] = path, status
+        return path, status
+
+    def path(self, index):
+        """The full path of an entry, or None for entries without a name."""
+        path, _ = self.resolve(index)
+        if path is None:
+            return None
+        return path or SEPARATOR
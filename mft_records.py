@@ -0,0 +1,244 @@
+import struct
+
+try:
+    import numpy as np
+except ImportError:  # Optional: only makes decoding very large MFTs faster
+    np = None
+
+# https://flatcap.github.io/linux-ntfs/ntfs/concepts/file_record.html
+DEFAULT_RECORD_SIZE = 1024
+SECTOR_SIZE = 512
+FILE_SIGNATURE = b'FILE'
+BAAD_SIGNATURE = b'BAAD'
+
+# The FILE record header fields the batch decodes, with their offsets and struct codes
+HEADER_FIELDS = (
+    ('signature', 0x00, '4s'),
+    ('usa_offset', 0x04, 'H'),
+    ('usa_count', 0x06, 'H'),
+    ('sequence', 0x10, 'H'),
+    ('link_count', 0x12, 'H'),
+    ('attribute_offset', 0x14, 'H'),
+    ('flags', 0x16, 'H'),
+    ('used_size', 0x18, 'I'),
+    ('allocated_size', 0x1C, 'I'),
+    ('base_reference', 0x20, 'Q'),
+    ('record_number', 0x2C, 'I'),
+)
+HEADER_SIZE = 0x30
+# The same fields unpacked from one record, skipping the $LogFile sequence number, next attribute id and padding
+_HEADER = struct.Struct('<4sHH8xHHHHIIQ4xI')
+
+# The status of each record
+RECORD_OK = 0
+RECORD_EMPTY = 1  # No FILE or BAAD signature: never used, or zeroed
+RECORD_BAAD = 2  # Marked by NTFS as failing its update sequence check
+RECORD_TORN = 3  # A sector does not end with the update sequence number: a torn write
+RECORD_INVALID = 4  # The update sequence or first attribute is outside the record
+RECORD_STATUS = {
+    RECORD_OK: "valid",
+    RECORD_EMPTY: "empty",
+    RECORD_BAAD: "marked BAAD by NTFS",
+    RECORD_TORN: "torn: a sector does not end with the update sequence number",
+    RECORD_INVALID: "invalid: its update sequence or first attribute is outside the record",
+}
+
+# Records whose update sequence is applied together, see MFTRecords.fixed
+FIXUP_BATCH_RECORDS = 4096
+
+FLAG_IN_USE = 0x0001
+FLAG_DIRECTORY = 0x0002
+
+
+def record_dtype(record_size):
+    """A NumPy structured dtype viewing each record_size bytes as one FILE record header."""
+    return np.dtype({
+        'names': [name for name, _, _ in HEADER_FIELDS],
+        'formats': ['S4' if code == '4s' else '<' + {'H': 'u2', 'I': 'u4', 'Q': 'u8'}[code] for _, _, code in HEADER_FIELDS],
+        'offsets': [offset for _, offset, _ in HEADER_FIELDS],
+        'itemsize': record_size,
+    })
+
+
+def record_size_of(buffer, start):
+    """The record size given by the allocated size of the FILE record at start, or the default size."""
+    if bytes(buffer[start:start + 4]) in (FILE_SIGNATURE, BAAD_SIGNATURE) and len(buffer) >= start + HEADER_SIZE:
+        size = int.from_bytes(buffer[start + 0x1C:start + 0x20], 'little')
+        if SECTOR_SIZE <= size <= 65536 and not size & (size - 1):
+            return size
+    return DEFAULT_RECORD_SIZE
+
+
+def volume_layout(boot_sector):
+    """
+    The (offset of $MFT, record size) an NTFS boot sector gives, or None if its fields make no sense.
+
+    The $MFT starts at its cluster number times the cluster size. A clusters per file record
+    value of n < 0 means records of 2^-n bytes, as records are usually smaller than a cluster.
+    """
+    if len(boot_sector) < SECTOR_SIZE:
+        return None
+    bytes_per_sector = int.from_bytes(boot_sector[0x0B:0x0D], 'little')
+    sectors_per_cluster = boot_sector[0x0D]
+    if sectors_per_cluster > 0x80:
+        sectors_per_cluster = 1 << (256 - sectors_per_cluster)  # Clusters of 2^-n sectors on large volumes
+    if not 256 <= bytes_per_sector <= 4096 or bytes_per_sector & (bytes_per_sector - 1) or not sectors_per_cluster:
+        return None
+    cluster_size = bytes_per_sector * sectors_per_cluster
+    clusters_per_record = int.from_bytes(boot_sector[0x40:0x41], 'little', signed=True)
+    if clusters_per_record < 0:
+        record_size = 1 << -clusters_per_record if clusters_per_record >= -31 else 0
+    else:
+        record_size = clusters_per_record * cluster_size
+    if not SECTOR_SIZE <= record_size <= 65536 or record_size & (record_size - 1):
+        return None
+    return int.from_bytes(boot_sector[0x30:0x38], 'little') * cluster_size, record_size
+
+
+class MFTRecords:
+    """
+    The headers of every FILE record of an MFT, decoded in bulk.
+
+    With NumPy the records are viewed in place as an array of a structured dtype,
+    so the header fields are strided columns over the mapped file; signatures and
+    the update sequence of every record are checked with array operations, grouped
+    by update sequence layout. Without NumPy the headers are unpacked one record at
+    a time. Either way, nothing about a record's attributes is read until it is
+    asked for (see fixed).
+    """
+
+    def __init__(self, buffer, start=0, record_size=DEFAULT_RECORD_SIZE):
+        """
+        :param buffer: The content of the file holding the MFT (usually its mmap).
+        :param start: The offset of the first record.
+        """
+        self.buffer = buffer
+        self.start = start
+        self.record_size = record_size
+        self.count = max(len(buffer) - start, 0) // record_size
+        self.trailing = max(len(buffer) - start, 0) - self.count * record_size
+        if np is not None:
+            self._decode_arrays()
+        else:
+            self._decode_lists()
+
+    def _decode_arrays(self):
+        count, size = self.count, self.record_size
+        headers = np.frombuffer(self.buffer, record_dtype(size), count=count, offset=self.start)
+        for name, _, _ in HEADER_FIELDS:
+            setattr(self, name, headers[name])
+        signed = (headers['signature'] == FILE_SIGNATURE) | (headers['signature'] == BAAD_SIGNATURE)
+        status = np.full(count, RECORD_EMPTY, np.uint8)
+        status[signed] = RECORD_OK
+        words = np.frombuffer(self.buffer, '<u2', count=count * size // 2, offset=self.start).reshape(count, size // 2)
+        layouts = self.usa_offset.astype(np.uint32) << 16 | self.usa_count
+        for layout in np.unique(layouts[signed]):
+            rows = np.flatnonzero(signed & (layouts == layout))
+            usa_offset, usa_count = int(layout) >> 16, int(layout) & 0xFFFF
+            if not self.valid_update_sequence(usa_offset, usa_count):
+                status[rows] = RECORD_INVALID
+                continue
+            # The last word of each sector has to be the update sequence number
+            sector_ends = np.arange(1, usa_count) * (SECTOR_SIZE // 2) - 1
+            usn = words[rows, usa_offset // 2]
+            torn = (words[rows[:, None], sector_ends] != usn[:, None]).any(axis=1)
+            status[rows[torn]] = RECORD_TORN
+        status[signed & ((self.attribute_offset < HEADER_SIZE) | (self.attribute_offset >= size))] = RECORD_INVALID
+        status[headers['signature'] == BAAD_SIGNATURE] = RECORD_BAAD
+        self.status = status
+        self._words = words
+
+    def _decode_lists(self):
+        names = [name for name, _, _ in HEADER_FIELDS]
+        columns = {name: [] for name in names}
+        status = bytearray(self.count)
+        for index in range(self.count):
+            offset = self.start + index * self.record_size
+            values = _HEADER.unpack_from(self.buffer, offset)
+            for name, value in zip(names, values):
+                columns[name].append(value)
+            signature, usa_offset, usa_count, _, _, attribute_offset = values[:6]
+            if signature == BAAD_SIGNATURE:
+                status[index] = RECORD_BAAD
+            elif signature != FILE_SIGNATURE:
+                status[index] = RECORD_EMPTY
+            elif (not self.valid_update_sequence(usa_offset, usa_count)
+                  or not HEADER_SIZE <= attribute_offset < self.record_size):
+                status[index] = RECORD_INVALID
+            else:
+                usn = self.buffer[offset + usa_offset:offset + usa_offset + 2]
+                for end in range(SECTOR_SIZE, SECTOR_SIZE * usa_count, SECTOR_SIZE):
+                    if self.buffer[offset + end - 2:offset + end] != usn:
+                        status[index] = RECORD_TORN
+                        break
+        for name in names:
+            setattr(self, name, columns[name])
+        self.status = status
+
+    def valid_update_sequence(self, usa_offset, usa_count):
+        """Whether an update sequence (number and array) fits the header and covers the record's sectors."""
+        return (not usa_offset & 1 and usa_offset >= 0x28 and 2 <= usa_count <= self.record_size // SECTOR_SIZE + 1
+                and usa_offset + 2 * usa_count <= self.record_size)
+
+    def __len__(self):
+        return self.count
+
+    def offset(self, index):
+        return self.start + index * self.record_size
+
+    def column(self, name):
+        """A header field (see HEADER_FIELDS) of every record, as a list."""
+        values = getattr(self, name)
+        return values.tolist() if np is not None else list(values)
+
+    def indices(self, status=RECORD_OK):
+        """The indices of the records with a status, in order."""
+        if np is not None:
+            return np.flatnonzero(self.status == status).tolist()
+        return [index for index, value in enumerate(self.status) if value == status]
+
+    def fixed(self, first, last):
+        """
+        The records first to last (exclusive) with their update sequence applied, as one memoryview.
+
+        The last two bytes of each sector are replaced by the values the update sequence
+        array saved for them; records that are not valid are left as they are.
+        """
+        size = self.record_size
+        if np is not None:
+            records = self._words[first:last].copy()
+            status = self.status[first:last]
+            layouts = self.usa_offset[first:last].astype(np.uint32) << 16 | self.usa_count[first:last]
+            for layout in np.unique(layouts[status == RECORD_OK]):
+                rows = np.flatnonzero((status == RECORD_OK) & (layouts == layout))
+                usa_offset, usa_count = int(layout) >> 16, int(layout) & 0xFFFF
+                sector_ends = np.arange(1, usa_count) * (SECTOR_SIZE // 2) - 1
+                saved = usa_offset // 2 + np.arange(1, usa_count)
+                records[rows[:, None], sector_ends] = records[rows[:, None], saved]
+            return memoryview(records.reshape(-1).view(np.uint8))
+        start = self.offset(first)
+        records = bytearray(self.buffer[start:start + (last - first) * size])
+        for index in range(first, last):
+            if self.status[index] != RECORD_OK:
+                continue
+            base = (index - first) * size
+            usa_offset = self.usa_offset[index]
+            for number, end in enumerate(range(SECTOR_SIZE, SECTOR_SIZE * self.usa_count[index], SECTOR_SIZE), 1):
+                saved = base + usa_offset + 2 * number
+                records[base + end - 2:base + end] = records[saved:saved + 2]
+        return memoryview(records)
+
+    def iter_valid(self, first=0, last=None):
+        """
+        Yield (index, record with its update sequence applied) for each valid record from first
+        to last (exclusive), applying the update sequences FIXUP_BATCH_RECORDS records at a time.
+        """
+        last = self.count if last is None else last
+        size = self.record_size
+        for block_start in range(first, last, FIXUP_BATCH_RECORDS):
+            block_end = min(block_start + FIXUP_BATCH_RECORDS, last)
+            fixed = self.fixed(block_start, block_end)
+            status = self.status[block_start:block_end]
+            for index in range(block_end - block_start):
+                if status[index] == RECORD_OK:
+                    yield block_start + index, fixed[index * size:(index + 1) * size]
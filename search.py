@@ -0,0 +1,174 @@
+import re
+from array import array
+from itertools import compress
+
+try:
+    import numpy as np
+except ImportError:  # Optional: only makes very broad searches faster
+    np = None
+
+GRAM_SIZE = 3
+# Bytes scanned between checks for cancellation in a byte search
+CHUNK_SIZE = 16 * 1024 * 1024
+# Longest regex match guaranteed to be found across a chunk boundary
+MAX_REGEX_MATCH = 4096
+BYTE_SEARCH_MODES = ("Hex", "ASCII", "UTF-16LE", "Regex")
+
+
+class SearchIndex:
+    """
+    An incremental substring index over the Name and Value columns of the sequence rows.
+
+    Rows with identical text share one entry, and every distinct text is indexed
+    by its trigrams, so a search only verifies the texts that contain all the
+    trigrams of the term. A term that extends the previous one narrows the
+    previous result instead of starting over, which is what typing does.
+    """
+
+    def __init__(self):
+        self.texts = []  # Distinct lowercased "name\0value" strings
+        self.text_ids = {}
+        self.rows_by_text = []  # Text id -> array of row ids
+        self.row_texts = array('I')  # Row id -> text id
+        self.grams = {}  # Trigram -> array of text ids
+        self.last_term = None
+        self.last_texts = None
+        self.last_rows = None
+
+    def __len__(self):
+        return len(self.row_texts)
+
+    def add(self, name, value):
+        """
+        Index the next row and return its row id.
+
+        :param name: The Name column of the row.
+        :param value: The Value column of the row.
+        """
+        row = len(self.row_texts)
+        text = f"{'' if name is None else name}\0{value}".lower()
+        text_id = self.text_ids.get(text)
+        if text_id is None:
+            text_id = self.text_ids[text] = len(self.texts)
+            self.texts.append(text)
+            self.rows_by_text.append(array('I'))
+            for gram in {text[i:i + GRAM_SIZE] for i in range(len(text) - GRAM_SIZE + 1)}:
+                postings = self.grams.get(gram)
+                if postings is None:
+                    postings = self.grams[gram] = array('I')
+                postings.append(text_id)
+        # The cached result does not know about the new row
+        self.last_term = None
+        self.rows_by_text[text_id].append(row)
+        self.row_texts.append(text_id)
+        return row
+
+    def matches(self, row, term):
+        """
+        Return True if the row contains term (already lowercased).
+        """
+        return term in self.texts[self.row_texts[row]]
+
+    def search(self, term):
+        """
+        Return the ids of the rows containing term, in row order.
+
+        :param term: The search term; matching is case-insensitive.
+        """
+        term = term.lower()
+        if not term:
+            return range(len(self.row_texts))
+        if self.last_term is not None and self.last_term in term:
+            candidates = self.last_texts
+        elif len(term) >= GRAM_SIZE:
+            postings = sorted((self.grams.get(term[i:i + GRAM_SIZE], ()) for i in range(len(term) - GRAM_SIZE + 1)), key=len)
+            candidates = set(postings[0]).intersection(*postings[1:])
+        else:
+            candidates = range(len(self.texts))
+        texts = self.texts
+        matching = [text_id for text_id in candidates if term in texts[text_id]]
+        if candidates is self.last_texts and len(matching) == len(candidates):
+            # Typing narrowed the term without dropping any text, so neither did the rows
+            self.last_term = term
+            return self.last_rows
+        self.last_term, self.last_texts = term, matching
+        self.last_rows = self.select_rows(matching)
+        return self.last_rows
+
+    def select_rows(self, text_ids):
+        """
+        Return the ids of the rows whose text is one of text_ids, in row order.
+        """
+        if len(text_ids) < 64:
+            return sorted(row for text_id in text_ids for row in self.rows_by_text[text_id])
+        # Many texts: select the rows through a mask in one pass, which keeps row order
+        mask = bytearray(len(self.texts))
+        for text_id in text_ids:
+            mask[text_id] = 1
+        rows = array('I')
+        if np is not None:
+            selected = np.flatnonzero(np.frombuffer(mask, np.uint8)[np.frombuffer(self.row_texts, np.uint32)])
+            rows.frombytes(selected.astype(np.uint32).tobytes())
+        else:
+            rows.extend(compress(range(len(self.row_texts)), map(mask.__getitem__, self.row_texts)))
+        return rows
+
+
+def byte_pattern(text, mode):
+    """
+    Compile the text a user searches for into a bytes regex.
+
+    :param text: The search text, e.g. "53 51 4C 69" in Hex mode.
+    :param mode: One of BYTE_SEARCH_MODES.
+    :return: A compiled pattern and the longest match it can produce.
+    :raises ValueError: If text is not valid for the mode.
+    """
+    if mode == "Regex":
+        try:
+            return re.compile(text.encode("utf-8"), re.DOTALL), MAX_REGEX_MATCH
+        except re.error as e:
+            raise ValueError(f"Invalid regex: {e}") from e
+    if mode == "Hex":
+        needle = bytes.fromhex("".join(text.split()))
+    elif mode == "ASCII":
+        needle = text.encode("latin-1")
+    elif mode == "UTF-16LE":
+        needle = text.encode("utf-16-le")
+    else:
+        raise ValueError(f"Unknown search mode: {mode}")
+    if not needle:
+        raise ValueError("Nothing to search for")
+    return re.compile(re.escape(needle)), len(needle)
+
+
+def iter_byte_hits(source, pattern, max_match, cancel=None, chunk_size=CHUNK_SIZE):
+    """
+    Yield a list of (start, end) hits per chunk of source, in file order.
+
+    The pattern runs directly on the buffer, so an mmap of a multi-GB file is
+    paged in as it is scanned rather than read into memory. Each chunk is
+    searched a little past its end so matches of up to max_match bytes that
+    straddle a boundary are still found, exactly once.
+
+    :param source: An mmap or bytes-like object.
+    :param pattern: A compiled bytes pattern, see byte_pattern.
+    :param max_match: The longest match that must be found across chunks.
+    :param cancel: Optional threading.Event that stops the search between chunks.
+    :param chunk_size: Bytes scanned per chunk.
+    """
+    size = len(source)
+    resume = 0  # End of the last hit; the next one may not overlap it
+    for chunk_start in range(0, size, chunk_size):
+        if cancel is not None and cancel.is_set():
+            return
+        chunk_end = min(size, chunk_start + chunk_size)
+        hits = []
+        for match in pattern.finditer(source, max(chunk_start, resume), min(size, chunk_end + max_match)):
+            start, end = match.span()
+            if start >= chunk_end:
+                break
+            if start == end:
+                continue  # Empty regex matches do not point at anything
+            hits.append((start, end))
+            resume = end
+        yield hits
@@ -0,0 +1,234 @@
+import re
+from collections import namedtuple
+
+from sqlite_record import Column, column_definitions, read_varint, serial_type_length, serial_value
+
+# https://www.sqlite.org/datatype3.html#determination_of_column_affinity
+# Serial types each column affinity is stored as, as a regular expression over the
+# varint. Integers and floats are serial types 0 to 9; TEXT and BLOB values are 12 and
+# up and need a second or third byte once they are longer than 57 or 8185 bytes.
+_NUMBER = rb'[\x00-\x09]'
+_STRING = rb'[\x00\x0c-\x7f]|[\x81-\xff][\x80-\xff]?[\x00-\x7f]'
+_ANY = rb'[\x00-\x09\x0c-\x7f]|[\x81-\xff][\x80-\xff]?[\x00-\x7f]'
+AFFINITY_PATTERNS = {
+    "INTEGER": _NUMBER,
+    "REAL": _NUMBER,
+    "TEXT": _STRING,
+    "BLOB": _ANY,
+    "NUMERIC": _ANY,
+    # The INTEGER PRIMARY KEY is the rowid, and the record stores NULL instead
+    "ROWID": rb'\x00',
+}
+_TYPE_END = ("CONSTRAINT", "PRIMARY", "NOT", "NULL", "UNIQUE", "CHECK", "DEFAULT", "COLLATE", "REFERENCES",
+             "GENERATED", "AS")
+
+# A table a record can be carved for: its name, column names and column affinities
+TableSchema = namedtuple('TableSchema', 'name columns affinities')
+# A record found in unallocated space; columns are Columns with offsets into the scanned buffer
+CarvedRecord = namedtuple('CarvedRecord', 'table offset header_end end columns')
+
+
+def column_affinity(definition):
+    """
+    The affinity of a column from the rest of its definition (see sqlite_record.column_definitions),
+    or ROWID for the INTEGER PRIMARY KEY.
+    """
+    words = definition.upper().replace('(', ' ').split()
+    declared = []
+    for word in words:
+        if word in _TYPE_END:
+            break
+        declared.append(word)
+    declared = ' '.join(declared)
+    if declared == "INTEGER" and "PRIMARY KEY" in ' '.join(words) and "DESC" not in words:
+        return "ROWID"
+    if "INT" in declared:
+        return "INTEGER"
+    if "CHAR" in declared or "CLOB" in declared or "TEXT" in declared:
+        return "TEXT"
+    if "BLOB" in declared or not declared:
+        return "BLOB"
+    if "REAL" in declared or "FLOA" in declared or "DOUB" in declared:
+        return "REAL"
+    return "NUMERIC"
+
+
+def rowid_alias(sql):
+    """
+    The index of the column of a CREATE TABLE statement that is an alias for the rowid (its
+    INTEGER PRIMARY KEY), or None. Records store NULL for it, and the cell holds the value as its rowid.
+    """
+    for index, (_, definition) in enumerate(column_definitions(sql) or ()):
+        if column_affinity(definition) == "ROWID":
+            return index
+    return None
+
+
+def table_schema(name, sql):
+    """The TableSchema of a CREATE TABLE statement, or None for tables records cannot be carved for."""
+    definitions = column_definitions(sql)
+    if not definitions:
+        return None
+    return TableSchema(name, [column for column, _ in definitions],
+                       [column_affinity(definition) for _, definition in definitions])
+
+
+def freeblocks(page, header_start, usable_size):
+    """
+    Yield (offset, size) of each freeblock of a B-tree page, following the chain from the
+    page header. Offsets are relative to the page; the chain stops at freeblocks that
+    are out of order or do not fit in the page.
+
+    The first four bytes of a freeblock hold the offset of the next one and its size, and
+    overwrite the start of the cell that was deleted. The rest is left as it was.
+    """
+    offset = int.from_bytes(page[header_start + 1:header_start + 3], 'big')
+    while offset:
+        if offset + 4 > usable_size:
+            return
+        size = int.from_bytes(page[offset + 2:offset + 4], 'big')
+        if size < 4 or offset + size > usable_size:
+            return
+        yield offset, size
+        next_offset = int.from_bytes(page[offset:offset + 2], 'big')
+        # Freeblocks are kept in order of offset, which also stops cycles
+        if next_offset and next_offset < offset + size:
+            return
+        offset = next_offset
+
+
+class RecordCarver:
+    """
+    Finds deleted records of known tables in unallocated bytes.
+
+    The column affinities of each table are compiled into one regular expression
+    over the record header (its size, then a serial type per column), so candidates
+    are found by the regex engine rather than byte by byte in Python. A candidate is
+    kept if its header size agrees with its serial types, its body fits in the region,
+    its text decodes and not all of its columns are NULL.
+    """
+
+    def __init__(self, tables, encoding="utf-8"):
+        """
+        :param tables: TableSchemas, in the order they are tried in.
+        """
+        self.tables = [table for table in tables if table is not None]
+        self.encoding = encoding
+        self.patterns = {}  # Table names -> compiled pattern, see pattern
+        self.headless_patterns = {}  # (table index, leading columns overwritten) -> compiled pattern
+
+    def pattern(self, names=None):
+        """The pattern matching record headers of the tables named, or of every table."""
+        key = tuple(names) if names is not None else None
+        pattern = self.patterns.get(key)
+        if pattern is None:
+            alternatives = []
+            for index, table in enumerate(self.tables):
+                if names is not None and table.name not in names:
+                    continue
+                columns = b''.join(b'(?:' + AFFINITY_PATTERNS[affinity] + b')' for affinity in table.affinities)
+                # Header sizes are one byte for the column counts of a table
+                alternatives.append(b'(?P<t%d>[\x02-\x7f]' % index + columns + b')')
+            if not alternatives:
+                return None
+            # A lookahead, so candidates that overlap each other are all tried
+            pattern = self.patterns[key] = re.compile(b'(?=' + b'|'.join(alternatives) + b')', re.DOTALL)
+        return pattern
+
+    def headless_pattern(self, index, skip):
+        """The pattern of the serial types of a table after the first skip, without the header size."""
+        pattern = self.headless_patterns.get((index, skip))
+        if pattern is None:
+            affinities = self.tables[index].affinities[skip:]
+            columns = b''.join(b'(?:' + AFFINITY_PATTERNS[affinity] + b')' for affinity in affinities)
+            pattern = self.headless_patterns[index, skip] = re.compile(columns, re.DOTALL)
+        return pattern
+
+    def carve_freeblock(self, buffer, start, end, names=None):
+        """
+        Like carve, for the freeblock at buffer[start:end].
+
+        The freeblock header takes the first four bytes of the deleted cell: its payload
+        size and rowid and, when those are shorter than four bytes, the record header size
+        and even the serial type of a leading INTEGER PRIMARY KEY (always NULL). A record
+        whose serial types start right after the freeblock header is tried first.
+        """
+        start += 4
+        for index, table in enumerate(self.tables):
+            if names is not None and table.name not in names:
+                continue
+            skips = (0, 1) if table.affinities[0] == "ROWID" else (0,)
+            record = None
+            for skip in skips:
+                if self.headless_pattern(index, skip).match(buffer, start, end):
+                    record = self.validate(buffer, start, end, table, skip)
+                    if record is not None:
+                        break
+            if record is not None:
+                yield record
+                start = record.end
+                break
+        yield from self.carve(buffer, start, end, names)
+
+    def carve(self, buffer, start, end, names=None):
+        """
+        Yield the CarvedRecords in buffer[start:end], in order of offset and without overlaps.
+
+        :param names: The names of the tables the records may belong to, or None for any table.
+        """
+        pattern = self.pattern(names)
+        if pattern is None:
+            return
+        resume = start
+        for match in pattern.finditer(buffer, start, end):
+            offset = match.start()
+            if offset < resume:
+                continue
+            table = self.tables[int(match.lastgroup[1:])]
+            record = self.validate(buffer, offset, end, table)
+            if record is not None:
+                yield record
+                resume = record.end
+
+    def validate(self, buffer, offset, end, table, skip=None):
+        """
+        The CarvedRecord of table at buffer[offset:end], or None if the bytes there are not one.
+
+        :param skip: None if the record starts with its header size. Otherwise the header size
+            and the (NULL) serial types of the first skip columns were overwritten, and the
+            serial types of the other columns start at offset.
+        """
+        count = len(table.columns)
+        if skip is None:
+            header_end = offset + buffer[offset]
+            pos = offset + 1
+            serial_types = []
+        else:
+            header_end = end
+            pos = offset
+            serial_types = [0] * skip
+        while pos < header_end and len(serial_types) < count:
+            serial_type, pos = read_varint(buffer, pos)
+            serial_types.append(serial_type)
+        if skip is not None:
+            header_end = pos
+        if pos != header_end or len(serial_types) != count:
+            return None
+        columns = []
+        body = header_end
+        for serial_type in serial_types:
+            length = serial_type_length(serial_type)
+            if body + length > end:
+                return None
+            if serial_type >= 12 and serial_type & 1:
+                try:
+                    value = str(buffer[body:body + length], self.encoding)
+                except UnicodeDecodeError:
+                    return None
+            else:
+                value = serial_value(buffer, body, serial_type, self.encoding)
+            columns.append(Column(body, length, serial_type, value))
+            body += length
+        if all(column.serial_type == 0 for column in columns):
+            return None
+        return CarvedRecord(table, offset, header_end, body, columns)
@@ -0,0 +1,168 @@
+from collections import OrderedDict
+
+# Pages kept by a PageReader that reads through the file object (4 MiB of 4 KiB pages)
+DEFAULT_CACHE_PAGES = 1024
+
+
+class PageReader:
+    """
+    Page-addressed reads from a SQLite database.
+
+    When the file is memory-mapped, get_page returns zero-copy memoryviews of
+    the mapping and the operating system does the caching. Otherwise pages are
+    read through the file object and the most recently used ones are kept in a
+    bounded LRU cache, so following B-tree children, overflow chains and
+    freelist trunks does not read the same page over and over.
+
+    With a write-ahead log, the pages it has a committed version of are read
+    from the log instead, as SQLite itself would.
+    """
+
+    def __init__(self, file, page_size, source=None, cache_size=DEFAULT_CACHE_PAGES, wal=None):
+        """
+        :param file: The open database file.
+        :param page_size: The page size from the database header.
+        :param source: The file's mmap (or bytes), if there is one.
+        :param cache_size: The number of pages cached when reading through the file object.
+        :param wal: A sqlite_wal.WALIndex of the database's log, to read the pages in it from.
+        """
+        self.file = file
+        self.page_size = page_size
+        self.source = source
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        if source is not None:
+            self.size = len(source)
+        else:
+            file.seek(0, 2)
+            self.size = file.tell()
+        self.page_count = self.size // page_size
+        self.wal = wal
+        if wal is not None and wal.database_size:
+            self.page_count = wal.database_size
+
+    def page_offset(self, page_number):
+        return (page_number - 1) * self.page_size
+
+    def get_page(self, page_number):
+        """
+        Return the content of a page as a memoryview (mapped files) or bytes.
+
+        :raises IndexError: If the page is not in the file.
+        """
+        if not 1 <= page_number <= self.page_count:
+            raise IndexError(f"Page {page_number} is not in the file ({self.page_count} pages)")
+        if self.wal is not None:
+            page = self.wal.page(page_number)
+            if page is not None:
+                return page
+        start = (page_number - 1) * self.page_size
+        if self.source is not None:
+            return memoryview(self.source)[start:start + self.page_size]
+        page = self.cache.get(page_number)
+        if page is not None:
+            self.hits += 1
+            self.cache.move_to_end(page_number)
+            return page
+        self.misses += 1
+        self.file.seek(start)
+        page = self.file.read(self.page_size)
+        self.cache[page_number] = page
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return page
+
+    def iter_overflow(self, page_number, remaining, usable_size):
+        """
+        Yield (page number, content) for the chain of overflow pages holding the remaining
+        bytes of a payload, one page at a time. The chain stops at pages that do not exist
+        or were already part of it.
+        """
+        seen = set()
+        while page_number and remaining > 0 and page_number not in seen and 1 <= page_number <= self.page_count:
+            seen.add(page_number)
+            page = self.get_page(page_number)
+            length = min(remaining, usable_size - 4)
+            yield page_number, page[4:4 + length]
+            remaining -= length
+            page_number = int.from_bytes(page[:4], 'big')
+
+
+class Payload:
+    """
+    A cell payload whose tail is on overflow pages, read on demand.
+
+    Reading a range only touches the pages it covers (and the first four bytes
+    of the pages before it, to follow the chain), so the columns of a record can
+    be decoded without concatenating a multi-MB BLOB that is not needed.
+    """
+
+    def __init__(self, pages, local, overflow_page, size, usable_size):
+        """
+        :param pages: The PageReader of the database.
+        :param local: The part of the payload stored in the cell.
+        :param overflow_page: The first overflow page.
+        :param size: The size of the whole payload.
+        :param usable_size: The usable size of a page.
+        """
+        self.pages = pages
+        self.local = local
+        self.size = size
+        self.usable_size = usable_size
+        self.overflow_page = overflow_page
+        self.chunk_starts = [len(local)]  # Payload offset of each overflow page's content
+        self.chunk_pages = [overflow_page]
+        self.complete = False  # Whether chunk_pages holds the whole chain
+
+    def __len__(self):
+        return self.size
+
+    def _chunk(self, index):
+        """Find the page of the index-th overflow chunk, following the chain as far as needed."""
+        pages = self.pages
+        seen = None
+        while index >= len(self.chunk_pages) and not self.complete:
+            page_number = self.chunk_pages[-1]
+            start = self.chunk_starts[-1]
+            next_start = start + self.usable_size - 4
+            next_page = int.from_bytes(pages.get_page(page_number)[:4], 'big')
+            if seen is None:
+                seen = set(self.chunk_pages)
+            if next_start >= self.size or not 1 <= next_page <= pages.page_count or next_page in seen:
+                self.complete = True
+                break
+            seen.add(next_page)
+            self.chunk_starts.append(next_start)
+            self.chunk_pages.append(next_page)
+        return self.chunk_pages[index] if index < len(self.chunk_pages) else None
+
+    def read(self, start, length):
+        """Return length bytes of the payload from start, fewer if the chain is broken."""
+        end = min(start + length, self.size)
+        local_size = len(self.local)
+        parts = []
+        if start < local_size:
+            parts.append(self.local[start:min(end, local_size)])
+            start = local_size
+        chunk_size = self.usable_size - 4
+        while start < end:
+            index = (start - local_size) // chunk_size
+            page_number = self._chunk(index)
+            if page_number is None or not 1 <= page_number <= self.pages.page_count:
+                break
+            chunk_start = local_size + index * chunk_size
+            page = self.pages.get_page(page_number)
+            piece = page[4 + start - chunk_start:4 + min(end, chunk_start + chunk_size) - chunk_start]
+            if not piece:
+                break
+            parts.append(piece)
+            start += len(piece)
+        return b''.join(parts)
+
+    def chunks(self):
+        """Yield the payload piece by piece: the local part, then each overflow page's content."""
+        yield self.local
+        for _, content in self.pages.iter_overflow(self.overflow_page, self.size - len(self.local), self.usable_size):
+            yield content
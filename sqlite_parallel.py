@@ -0,0 +1,53 @@
+import mmap
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from sqlite_pages import PageReader
+from sqlite_record import decode_btree_page
+
+# Ranges per worker, so workers that finish early pick up more
+CHUNKS_PER_WORKER = 4
+MIN_CHUNK_PAGES = 64
+
+# The PageReader of a worker process, opened once by _open_database
+_pages = None
+
+
+def _open_database(path, page_size):
+    global _pages
+    file = open(path, "rb")
+    _pages = PageReader(file, page_size, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ))
+
+
+def _decode_range(first_page, last_page, usable_size, encoding, max_blob):
+    decoded = []
+    for page_number in range(first_page, last_page):
+        cells = decode_btree_page(_pages, page_number, usable_size, encoding, max_blob)
+        if cells is not None:
+            decoded.append((page_number, cells))
+    return decoded
+
+
+def decode_pages_in_parallel(path, page_size, page_count, usable_size, encoding="utf-8", max_blob=None, workers=None):
+    """
+    Decode the cells of every B-tree page of a database in worker processes.
+
+    The page range is split into chunks and each worker maps the file itself, so
+    only the decoded cells (see sqlite_record.decode_btree_page) are sent back.
+    Pages that merely look like B-tree pages are decoded as well; the parser only
+    uses the ones its walk from sqlite_master reaches.
+
+    :param path: The path of the database file.
+    :param workers: The number of processes, or None for one per CPU.
+    :return: A dict of page number -> cells.
+    """
+    workers = workers or os.cpu_count() or 1
+    chunk_pages = max(MIN_CHUNK_PAGES, -(-page_count // (workers * CHUNKS_PER_WORKER)))
+    with ProcessPoolExecutor(workers, initializer=_open_database, initargs=(path, page_size)) as pool:
+        futures = [pool.submit(_decode_range, first_page, min(first_page + chunk_pages, page_count + 1),
+                               usable_size, encoding, max_blob)
+                   for first_page in range(1, page_count + 1, chunk_pages)]
+        decoded = {}
+        for future in futures:
+            decoded.update(future.result())
+    return decoded
@@ -0,0 +1,585 @@
+import struct
+from collections import namedtuple
+
+from sqlite_pages import Payload
+
+# https://www.sqlite.org/fileformat.html#record_format
+
+# Bytes in the body of the serial types below 12; 10 and 11 are reserved and take none
+SERIAL_LENGTHS = (0, 1, 2, 3, 4, 6, 8, 8, 0, 0, 0, 0)
+SERIAL_TYPE_NAMES = ("NULL", "8-bit integer", "16-bit integer", "24-bit integer", "32-bit integer",
+                     "48-bit integer", "64-bit integer", "float", "integer 0", "integer 1", "reserved", "reserved")
+TEXT_ENCODINGS = {1: "utf-8", 2: "utf-16-le", 3: "utf-16-be"}
+
+INTERIOR_INDEX_PAGE = 0x02
+INTERIOR_TABLE_PAGE = 0x05
+LEAF_INDEX_PAGE = 0x0A
+LEAF_TABLE_PAGE = 0x0D
+BTREE_PAGES = (INTERIOR_INDEX_PAGE, INTERIOR_TABLE_PAGE, LEAF_INDEX_PAGE, LEAF_TABLE_PAGE)
+# Interior pages start each cell with the page number of its left child
+INTERIOR_PAGES = (INTERIOR_INDEX_PAGE, INTERIOR_TABLE_PAGE)
+
+_FLOAT = struct.Struct('>d').unpack_from
+# Struct codes of the integer serial types; 24 and 48-bit integers are unpacked as bytes and converted
+_INTEGER_CODES = (None, 'b', 'h', '3s', 'i', '6s', 'q')
+_TEXT = object()
+_INTEGER = object()
+
+# Compiled record layouts by header bytes, see record_plan
+_PLANS = {}
+MAX_PLANS = 4096
+
+# A column of a record: where its value is, how it is stored and the value itself
+Column = namedtuple('Column', 'offset length serial_type value')
+
+# A B-tree cell decoded by decode_cell, with offsets relative to its page. Fields the page type
+# does not have are None. record is None without a local payload, False if the record header
+# cannot be read, and (header end, Columns, values completed from the overflow pages or None) otherwise.
+CellLayout = namedtuple('CellLayout', 'offset end left_child payload_size_start payload_size rowid_start rowid '
+                                      'payload_start local_size overflow_page record')
+# A cell whose header or payload runs past the end of its page
+CorruptCell = namedtuple('CorruptCell', 'offset message')
+
+
+def read_varint(buffer, pos):
+    """
+    Read a SQLite variable-length integer at pos and return (value, position after it).
+
+    Up to nine bytes, big-endian: seven bits from each byte with the high bit set and all eight of the ninth.
+    """
+    byte = buffer[pos]
+    if byte < 0x80:
+        return byte, pos + 1
+    value = byte & 0x7F
+    for index in range(1, 8):
+        byte = buffer[pos + index]
+        value = (value << 7) | (byte & 0x7F)
+        if byte < 0x80:
+            return value, pos + index + 1
+    return (value << 8) | buffer[pos + 8], pos + 9
+
+
+def serial_type_length(serial_type):
+    if serial_type >= 12:
+        return (serial_type - 12) >> 1
+    return SERIAL_LENGTHS[serial_type]
+
+
+def describe_serial_type(serial_type):
+    if serial_type >= 12:
+        kind = "BLOB" if serial_type % 2 == 0 else "text"
+        return f"{kind} of {serial_type_length(serial_type)} bytes"
+    return SERIAL_TYPE_NAMES[serial_type]
+
+
+def serial_value(buffer, offset, serial_type, encoding):
+    """Decode the value of a column stored as serial_type at buffer[offset:]."""
+    if serial_type >= 12:
+        length = (serial_type - 12) >> 1
+        data = buffer[offset:offset + length]
+        if serial_type & 1:
+            return str(data, encoding, 'replace')
+        return bytes(data)
+    if serial_type == 0 or serial_type >= 10:
+        return None
+    if serial_type >= 8:
+        return serial_type - 8
+    if serial_type == 7:
+        return _FLOAT(buffer, offset)[0]
+    return int.from_bytes(buffer[offset:offset + SERIAL_LENGTHS[serial_type]], 'big', signed=True)
+
+
+def record_header(buffer, start, end):
+    """
+    Read the header of the record at buffer[start:end].
+
+    Returns the serial types of its columns and the offset of the record body.
+    """
+    header_size, pos = read_varint(buffer, start)
+    header_end = min(start + header_size, end)
+    serial_types = []
+    while pos < header_end:
+        serial_type, pos = read_varint(buffer, pos)
+        serial_types.append(serial_type)
+    return serial_types, header_end
+
+
+def record_columns(buffer, start, end, encoding="utf-8"):
+    """
+    Decode the record at buffer[start:end] into Columns with absolute offsets.
+
+    Columns that do not fit before end (because the rest of the payload is on
+    overflow pages) are returned with the part that does fit and a value of None.
+    Returns the end of the record header and the columns.
+    """
+    serial_types, header_end = record_header(buffer, start, end)
+    offset = header_end
+    columns = []
+    for serial_type in serial_types:
+        length = serial_type_length(serial_type)
+        if offset + length > end:
+            columns.append(Column(offset, max(0, end - offset), serial_type, None))
+            offset = end
+        else:
+            columns.append(Column(offset, length, serial_type, serial_value(buffer, offset, serial_type, encoding)))
+            offset += length
+    return header_end, columns
+
+
+def record_plan(serial_types):
+    """
+    Compile the serial types of a record header into a struct and the fix-ups its values need.
+
+    Records of a table mostly repeat the same few headers, so plans are cached by header bytes.
+    """
+    formats = ['>']
+    fixups = []  # (column index, TEXT, INTEGER or the constant value of the column)
+    for index, serial_type in enumerate(serial_types):
+        if serial_type >= 12:
+            formats.append(f"{(serial_type - 12) >> 1}s")
+            if serial_type & 1:
+                fixups.append((index, _TEXT))
+        elif serial_type == 7:
+            formats.append('d')
+        elif 1 <= serial_type <= 6:
+            formats.append(_INTEGER_CODES[serial_type])
+            if _INTEGER_CODES[serial_type].endswith('s'):
+                fixups.append((index, _INTEGER))
+        else:
+            formats.append('0s')
+            fixups.append((index, serial_type - 8 if serial_type in (8, 9) else None))
+    return struct.Struct(''.join(formats)), fixups
+
+
+def decode_record(payload, encoding="utf-8", start=0, end=None):
+    """
+    Decode a whole record (the payload of a table or index cell) into its column values.
+
+    This is the hot path of a table scan: the record body is unpacked with one
+    cached struct per distinct header (see record_plan) instead of column by column.
+    Columns cut off by the end of payload are left out.
+    """
+    end = len(payload) if end is None else end
+    header_size = payload[start]
+    if header_size < 0x80:
+        pos = start + 1
+    else:
+        header_size, pos = read_varint(payload, start)
+    body = start + header_size
+    header = bytes(payload[pos:body])
+    plan = _PLANS.get(header)
+    if plan is None:
+        serial_types = header
+        if header and max(header) >= 0x80:
+            serial_types = record_header(payload, start, end)[0]
+        if len(_PLANS) >= MAX_PLANS:
+            _PLANS.clear()
+        plan = _PLANS[header] = record_plan(serial_types)
+    layout, fixups = plan
+    if body + layout.size > end:
+        return _decode_truncated(payload, encoding, start, end)
+    values = list(layout.unpack_from(payload, body))
+    for index, fixup in fixups:
+        if fixup is _TEXT:
+            values[index] = str(values[index], encoding, 'replace')
+        elif fixup is _INTEGER:
+            values[index] = int.from_bytes(values[index], 'big', signed=True)
+        else:
+            values[index] = fixup
+    return values
+
+
+def _decode_truncated(payload, encoding, start, end):
+    """The columns of a record that fit before end, for records cut short."""
+    _, columns = record_columns(payload, start, end, encoding)
+    values = []
+    for column in columns:
+        if column.length < serial_type_length(column.serial_type):
+            break
+        values.append(column.value)
+    return values
+
+
+def local_payload_size(payload_size, usable_size, table_leaf):
+    """
+    The part of a payload stored in the cell itself; the rest goes to overflow pages.
+
+    See https://www.sqlite.org/fileformat.html#cellformat
+    """
+    max_local = usable_size - 35 if table_leaf else (usable_size - 12) * 64 // 255 - 23
+    if payload_size <= max_local:
+        return payload_size
+    min_local = (usable_size - 12) * 32 // 255 - 23
+    local = min_local + (payload_size - min_local) % (usable_size - 4)
+    return local if local <= max_local else min_local
+
+
+def decode_payload(payload, encoding="utf-8", max_blob=None):
+    """
+    Decode the record in a sqlite_pages.Payload, which continues on overflow pages.
+
+    Columns are read one range at a time rather than from one concatenated copy of
+    the payload, and BLOBs longer than max_blob are returned as None without their
+    pages being read at all. Columns the payload is too short for are left out.
+    """
+    size = len(payload)
+    header_size, _ = read_varint(payload.read(0, 9), 0)
+    serial_types, body = record_header(payload.read(0, header_size), 0, header_size)
+    values = []
+    for serial_type in serial_types:
+        length = serial_type_length(serial_type)
+        if body + length > size:
+            break
+        if max_blob is not None and serial_type >= 12 and serial_type % 2 == 0 and length > max_blob:
+            values.append(None)
+        else:
+            data = payload.read(body, length)
+            if len(data) < length:
+                break
+            values.append(serial_value(data, 0, serial_type, encoding))
+        body += length
+    return values
+
+
+def decode_cell(page, page_type, offset, usable_size, encoding="utf-8", pages=None, max_blob=None):
+    """
+    Decode the cell at page[offset:] of a B-tree page of page_type.
+
+    The values of a record that continues on overflow pages are completed through
+    pages (a sqlite_pages.PageReader) when it is given, see decode_payload.
+    Returns a CellLayout, or a CorruptCell if the cell runs past the end of the page.
+    """
+    pos = offset
+    left_child = payload_size = rowid = None
+    try:
+        if page_type in INTERIOR_PAGES:
+            left_child = int.from_bytes(page[pos:pos + 4], 'big')
+            pos += 4
+        payload_size_start = pos
+        if page_type != INTERIOR_TABLE_PAGE:
+            payload_size, pos = read_varint(page, pos)
+        rowid_start = pos
+        if page_type in (INTERIOR_TABLE_PAGE, LEAF_TABLE_PAGE):
+            rowid, pos = read_varint(page, pos)
+    except IndexError:
+        pos = usable_size + 1
+    if pos > usable_size:
+        return CorruptCell(offset, "Corrupt cell: its header runs past the end of the page")
+
+    local_size = local_payload_size(payload_size, usable_size, page_type == LEAF_TABLE_PAGE) if payload_size is not None else 0
+    end = pos + local_size
+    overflow_page = None
+    if payload_size is not None and local_size < payload_size:
+        overflow_page = int.from_bytes(page[end:end + 4], 'big')
+        end += 4
+    if end > usable_size:
+        return CorruptCell(offset, f"Corrupt cell: its payload of {payload_size} bytes runs past the end of the page")
+
+    record = None
+    if local_size:
+        try:
+            header_end, columns = record_columns(page, pos, pos + local_size, encoding)
+            values = None
+            if overflow_page is not None and pages is not None:
+                payload = Payload(pages, page[pos:pos + local_size], overflow_page, payload_size, usable_size)
+                values = decode_payload(payload, encoding, max_blob)
+            record = (header_end, columns, values)
+        except IndexError:
+            record = False
+    return CellLayout(offset, end, left_child, payload_size_start, payload_size, rowid_start, rowid,
+                      pos, local_size, overflow_page, record)
+
+
+def decode_btree_page(pages, page_number, usable_size, encoding="utf-8", max_blob=None):
+    """
+    Decode the cells of a B-tree page in cell pointer order, skipping the pointers
+    that point outside the page or into the cell pointer array.
+
+    This only depends on the page itself (and its overflow pages), so pages can be
+    decoded in any order, or in other processes (see sqlite_parallel).
+    Returns a list of CellLayout and CorruptCell, or None if the page is not a B-tree page.
+    """
+    page = pages.get_page(page_number)
+    header_start = 100 if page_number == 1 else 0
+    page_type = page[header_start]
+    if page_type not in BTREE_PAGES:
+        return None
+    pointers_start = header_start + (12 if page_type in INTERIOR_PAGES else 8)
+    # The cell pointer array has to fit in the page
+    cell_count = min(int.from_bytes(page[header_start + 3:header_start + 5], 'big'), (usable_size - pointers_start) // 2)
+    pointers_end = pointers_start + 2 * cell_count
+    return [decode_cell(page, page_type, pointer, usable_size, encoding, pages, max_blob)
+            for pointer in struct.unpack_from(f'>{cell_count}H', page, pointers_start)
+            if pointers_end <= pointer < usable_size]
+
+
+def decode_leaf_table_page(pages, page_number, usable_size, encoding="utf-8"):
+    """
+    Decode every cell of a table leaf page in one pass.
+
+    Like decode_btree_page, cell pointers outside the page or into the cell pointer
+    array are skipped, and so are cells whose header or payload runs past the end of
+    the page.
+
+    :param pages: A sqlite_pages.PageReader over the database.
+    :return: A list of (rowid, values), with overflowing payloads read from their overflow pages.
+    """
+    page = pages.get_page(page_number)
+    header_start = 100 if page_number == 1 else 0
+    pointers_start = header_start + 8
+    # The cell pointer array has to fit in the page
+    cell_count = min(int.from_bytes(page[header_start + 3:header_start + 5], 'big'), (usable_size - pointers_start) // 2)
+    pointers_end = pointers_start + 2 * cell_count
+    pointers = struct.unpack_from(f'>{cell_count}H', page, pointers_start)
+    max_local = usable_size - 35
+    rows = []
+    for pos in pointers:
+        if not pointers_end <= pos < usable_size:
+            continue
+        try:
+            payload_size = page[pos]
+            if payload_size < 0x80:
+                pos += 1
+            else:
+                payload_size, pos = read_varint(page, pos)
+            rowid, pos = read_varint(page, pos)
+            if payload_size <= max_local:
+                if pos + payload_size <= usable_size:
+                    rows.append((rowid, decode_record(page, encoding, pos, pos + payload_size)))
+                continue
+            local_size = local_payload_size(payload_size, usable_size, True)
+            if pos + local_size + 4 > usable_size:
+                continue
+            overflow_page = int.from_bytes(page[pos + local_size:pos + local_size + 4], 'big')
+            payload = Payload(pages, page[pos:pos + local_size], overflow_page, payload_size, usable_size)
+            rows.append((rowid, decode_payload(payload, encoding)))
+        except (IndexError, struct.error):
+            continue  # A corrupt cell, whose header or record runs past the end of the page
+    return rows
+
+
+def iter_table_rows(pages, root_page, usable_size, encoding="utf-8"):
+    """
+    Yield the (rowid, values) of every row of the table B-tree rooted at root_page, in rowid order.
+
+    Leaf pages are decoded in batch and no nodes are created, which makes this the
+    way to scan a whole table. Pages that were visited already are not followed again,
+    and neither are cell pointers outside their page or child pages past the end of the file.
+
+    :param pages: A sqlite_pages.PageReader over the database.
+    """
+    visited = set()
+    stack = [root_page]
+    while stack:
+        page_number = stack.pop()
+        if not 1 <= page_number <= pages.page_count or page_number in visited:
+            continue
+        visited.add(page_number)
+        page = pages.get_page(page_number)
+        header_start = 100 if page_number == 1 else 0
+        page_type = page[header_start]
+        if page_type == LEAF_TABLE_PAGE:
+            yield from decode_leaf_table_page(pages, page_number, usable_size, encoding)
+        elif page_type == INTERIOR_TABLE_PAGE:
+            pointers_start = header_start + 12
+            cell_count = min(int.from_bytes(page[header_start + 3:header_start + 5], 'big'), (usable_size - pointers_start) // 2)
+            pointers_end = pointers_start + 2 * cell_count
+            right_most = int.from_bytes(page[header_start + 8:header_start + 12], 'big')
+            pointers = struct.unpack_from(f'>{cell_count}H', page, pointers_start)
+            # Pushed in reverse so the left-most child is visited first; children past the
+            # end of the file are dropped by the page number check when they are popped
+            stack.append(right_most)
+            for pointer in reversed(pointers):
+                if pointers_end <= pointer <= usable_size - 4:
+                    stack.append(int.from_bytes(page[pointer:pointer + 4], 'big'))
+
+
+def _table_page(pages, page_number, usable_size):
+    """The (page, page type, cell pointers) of a table B-tree page, or None for any other page."""
+    page = pages.get_page(page_number)
+    header_start = 100 if page_number == 1 else 0
+    page_type = page[header_start]
+    if page_type not in (INTERIOR_TABLE_PAGE, LEAF_TABLE_PAGE):
+        return None
+    pointers_start = header_start + (12 if page_type == INTERIOR_TABLE_PAGE else 8)
+    cell_count = min(int.from_bytes(page[header_start + 3:header_start + 5], 'big'), (usable_size - pointers_start) // 2)
+    return page, page_type, struct.unpack_from(f'>{cell_count}H', page, pointers_start)
+
+
+def _cell_key(page, page_type, pointer):
+    """
+    The rowid of a table B-tree cell: after the left child pointer, or after the payload size.
+
+    Rowids are signed 64-bit integers and the cells are in signed order, so the varint is
+    read as two's complement.
+    """
+    if page_type == INTERIOR_TABLE_PAGE:
+        pos = pointer + 4
+    else:
+        _, pos = read_varint(page, pointer)
+    rowid = read_varint(page, pos)[0]
+    return rowid - (1 << 64) if rowid >> 63 else rowid
+
+
+def _search_cells(page, page_type, pointers, rowid):
+    """
+    The index of the first cell whose rowid is at least rowid, or len(pointers) if there is none.
+
+    Cells are in rowid order, so this is a binary search that reads only the keys it compares.
+    """
+    low, high = 0, len(pointers)
+    while low < high:
+        middle = (low + high) // 2
+        if _cell_key(page, page_type, pointers[middle]) < rowid:
+            low = middle + 1
+        else:
+            high = middle
+    return low
+
+
+def _child_page(page, pointers, index, page_number):
+    """The page number of child index of an interior table page: a left child, or the right-most pointer past the last cell."""
+    if index < len(pointers):
+        return int.from_bytes(page[pointers[index]:pointers[index] + 4], 'big')
+    header_start = 100 if page_number == 1 else 0
+    return int.from_bytes(page[header_start + 8:header_start + 12], 'big')
+
+
+def find_rowid(pages, root_page, rowid, usable_size, encoding="utf-8", max_blob=None):
+    """
+    Find the row with rowid in the table B-tree rooted at root_page.
+
+    Each interior page is binary searched for the first cell whose key is at least the
+    rowid (its left child holds the rowids up to the key; the right-most pointer the
+    rest), and so is the leaf. Only the pages on the way from the root are read.
+
+    :param pages: A sqlite_pages.PageReader over the database.
+    :return: (the page numbers from the root to the leaf, the CellLayout of the row, see decode_cell),
+        or None if the table has no such row.
+    """
+    path = []
+    page_number = root_page
+    try:
+        while 1 <= page_number <= pages.page_count and page_number not in path:
+            path.append(page_number)
+            table_page = _table_page(pages, page_number, usable_size)
+            if table_page is None:
+                return None
+            page, page_type, pointers = table_page
+            index = _search_cells(page, page_type, pointers, rowid)
+            if page_type == INTERIOR_TABLE_PAGE:
+                page_number = _child_page(page, pointers, index, page_number)
+                continue
+            if index == len(pointers) or _cell_key(page, page_type, pointers[index]) != rowid:
+                return None
+            cell = decode_cell(page, page_type, pointers[index], usable_size, encoding, pages, max_blob)
+            return path, cell
+    except IndexError:
+        pass  # A cell pointer or key past the end of the page
+    return None
+
+
+def iter_rowid_range(pages, root_page, first, last, usable_size, encoding="utf-8", max_blob=None):
+    """
+    Yield the (page number, rowid, CellLayout) of every row of the table B-tree rooted at
+    root_page with a rowid from first to last (inclusive), in rowid order.
+
+    Like find_rowid, interior pages are binary searched for the children that can hold the
+    range, so only those subtrees are read; a cell pointer or key past the end of a page
+    ends the search of that page.
+
+    :param pages: A sqlite_pages.PageReader over the database.
+    """
+    visited = set()
+    stack = [root_page]
+    while stack:
+        page_number = stack.pop()
+        if not 1 <= page_number <= pages.page_count or page_number in visited:
+            continue
+        visited.add(page_number)
+        table_page = _table_page(pages, page_number, usable_size)
+        if table_page is None:
+            continue
+        page, page_type, pointers = table_page
+        try:
+            start = _search_cells(page, page_type, pointers, first)
+            if page_type == INTERIOR_TABLE_PAGE:
+                stop = _search_cells(page, page_type, pointers, last)
+                # Pushed in reverse so the left-most child is visited first
+                for index in range(stop, start - 1, -1):
+                    stack.append(_child_page(page, pointers, index, page_number))
+                continue
+            for pointer in pointers[start:]:
+                rowid = _cell_key(page, page_type, pointer)
+                if rowid > last:
+                    break
+                yield page_number, rowid, decode_cell(page, page_type, pointer, usable_size, encoding, pages, max_blob)
+        except IndexError:
+            continue
+
+
+def column_definitions(sql):
+    """
+    The column definitions in a CREATE TABLE or CREATE INDEX statement from sqlite_master,
+    as (name, the rest of the definition) pairs, or None.
+
+    Table constraints are left out. WITHOUT ROWID tables store their columns in a
+    different order and return None.
+    """
+    if not sql or "WITHOUT ROWID" in sql.upper():
+        return None
+    start = sql.find('(')
+    if start < 0:
+        return None
+    parts, part, depth, quote = [], [], 0, None
+    for char in sql[start + 1:]:
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in '"`\'[':
+            quote = ']' if char == '[' else char
+        elif char == '(':
+            depth += 1
+        elif char == ')':
+            if depth == 0:
+                break
+            depth -= 1
+        elif char == ',' and depth == 0:
+            parts.append(''.join(part))
+            part = []
+            continue
+        part.append(char)
+    parts.append(''.join(part))
+
+    definitions = []
+    for part in parts:
+        part = part.strip()
+        if not part:
+            continue
+        if part[0] in '"`[':
+            closing = ']' if part[0] == '[' else part[0]
+            end = part.find(closing, 1)
+            name, rest = part[1:end], part[end + 1:]
+        else:
+            words = part.split(None, 1)
+            name, rest = words[0], words[1] if len(words) > 1 else ''
+            if name.upper() in ("CONSTRAINT", "PRIMARY", "UNIQUE", "CHECK", "FOREIGN"):
+                continue
+        definitions.append((name, rest.strip()))
+    return definitions
+
+
+def column_names(sql):
+    """
+    The column names in a CREATE TABLE or CREATE INDEX statement from sqlite_master, or None.
+
+    Index records end with the rowid of the row they point at, so it is added for indexes.
+    WITHOUT ROWID tables store their columns in a different order and return None.
+    """
+    definitions = column_definitions(sql)
+    if definitions is None:
+        return None
+    names = [name for name, _ in definitions]
+    if sql.lstrip().upper().startswith("CREATE") and " INDEX " in sql.upper()[:sql.find('(')]:
+        names.append("rowid")
+    return names
@@ -0,0 +1,131 @@
+from collections import namedtuple
+
+try:
+    import numpy as np
+except ImportError:  # Optional: only makes surveys of very large databases faster
+    np = None
+
+# The types of each page (its first header byte), the fill ratio of each B-tree page
+# (NaN, or None without NumPy, for other pages), the page numbers on the freelist and
+# those of the pointer map and lock-byte pages. types and fill are indexed by page number - 1.
+PageSurvey = namedtuple('PageSurvey', 'page_count types fill freelist reserved')
+
+BTREE_PAGE_TYPES = (0x02, 0x05, 0x0A, 0x0D)
+
+# The page holding this offset is reserved for file locking and never used by the database
+PENDING_BYTE = 0x40000000
+
+
+def freelist_pages(buffer, page_size, page_count, usable_size, trunk_page):
+    """The page numbers on the freelist, following the trunk pages from trunk_page."""
+    pages = set()
+    while trunk_page and 1 <= trunk_page <= page_count and trunk_page not in pages:
+        pages.add(trunk_page)
+        start = (trunk_page - 1) * page_size
+        next_trunk = int.from_bytes(buffer[start:start + 4], 'big')
+        leaf_count = min(int.from_bytes(buffer[start + 4:start + 8], 'big'), (usable_size - 8) // 4)
+        for offset in range(start + 8, start + 8 + 4 * leaf_count, 4):
+            leaf_page = int.from_bytes(buffer[offset:offset + 4], 'big')
+            if 1 <= leaf_page <= page_count:
+                pages.add(leaf_page)
+        trunk_page = next_trunk
+    return pages
+
+
+def reserved_pages(page_count, page_size, usable_size, autovacuum):
+    """
+    The page numbers of the pointer map pages of an auto-vacuum database, then of the
+    lock-byte page, which are not B-tree pages whatever their first byte.
+
+    :param autovacuum: The largest root page number from the database header, 0 unless auto-vacuum is on.
+    """
+    lock_page = PENDING_BYTE // page_size + 1
+    pages = []
+    if autovacuum:
+        # A pointer map page holds a 5 byte entry for each of the pages that follow it,
+        # and one that would be the lock-byte page comes right after it instead
+        for page_number in range(2, page_count + 1, usable_size // 5 + 1):
+            if page_number == lock_page:
+                page_number += 1
+            if page_number <= page_count:
+                pages.append(page_number)
+    if lock_page <= page_count:
+        pages.append(lock_page)
+    return pages
+
+
+def survey_pages(buffer, page_size, usable_size, first_trunk_page=0, autovacuum=0):
+    """
+    Classify every page of a database by its first header byte without parsing it.
+    Pointer map and lock-byte pages (see reserved_pages) are set apart, as their first
+    byte can look like a B-tree page type.
+
+    Only three bytes of each page are read: the page type and the start of the cell
+    content area, from which the fill ratio of a B-tree page is the share of its
+    usable size taken by the cell content area. With NumPy these are strided views
+    over the buffer (usually the file's mmap); without it, extended slices.
+    """
+    page_count = len(buffer) // page_size
+    if np is not None:
+        pages = np.frombuffer(buffer, np.uint8, count=page_count * page_size).reshape(page_count, page_size)
+        types = pages[:, 0].copy()
+        content_start = (pages[:, 5].astype(np.uint32) << 8) | pages[:, 6]
+        if page_count:
+            # Page 1 starts with the 100 byte database header
+            types[0] = pages[0, 100]
+            content_start[0] = (int(pages[0, 105]) << 8) | int(pages[0, 106])
+        del pages
+        content_start[content_start == 0] = 65536
+        fill = np.clip((usable_size - content_start.astype(np.float64)) / usable_size, 0, 1)
+        fill[~np.isin(types, BTREE_PAGE_TYPES)] = np.nan
+    else:
+        end = page_count * page_size
+        types = bytearray(buffer[0:end:page_size])
+        high, low = buffer[5:end:page_size], buffer[6:end:page_size]
+        content_start = [(first << 8 | second) or 65536 for first, second in zip(high, low)]
+        if page_count:
+            types[0] = buffer[100]
+            content_start[0] = (buffer[105] << 8 | buffer[106]) or 65536
+        fill = [min(max((usable_size - start) / usable_size, 0), 1) if page_type in BTREE_PAGE_TYPES else None
+                for page_type, start in zip(types, content_start)]
+    freelist = freelist_pages(buffer, page_size, page_count, usable_size, first_trunk_page)
+    reserved = set(reserved_pages(page_count, page_size, usable_size, autovacuum)) - freelist
+    for page_number in reserved:
+        fill[page_number - 1] = None if np is None else np.nan
+    return PageSurvey(page_count, types, fill, freelist, reserved)
+
+
+def summarize(survey, page_types):
+    """
+    Count the pages of a survey by type, as {name: (page count, average fill ratio or None)}.
+
+    :param page_types: Page type byte -> name. Freelist pages are counted as "freelist"
+        and pointer map and lock-byte pages as "reserved" whatever their first byte, and
+        pages of other types (overflow pages) as "unknown".
+    """
+    counts = {}
+    if np is not None:
+        types = survey.types.astype(np.int16)
+        for pages in (survey.freelist, survey.reserved):
+            if pages:
+                types[np.fromiter(pages, np.int64) - 1] = -1
+        for page_type, name in page_types.items():
+            selected = types == page_type
+            count = int(selected.sum())
+            counts[name] = (count, float(survey.fill[selected].mean()) if count else None)
+        counts["freelist"] = (len(survey.freelist), None)
+        counts["reserved"] = (len(survey.reserved), None)
+        counts["unknown"] = (int(survey.page_count - sum(count for count, _ in counts.values())), None)
+        return counts
+    totals = {page_type: [0, 0.0] for page_type in page_types}
+    for page_number, (page_type, fill) in enumerate(zip(survey.types, survey.fill), 1):
+        if page_type in totals and page_number not in survey.freelist and page_number not in survey.reserved:
+            totals[page_type][0] += 1
+            totals[page_type][1] += fill
+    for page_type, name in page_types.items():
+        count, fill = totals[page_type]
+        counts[name] = (count, fill / count if count else None)
+    counts["freelist"] = (len(survey.freelist), None)
+    counts["reserved"] = (len(survey.reserved), None)
+    counts["unknown"] = (survey.page_count - sum(count for count, _ in counts.values()), None)
+    return counts
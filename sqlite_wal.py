@@ -0,0 +1,144 @@
+import struct
+from collections import namedtuple
+from functools import lru_cache
+
+try:
+    import numpy as np
+except ImportError:  # Optional: only makes checking the checksums of large logs faster
+    np = None
+
+# https://www.sqlite.org/fileformat.html#the_write_ahead_log
+WAL_MAGIC_LE = 0x377F0682  # Checksums over little-endian words
+WAL_MAGIC_BE = 0x377F0683  # Checksums over big-endian words
+WAL_HEADER = struct.Struct('>8I')
+WAL_HEADER_SIZE = WAL_HEADER.size
+FRAME_HEADER = struct.Struct('>6I')
+FRAME_HEADER_SIZE = FRAME_HEADER.size
+
+# A frame of the log: its number (from 0), the offset of its header, the page it holds,
+# the database size in pages for commit frames (0 otherwise) and its salts
+Frame = namedtuple('Frame', 'index offset page_number commit_size salt1 salt2')
+
+
+@lru_cache(maxsize=None)
+def _checksum_coefficients(pair_count):
+    """
+    Each step of the checksum adds a pair of words x, y as (s0, s1) -> M (s0, s1) + (x, x + y),
+    with M = [[1, 1], [1, 2]], so after n pairs (s0, s1) is M^n (s0, s1) plus the sum over
+    pair k of M^(n-1-k) (x, x + y). Returns M^n, and the coefficients of every word in that
+    sum as a (2, 2n) array, all modulo 2^32 so products with words fit in 64 bits.
+    """
+    powers = [(1, 0, 0, 1)]
+    for _ in range(pair_count):
+        p, q, r, t = powers[-1]
+        powers.append(((p + r) & 0xFFFFFFFF, (q + t) & 0xFFFFFFFF, (p + 2 * r) & 0xFFFFFFFF, (q + 2 * t) & 0xFFFFFFFF))
+    coefficients = np.empty((2, 2 * pair_count), np.uint64)
+    for k in range(pair_count):
+        p, q, r, t = powers[pair_count - 1 - k]
+        coefficients[:, 2 * k] = ((p + q) & 0xFFFFFFFF, (r + t) & 0xFFFFFFFF)
+        coefficients[:, 2 * k + 1] = (q, t)
+    return powers[pair_count], coefficients
+
+
+def wal_checksum(data, s0, s1, big_endian):
+    """
+    Continue the running checksum of a log over data, a multiple of 8 bytes long.
+
+    With NumPy, pages are summed in one matrix product (see _checksum_coefficients), whose
+    arithmetic wraps modulo 2^64 and so gives the same sums modulo 2^32.
+    """
+    if np is not None and len(data) >= 64:
+        (p, q, r, t), coefficients = _checksum_coefficients(len(data) // 8)
+        words = np.frombuffer(data, '>u4' if big_endian else '<u4').astype(np.uint64)
+        sum0, sum1 = (int(value) for value in coefficients @ words)
+        return (p * s0 + q * s1 + sum0) & 0xFFFFFFFF, (r * s0 + t * s1 + sum1) & 0xFFFFFFFF
+    words = struct.unpack(f"{'>' if big_endian else '<'}{len(data) // 4}I", data)
+    for index in range(0, len(words), 2):
+        s0 = (s0 + words[index] + s1) & 0xFFFFFFFF
+        s1 = (s1 + words[index + 1] + s0) & 0xFFFFFFFF
+    return s0, s1
+
+
+class WALIndex:
+    """
+    The frames of a write-ahead log, indexed by page number.
+
+    The index is built in one sequential pass over the frames, whose headers are
+    unpacked in place and whose pages are never copied. A frame belongs to the
+    log if it and every frame before it have the salts of the log header and
+    continue its checksum chain, which is where SQLite stops reading the log.
+    Frames after the last commit frame of that run were never committed. Frames
+    past the run are left over from before the last checkpoint, or were cut off
+    by a crash; they are still in history, because they hold older versions of
+    their pages.
+    """
+
+    def __init__(self, buffer):
+        """
+        :param buffer: The content of the -wal file (usually its mmap).
+        :raises ValueError: If buffer does not start with a log header.
+        """
+        if len(buffer) < WAL_HEADER_SIZE:
+            raise ValueError("Too short for a write-ahead log header")
+        (self.magic, self.version, self.page_size, self.checkpoint,
+         self.salt1, self.salt2, self.checksum1, self.checksum2) = WAL_HEADER.unpack_from(buffer, 0)
+        if self.magic not in (WAL_MAGIC_LE, WAL_MAGIC_BE):
+            raise ValueError(f"Not a write-ahead log (magic {self.magic:#010x})")
+        if not 512 <= self.page_size <= 65536 or self.page_size & (self.page_size - 1):
+            raise ValueError(f"Invalid page size {self.page_size}")
+        self.buffer = buffer
+        self.frame_size = FRAME_HEADER_SIZE + self.page_size
+        self.frames = []
+        self.history = {}  # Page number -> every Frame holding the page, oldest first
+        self.latest = {}  # Page number -> the last committed Frame holding the page
+        self.valid_count = 0  # frames[:valid_count] have the salts of the log header and a valid checksum chain
+        self.committed_count = 0  # frames[:committed_count] were committed
+        self.database_size = 0  # The database size in pages after the last commit, or 0 without commits
+
+        pending = []
+        big_endian = self.big_endian
+        s0, s1 = wal_checksum(bytes(buffer[:24]), 0, 0, big_endian)
+        valid = (s0, s1) == (self.checksum1, self.checksum2)
+        unpack = FRAME_HEADER.unpack_from
+        offset = WAL_HEADER_SIZE
+        end = len(buffer) - self.frame_size
+        while offset <= end:
+            page_number, commit_size, salt1, salt2, checksum1, checksum2 = unpack(buffer, offset)
+            frame = Frame(len(self.frames), offset, page_number, commit_size, salt1, salt2)
+            self.frames.append(frame)
+            self.history.setdefault(page_number, []).append(frame)
+            valid = valid and salt1 == self.salt1 and salt2 == self.salt2
+            if valid:
+                s0, s1 = wal_checksum(bytes(buffer[offset:offset + 8]), s0, s1, big_endian)
+                s0, s1 = wal_checksum(self.frame_page(frame), s0, s1, big_endian)
+                valid = (s0, s1) == (checksum1, checksum2)
+            if valid:
+                self.valid_count += 1
+                pending.append(frame)
+                if commit_size:
+                    for committed in pending:
+                        self.latest[committed.page_number] = committed
+                    pending.clear()
+                    self.committed_count = self.valid_count
+                    self.database_size = commit_size
+            offset += self.frame_size
+        self.trailing = len(buffer) - offset  # Bytes of an incomplete last frame
+
+    @property
+    def big_endian(self):
+        return self.magic == WAL_MAGIC_BE
+
+    def is_committed(self, frame):
+        return frame.index < self.committed_count
+
+    def page(self, page_number):
+        """The latest committed content of a page as a memoryview, or None if the log does not have it."""
+        frame = self.latest.get(page_number)
+        if frame is None:
+            return None
+        start = frame.offset + FRAME_HEADER_SIZE
+        return memoryview(self.buffer)[start:start + self.page_size]
+
+    def frame_page(self, frame):
+        start = frame.offset + FRAME_HEADER_SIZE
+        return memoryview(self.buffer)[start:start + self.page_size]
@@ -0,0 +1,48 @@
+import io
+import os
+
+import pytest
+
+from Artefacts.JPEGFileParser import JPEGFileParser
+from Artefacts.LNKFileParser import LNKFileParser
+from Artefacts.SQLiteFileParser import SQLiteFileParser
+from test_jpeg_segments import covered
+
+TEST_FILES = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'TestFiles')
+
+
+def cut(name, length):
+    with open(os.path.join(TEST_FILES, name), 'rb') as file:
+        return file.read(length)
+
+
+def top_level(parser):
+    return [(offset, node.name, len(node.data), node.info) for offset, node, depth in parser.iter_parse() if depth == 1]
+
+
+@pytest.mark.parametrize("parser, name, length", [
+    (LNKFileParser, "lnktest.lnk.test", 30), (SQLiteFileParser, "MediaLibrary.sqlite", 30),
+    (SQLiteFileParser, "MediaLibrary.sqlite", 90)])
+def test_a_cut_off_header_is_unparsed_data(parser, name, length):
+    nodes = top_level(parser(io.BytesIO(cut(name, length))))
+    assert [node[:3] for node in nodes] == [(0, "Unparsed data", length)]
+    assert "truncated" in nodes[0][3]
+
+
+@pytest.mark.parametrize("length", [80, 200, 500])
+def test_lnk_file_cut_off_after_the_header(length):
+    nodes = top_level(LNKFileParser(io.BytesIO(cut("lnktest.lnk.test", length))))
+    assert nodes[0][1] == "Header"
+    assert max(offset + size for offset, _, size, _ in nodes) <= length
+
+
+def test_sqlite_file_cut_off_inside_page_1():
+    nodes = top_level(SQLiteFileParser(io.BytesIO(cut("MediaLibrary.sqlite", 1000))))
+    assert nodes[0][1] == "Header string"
+    assert nodes[-1][:3] == (100, "Trailing data", 900)
+
+
+@pytest.mark.parametrize("length", [1, 3, 30, 200, 2000])
+def test_jpeg_file_cut_off(length):
+    nodes = top_level(JPEGFileParser(io.BytesIO(cut("tesjpg.jpg", length))))
+    assert covered(nodes) == length
@@ -0,0 +1,93 @@
+import io
+import struct
+
+from Artefacts.JPEGFileParser import JPEGFileParser
+from jpeg_segments import APP0, EOI, SOI, SOS, Segment, app_identifier, marker_name, scan_segments
+
+DQT = 0xDB
+
+
+def segment(marker, body=b''):
+    return bytes([0xFF, marker]) + struct.pack('>H', len(body) + 2) + body
+
+
+def jpeg(scan=b'\x12\xff\x00\x34\xff\xd0\x56', trailer=b''):
+    """SOI, a JFIF APP0, a DQT and a scan whose data has a stuffed byte and a restart marker, then EOI."""
+    return (b'\xff\xd8' + segment(APP0, b'JFIF\x00\x01\x02\x00\x00\x01\x00\x01\x00\x00') + segment(DQT, bytes(65))
+            + segment(SOS, b'\x01\x01\x00\x00\x3f\x00') + scan + b'\xff\xd9' + trailer)
+
+
+def test_scan_segments():
+    data = jpeg()
+    layout = scan_segments(data)
+    assert layout.error is None
+    assert layout.end == len(data)
+    assert layout.segments == [
+        Segment(0, SOI, 2, 0, 0), Segment(2, APP0, 18, 0, 0), Segment(20, DQT, 69, 0, 0),
+        Segment(89, SOS, 10, 7, 0), Segment(106, EOI, 2, 0, 0)]
+    assert app_identifier(data, layout.segments[1]) == "JFIF"
+    assert app_identifier(data, layout.segments[2]) is None
+    assert marker_name(DQT) == "DQT" and marker_name(0x02) == "Marker 0x02"
+
+
+def test_fill_bytes_belong_to_the_next_marker():
+    # Fill bytes after the scan data, and before DQT
+    data = b'\xff\xd8\xff\xff' + segment(DQT, bytes(4)) + segment(SOS, bytes(6)) + b'\x12\xff\xff\xff\xd9'
+    layout = scan_segments(data)
+    assert layout.error is None
+    assert layout.segments == [Segment(0, SOI, 2, 0, 0), Segment(4, DQT, 8, 0, 2), Segment(12, SOS, 10, 1, 0),
+                               Segment(25, EOI, 2, 0, 2)]
+
+
+def test_trailing_data_after_eoi():
+    data = jpeg(trailer=b'hidden')
+    layout = scan_segments(data)
+    assert layout.error is None
+    assert layout.end == len(data) - 6
+
+
+def test_damage_ends_the_walk():
+    # A segment running past the end of the file, after fill bytes
+    data = b'\xff\xd8\xff\xff' + segment(DQT, bytes(64))[:30]
+    layout = scan_segments(data)
+    assert [segment.marker for segment in layout.segments] == [SOI]
+    assert layout.end == 2
+    assert "runs past the end" in layout.error
+    # Something other than a marker
+    layout = scan_segments(b'\xff\xd8\x00\x00')
+    assert (layout.end, layout.error) == (2, "No marker at offset 2")
+    # A scan running to the end of the file
+    data = jpeg()[:-2]
+    layout = scan_segments(data)
+    assert layout.segments[-1].scan_length == 7
+    assert (layout.end, layout.error) == (len(data), "The file ends before the EOI marker")
+
+
+def top_level(data):
+    parser = JPEGFileParser(io.BytesIO(data))
+    return [(offset, node.name, len(node.data), node.info) for offset, node, depth in parser.iter_parse() if depth == 1]
+
+
+def covered(nodes):
+    end = 0
+    for offset, _, length, _ in nodes:
+        if offset != end or not length:
+            return False
+        end = offset + length
+    return end
+
+
+def test_parser_nodes_cover_the_file():
+    for data in (jpeg(), jpeg(trailer=b'hidden'), b'\xff\xd8\xff\xff' + segment(DQT, bytes(4)) + b'\xff\xd9'):
+        assert covered(top_level(data)) == len(data)
+    nodes = top_level(jpeg(trailer=b'hidden'))
+    assert nodes[-1][:3] == (len(jpeg()), "Trailing data", 6)
+
+
+def test_parser_reports_a_cut_off_scan_on_the_scan_node():
+    data = jpeg()[:-2]
+    nodes = top_level(data)
+    assert covered(nodes) == len(data)
+    assert nodes[-1][1] == "Scan data"
+    assert nodes[-1][3].endswith("The file ends before the EOI marker")
+    assert "Unparsed data" not in [name for _, name, _, _ in nodes]
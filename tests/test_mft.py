@@ -0,0 +1,191 @@
+import io
+import struct
+
+import pytest
+
+import mft_records
+from Artefacts.MFTFileParser import MFTFileParser
+from mft_attributes import DATA, FILE_NAME, STANDARD_INFORMATION, iter_attributes, record_attributes
+from mft_paths import (ORPHAN_DIRECTORY, PATH_CYCLE, PATH_NO_NAME, PATH_OK, PATH_ORPHAN, PATH_SEQUENCE_MISMATCH,
+                       PathIndex)
+from mft_records import (RECORD_BAAD, RECORD_EMPTY, RECORD_INVALID, RECORD_OK, RECORD_TORN, MFTRecords,
+                         volume_layout)
+
+RECORD_SIZE = 1024
+HEADER = struct.Struct('<4sHHQHHHHIIQHHI')
+RESIDENT = struct.Struct('<IIBBHHHIHBB')
+FILE_NAME_VALUE = struct.Struct('<Q4QQQIIBB')
+
+
+def resident(attribute_type, attribute_id, value):
+    value += bytes(-len(value) % 8)
+    return RESIDENT.pack(attribute_type, 0x18 + len(value), 0, 0, 0x18, 0, attribute_id, len(value), 0x18, 0, 0) + value
+
+
+def file_name(name, parent, parent_sequence=1, namespace=1):
+    encoded = name.encode('utf-16-le')
+    return resident(0x30, 1, FILE_NAME_VALUE.pack(parent | parent_sequence << 48, 0, 0, 0, 0, 0, 0, 0x20, 0,
+                                            len(encoded) // 2, namespace) + encoded)
+
+
+def record(number, attributes=b'', sequence=1, flags=1, usn=0x1234):
+    """A FILE record with its update sequence applied, as it is on disk."""
+    attributes += b'\xff\xff\xff\xff' + bytes(4)
+    data = bytearray(RECORD_SIZE)
+    HEADER.pack_into(data, 0, b'FILE', 0x30, 3, 0, sequence, 1, 0x38, flags, 0x38 + len(attributes), RECORD_SIZE,
+                     0, 2, 0, number)
+    data[0x38:0x38 + len(attributes)] = attributes
+    # Save the last word of each sector in the update sequence array and replace it by the number
+    data[0x32:0x36] = data[510:512] + data[1022:1024]
+    struct.pack_into('<HHH', data, 0x30, usn, *struct.unpack_from('<HH', data, 0x32))
+    struct.pack_into('<H', data, 510, usn)
+    struct.pack_into('<H', data, 1022, usn)
+    return bytes(data)
+
+
+def boot_sector(mft_cluster, sectors_per_cluster=8, clusters_per_record=-10):
+    data = bytearray(512)
+    data[0:3] = b'\xeb\x52\x90'
+    data[3:11] = b'NTFS    '
+    struct.pack_into('<HB', data, 0x0B, 512, sectors_per_cluster)
+    struct.pack_into('<Q', data, 0x30, mft_cluster)
+    struct.pack_into('<b', data, 0x40, clusters_per_record)
+    data[510:512] = b'\x55\xaa'
+    return bytes(data)
+
+
+def volume(records, mft_cluster=4):
+    image = bytearray(boot_sector(mft_cluster))
+    image += bytes(mft_cluster * 4096 - len(image))
+    for data in records:
+        image += data
+    return bytes(image)
+
+
+def test_volume_layout_reads_the_boot_sector():
+    assert volume_layout(boot_sector(4)) == (4 * 4096, 1024)
+    assert volume_layout(boot_sector(2, sectors_per_cluster=1, clusters_per_record=2)) == (1024, 1024)
+    assert volume_layout(boot_sector(4, clusters_per_record=-12)) == (4 * 4096, 4096)
+    assert volume_layout(boot_sector(4, sectors_per_cluster=0)) is None
+
+
+def test_volume_image_records_are_found_at_the_mft_cluster():
+    image = volume([record(number, file_name(f"file{number}", 5)) for number in range(8)])
+    parser = MFTFileParser(io.BytesIO(image))
+    root = parser.parse()
+    records = parser.records
+    assert records.start == 4 * 4096
+    assert len(records) == 8
+    assert list(records.status) == [RECORD_OK] * 8
+    assert root.name is None and root.info == "NTFS Boot Sector"
+    entries = [node for node in parser.iter_parse(keep_tree=False) if node[1].name == "MFT Entry"]
+    assert [node.table_value for _, node, _ in entries][:2] == ["\\file0", "\\file1"]
+
+
+def test_empty_slots_are_skipped_but_later_records_found():
+    data = record(0) + bytes(RECORD_SIZE) + record(2)
+    records = MFTRecords(data)
+    assert list(records.status) == [RECORD_OK, RECORD_EMPTY, RECORD_OK]
+
+
+def test_paths_under_a_root_the_mft_is_too_short_for_are_orphaned():
+    records = MFTRecords(record(0, file_name("a", 5)) + record(1, file_name("b", 5)))
+    paths = PathIndex(records)
+    assert paths.resolve(0) == (ORPHAN_DIRECTORY + "\\a", PATH_ORPHAN)
+    assert paths.path(1) == ORPHAN_DIRECTORY + "\\b"
+
+
+@pytest.fixture(params=["numpy", "lists"])
+def decoding(request, monkeypatch):
+    """Run a test with the NumPy decoding of record headers, and again without NumPy."""
+    if request.param == "lists":
+        monkeypatch.setattr(mft_records, "np", None)
+    elif mft_records.np is None:
+        pytest.skip("NumPy is not installed")
+    return request.param
+
+
+def test_fixups_restore_the_sector_ends(decoding):
+    # A $DATA value over the end of the first sector, which the update sequence number replaces on disk
+    data = record(0, resident(DATA, 2, b'\xab' * 900))
+    assert data[510:512] == data[1022:1024] == b'\x34\x12'
+    records = MFTRecords(data)
+    [(index, fixed)] = list(records.iter_valid())
+    assert index == 0
+    assert bytes(fixed[510:512]) == b'\xab\xab'
+    assert bytes(fixed[1022:1024]) == b'\x00\x00'
+    assert bytes(fixed[:510]) == data[:510]
+
+
+def test_record_status(decoding):
+    torn = bytearray(record(1))
+    torn[1022:1024] = b'\x00\x00'
+    baad = b'BAAD' + record(2)[4:]
+    outside = bytearray(record(3))
+    struct.pack_into('<H', outside, 0x04, RECORD_SIZE - 2)
+    records = MFTRecords(record(0) + bytes(torn) + baad + bytes(outside) + bytes(RECORD_SIZE))
+    assert list(records.status) == [RECORD_OK, RECORD_TORN, RECORD_BAAD, RECORD_INVALID, RECORD_EMPTY]
+    assert records.indices() == [0]
+    assert records.column('record_number')[:4] == [0, 1, 2, 3]
+
+
+def test_iter_attributes():
+    standard = resident(STANDARD_INFORMATION, 0, bytes(48))
+    name = file_name("report.txt", 5)
+    data = resident(DATA, 2, b'contents')
+    buffer = record(0, standard + name + data)
+    attributes = list(iter_attributes(buffer, 0x38, len(buffer)))
+    assert [(attribute.offset, attribute.type, attribute.length) for attribute in attributes] == [
+        (0x38, STANDARD_INFORMATION, len(standard)), (0x38 + len(standard), FILE_NAME, len(name)),
+        (0x38 + len(standard) + len(name), DATA, len(data))]
+    assert attributes[2].value_length == 8
+    assert bytes(buffer[attributes[2].value_offset:attributes[2].value_offset + 8]) == b'contents'
+    [(attribute, value)] = record_attributes(buffer, 0x38, len(buffer), (FILE_NAME,))
+    assert attribute.type == FILE_NAME
+    assert (value.name, value.parent_record, value.parent_sequence, value.namespace) == ("report.txt", 5, 1, 1)
+
+
+def test_iter_attributes_stops_at_damage():
+    standard = resident(STANDARD_INFORMATION, 0, bytes(48))
+    data = bytearray(resident(DATA, 2, b'hello'))
+    # A length that is not a multiple of 8
+    struct.pack_into('<I', data, 4, len(data) - 3)
+    buffer = record(0, standard + bytes(data))
+    assert [attribute.type for attribute in iter_attributes(buffer, 0x38, len(buffer))] == [STANDARD_INFORMATION]
+    # And at the used size of the record
+    assert list(iter_attributes(buffer, 0x38, 0x38 + len(standard) - 8)) == []
+
+
+def directory(number, name, parent, **kwargs):
+    return record(number, file_name(name, parent), flags=3, **kwargs)
+
+
+def test_path_index():
+    records = [record(number) for number in range(5)] + [
+        directory(5, ".", 5),
+        directory(6, "docs", 5),
+        record(7, file_name("a.txt", 6)),
+        # A DOS name first, then the long name, which is the one used
+        record(8, file_name("LONGNA~1.TXT", 6, namespace=2) + file_name("long name.txt", 6)),
+        # The parent directory was reused since: it has sequence number 2
+        record(9, file_name("old.txt", 10)),
+        directory(10, "new", 5, sequence=2),
+        # Two directories that are each other's parent
+        directory(11, "loop1", 12),
+        directory(12, "loop2", 11),
+        record(13, file_name("x", 11)),
+        # A parent that is a file, and a parent past the end of the MFT
+        record(14, file_name("y", 7)),
+        record(15, file_name("z", 99)),
+    ]
+    paths = PathIndex(MFTRecords(b''.join(records)))
+    assert paths.resolve(7) == ("\\docs\\a.txt", PATH_OK)
+    assert paths.path(8) == "\\docs\\long name.txt"
+    assert paths.path(5) == "\\"
+    assert paths.resolve(0) == (None, PATH_NO_NAME)
+    assert paths.resolve(9) == (ORPHAN_DIRECTORY + "\\old.txt", PATH_SEQUENCE_MISMATCH)
+    assert paths.resolve(13) == (ORPHAN_DIRECTORY + "\\loop2\\loop1\\x", PATH_CYCLE)
+    assert paths.resolve(14) == (ORPHAN_DIRECTORY + "\\y", PATH_ORPHAN)
+    assert paths.resolve(15) == (ORPHAN_DIRECTORY + "\\z", PATH_ORPHAN)
+    # Directories on the way are cached, files are not
+    assert 6 in paths.cache and 7 not in paths.cache
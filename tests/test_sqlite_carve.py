@@ -0,0 +1,64 @@
+from sqlite_carve import RecordCarver, column_affinity, freeblocks, table_schema
+from test_sqlite_record import record, table_cell
+
+PEOPLE = table_schema("people", "CREATE TABLE people (id INTEGER PRIMARY KEY, name TEXT NOT NULL, age INTEGER)")
+NOTES = table_schema("notes", "CREATE TABLE notes (body TEXT, score REAL)")
+
+
+def values(carved):
+    return [(record.table.name, record.offset, [column.value for column in record.columns]) for record in carved]
+
+
+def test_column_affinity():
+    assert column_affinity("INTEGER PRIMARY KEY") == "ROWID"
+    assert column_affinity("INTEGER PRIMARY KEY DESC") == "INTEGER"
+    assert column_affinity("VARCHAR(20) NOT NULL") == "TEXT"
+    assert column_affinity("") == "BLOB"
+    assert column_affinity("DOUBLE") == "REAL"
+    assert column_affinity("DECIMAL(10, 2)") == "NUMERIC"
+    assert PEOPLE.affinities == ["ROWID", "TEXT", "INTEGER"]
+
+
+def test_carve_finds_records_in_zeroed_space():
+    buffer = bytes(20) + record(None, "alice", 31) + bytes(7) + record(None, "bob", 42) + bytes(20)
+    carved = list(RecordCarver([PEOPLE]).carve(buffer, 0, len(buffer)))
+    second = 20 + len(record(None, "alice", 31)) + 7
+    assert values(carved) == [("people", 20, [None, "alice", 31]), ("people", second, [None, "bob", 42])]
+    assert carved[0].end == 20 + len(record(None, "alice", 31))
+
+
+def test_carve_picks_the_table_whose_affinities_match():
+    buffer = bytes(4) + record("a note", None) + bytes(4)
+    assert values(RecordCarver([PEOPLE, NOTES]).carve(buffer, 0, len(buffer))) == [("notes", 4, ["a note", None])]
+    assert values(RecordCarver([PEOPLE, NOTES]).carve(buffer, 0, len(buffer), names=["people"])) == []
+
+
+def test_carve_rejects_records_that_do_not_fit():
+    data = record(None, "alice", 31)
+    # All NULL, cut off by the end of the region, and text that does not decode
+    assert list(RecordCarver([PEOPLE]).carve(record(None, None, None), 0, 4)) == []
+    assert list(RecordCarver([PEOPLE]).carve(data, 0, len(data) - 1)) == []
+    bad_text = data.replace(b"alice", b"al\xffce")
+    assert list(RecordCarver([PEOPLE]).carve(bad_text, 0, len(bad_text))) == []
+
+
+def test_carve_freeblock_with_an_overwritten_header():
+    # The freeblock header (next freeblock 0 and its size) overwrote the payload size, the rowid,
+    # the record header size and the NULL serial type of the INTEGER PRIMARY KEY
+    cell = table_cell(7, None, "carol", 55)
+    block = bytearray(cell)
+    block[0:4] = (0).to_bytes(2, 'big') + len(cell).to_bytes(2, 'big')
+    carved = list(RecordCarver([PEOPLE]).carve_freeblock(bytes(block), 0, len(block)))
+    assert values(carved) == [("people", 4, [None, "carol", 55])]
+
+
+def test_freeblocks_follow_the_chain_in_order():
+    page = bytearray(512)
+    page[1:3] = (100).to_bytes(2, 'big')
+    page[100:104] = (200).to_bytes(2, 'big') + (8).to_bytes(2, 'big')
+    # The next pointer goes backwards, so the chain stops after this block
+    page[200:204] = (50).to_bytes(2, 'big') + (16).to_bytes(2, 'big')
+    assert list(freeblocks(page, 0, 512)) == [(100, 8), (200, 16)]
+    # A block running past the usable size ends the chain
+    page[200:204] = (0).to_bytes(2, 'big') + (400).to_bytes(2, 'big')
+    assert list(freeblocks(page, 0, 512)) == [(100, 8)]
@@ -0,0 +1,130 @@
+import sqlite3
+
+import pytest
+
+import sqlite_survey
+from Artefacts.SQLiteFileParser import SQLiteFileParser
+from sqlite_carve import rowid_alias
+
+
+def database(path, *statements, rows=()):
+    db = sqlite3.connect(path)
+    for statement in statements:
+        db.execute(statement)
+    for statement, values in rows:
+        db.executemany(statement, values)
+    db.commit()
+    db.close()
+    return path
+
+
+def nodes(parser, *names):
+    return [(node.name, node.info, node.table_value) for _, node, _ in parser.iter_parse() if node.name in names]
+
+
+def test_rowid_alias():
+    assert rowid_alias("CREATE TABLE t (id INTEGER PRIMARY KEY, name TEXT)") == 0
+    assert rowid_alias("CREATE TABLE t (name TEXT, id integer primary key autoincrement)") == 1
+    assert rowid_alias("CREATE TABLE t (id INT PRIMARY KEY, name TEXT)") is None
+    assert rowid_alias("CREATE TABLE t (id INTEGER PRIMARY KEY DESC)") is None
+
+
+@pytest.fixture
+def people(tmp_path):
+    return database(tmp_path / "people.sqlite", "CREATE TABLE people (name TEXT, id INTEGER PRIMARY KEY)",
+                    "INSERT INTO people VALUES ('alice', 5), ('bob', 9)")
+
+
+def test_the_integer_primary_key_shows_the_rowid(people):
+    with open(people, 'rb') as file:
+        parser = SQLiteFileParser(file, workers=0)
+        assert nodes(parser, "id") == [("id", "id (NULL, an alias for the rowid): 5", 5),
+                                       ("id", "id (NULL, an alias for the rowid): 9", 9)]
+        match = parser.find_row("people", 9)
+        assert [node.table_value for _, node in match.node.children if node.name in ("name", "id")] == ["bob", 9]
+
+
+def test_the_integer_primary_key_shows_the_rowid_in_the_record_node(people):
+    with open(people, 'rb') as file:
+        records = nodes(SQLiteFileParser(file, workers=0, record_columns=False), "Record")
+    assert [info for _, info, _ in records[1:]] == ["Record: name='alice', id=5", "Record: name='bob', id=9"]
+
+
+@pytest.mark.parametrize("numpy", [True, False])
+def test_survey_sets_pointer_map_pages_apart(tmp_path, monkeypatch, numpy):
+    # With 512 byte pages, the second pointer map page is page 105, and its first entry is
+    # for a non-root B-tree page (type 5), so its first byte is that of an interior table page
+    path = database(tmp_path / "autovacuum.sqlite", "PRAGMA page_size = 512", "PRAGMA auto_vacuum = FULL",
+                    "CREATE TABLE t (id INTEGER PRIMARY KEY, body TEXT)",
+                    rows=[("INSERT INTO t VALUES (?, ?)", ((index, 'x' * 100) for index in range(1, 600)))])
+    with open(path, 'rb') as file:
+        data = file.read()
+    assert data[104 * 512] == 0x05
+    if not numpy:
+        monkeypatch.setattr(sqlite_survey, "np", None)
+    with open(path, 'rb') as file:
+        parser = SQLiteFileParser(file, workers=0)
+        survey = parser.survey()
+        pages = [node.name for _, node, _ in parser.iter_parse() if node.name and node.name.startswith("Page ")]
+    assert survey["reserved"] == (2, None)
+    assert "Page 105: Pointer map" in pages
+    assert survey["interior_table_btree"][0] == sum(1 for name in pages if name.endswith(": Interior Table"))
+    assert survey["leaf_table_btree"][0] == sum(1 for name in pages if name.endswith(": Leaf Table"))
+    assert sum(count for count, _ in survey.values()) == len(data) // 512
+
+
+@pytest.fixture
+def logged(tmp_path):
+    """A database with alice in the file, and bob and carol in two commits of its write-ahead log."""
+    path = tmp_path / "logged.sqlite"
+    db = sqlite3.connect(path)
+    db.execute("PRAGMA page_size = 4096")
+    db.execute("PRAGMA journal_mode = WAL")
+    db.execute("PRAGMA wal_autocheckpoint = 0")
+    db.execute("CREATE TABLE people (name TEXT)")
+    db.execute("INSERT INTO people VALUES ('alice')")
+    db.commit()
+    db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    for name in ("bob", "carol"):
+        db.execute("INSERT INTO people VALUES (?)", (name,))
+        db.commit()
+    # The log is removed when the last connection closes, so copies are taken while it is open
+    copy = tmp_path / "copy.sqlite"
+    copy.write_bytes(path.read_bytes())
+    log = (tmp_path / "logged.sqlite-wal").read_bytes()
+    db.close()
+    return copy, log
+
+
+def names(path, log=None, rowid=None):
+    """The names in people, or in the row with a rowid (see find_row), with the log if given."""
+    with open(path, 'rb') as file:
+        wal_file = None
+        if log is not None:
+            wal_file = open(path.with_suffix(".wal"), 'wb+')
+            wal_file.write(log)
+            wal_file.flush()
+        try:
+            parser = SQLiteFileParser(file, wal=wal_file, workers=0)
+            if rowid is not None:
+                return [bytes(node.data) for _, node in parser.find_row("people", rowid).node.children if node.name == "name"]
+            return [value for name, _, value in nodes(parser, "name")][1:]
+        finally:
+            if wal_file is not None:
+                wal_file.close()
+
+
+def test_parse_with_the_write_ahead_log(logged):
+    path, log = logged
+    assert names(path) == ["alice"]
+    assert names(path, log) == ["alice", "bob", "carol"]
+    # The node of a row in the log refers to its bytes in the log
+    assert names(path, log, rowid=3) == [b"carol"]
+
+
+def test_parse_with_a_checksum_mismatch_in_the_log(logged):
+    # A changed byte in the page of the second frame ends the log before the commit of carol
+    path, log = logged
+    corrupt = bytearray(log)
+    corrupt[32 + 24 + 4096 + 24 + 100] ^= 0xFF
+    assert names(path, bytes(corrupt)) == ["alice", "bob"]
@@ -0,0 +1,171 @@
+import struct
+
+import pytest
+
+from sqlite_pages import PageReader
+from sqlite_record import (INTERIOR_TABLE_PAGE, LEAF_TABLE_PAGE, decode_leaf_table_page, decode_record, find_rowid,
+                           iter_rowid_range, iter_table_rows, read_varint, record_columns)
+
+PAGE_SIZE = 512
+
+
+def varint(value):
+    if value > 0x00FFFFFFFFFFFFFF:
+        data = [value & 0xFF]
+        value >>= 8
+        for _ in range(8):
+            data.append(value & 0x7F | 0x80)
+            value >>= 7
+        return bytes(reversed(data))
+    data = [value & 0x7F]
+    value >>= 7
+    while value:
+        data.append(value & 0x7F | 0x80)
+        value >>= 7
+    return bytes(reversed(data))
+
+
+def record(*values):
+    """A record of None, int (stored as 8-byte integers) and str values."""
+    serial_types, body = [], b''
+    for value in values:
+        if value is None:
+            serial_types.append(0)
+        elif isinstance(value, int):
+            serial_types.append(6)
+            body += struct.pack('>q', value)
+        else:
+            encoded = value.encode()
+            serial_types.append(13 + 2 * len(encoded))
+            body += encoded
+    header = b''.join(varint(serial_type) for serial_type in serial_types)
+    return varint(len(header) + 1) + header + body
+
+
+def table_cell(rowid, *values):
+    payload = record(*values)
+    return varint(len(payload)) + varint(rowid) + payload
+
+
+def btree_page(page_type, cells, right_most=None, cell_count=None, pointers=None):
+    """A B-tree page with its cells packed at the end, in order; pointers replaces the cell pointers."""
+    page = bytearray(PAGE_SIZE)
+    end = PAGE_SIZE
+    offsets = []
+    for cell in cells:
+        end -= len(cell)
+        page[end:end + len(cell)] = cell
+        offsets.append(end)
+    offsets = offsets if pointers is None else pointers
+    count = len(offsets) if cell_count is None else cell_count
+    struct.pack_into('>BHHHB', page, 0, page_type, 0, count, end, 0)
+    start = 8
+    if page_type == INTERIOR_TABLE_PAGE:
+        struct.pack_into('>I', page, 8, right_most)
+        start = 12
+    struct.pack_into(f'>{len(offsets)}H', page, start, *offsets)
+    return bytes(page)
+
+
+def reader(*pages):
+    """A PageReader over the pages from page 2 on, after an empty page 1, whose header is offset by the database header."""
+    return PageReader(None, PAGE_SIZE, bytes(PAGE_SIZE) + b''.join(pages))
+
+
+def interior_cell(child, rowid):
+    return struct.pack('>I', child) + varint(rowid)
+
+
+def table_tree():
+    """Pages 2 to 4: an interior root over a leaf with rowids 1 to 3 (up to key 3) and a leaf with 10 and 20."""
+    root = btree_page(INTERIOR_TABLE_PAGE, [interior_cell(3, 3)], right_most=4)
+    left = btree_page(LEAF_TABLE_PAGE, [table_cell(rowid, f"row {rowid}") for rowid in (1, 2, 3)])
+    right = btree_page(LEAF_TABLE_PAGE, [table_cell(rowid, f"row {rowid}") for rowid in (10, 20)])
+    return reader(root, left, right)
+
+
+@pytest.mark.parametrize("value, size", [(0, 1), (0x7F, 1), (0x80, 2), (0x3FFF, 2), (0x4000, 3),
+                                         (0x00FFFFFFFFFFFFFF, 8), (0x0100000000000000, 9), (2 ** 64 - 1, 9)])
+def test_read_varint(value, size):
+    data = varint(value)
+    assert len(data) == size
+    assert read_varint(b'\xaa' + data + b'\xbb', 1) == (value, 1 + size)
+
+
+def test_decode_record():
+    data = record(None, 0, -2, "text", 2 ** 40)
+    assert decode_record(data) == [None, 0, -2, "text", 2 ** 40]
+    # At an offset into a larger buffer, and with the cached plan of the same header
+    assert decode_record(b'\x00\x00' + data, start=2) == [None, 0, -2, "text", 2 ** 40]
+
+
+def test_decode_record_leaves_out_cut_off_columns():
+    data = record("abc", 7, "tail")
+    # The end falls inside the integer
+    assert decode_record(data, end=len(data) - 6) == ["abc"]
+
+
+def test_record_columns_offsets():
+    data = record("ab", None, 5)
+    header_end, columns = record_columns(b'\xff' + data, 1, 1 + len(data))
+    assert header_end == 5
+    assert [(column.offset, column.length, column.serial_type, column.value) for column in columns] == [
+        (5, 2, 17, "ab"), (7, 0, 0, None), (7, 8, 6, 5)]
+    # The columns past the end are returned with what fits and no value
+    _, columns = record_columns(data, 0, len(data) - 3)
+    assert (columns[2].length, columns[2].value) == (5, None)
+
+
+@pytest.mark.parametrize("rowid", [1, 2, 3, 10, 20])
+def test_find_rowid(rowid):
+    path, cell = find_rowid(table_tree(), 2, rowid, PAGE_SIZE)
+    assert path == [2, 3 if rowid <= 3 else 4]
+    assert cell.rowid == rowid
+    assert cell.record[1][0].value == f"row {rowid}"
+
+
+@pytest.mark.parametrize("rowid", [0, 4, 15, 21, -1])
+def test_find_rowid_without_the_row(rowid):
+    assert find_rowid(table_tree(), 2, rowid, PAGE_SIZE) is None
+
+
+def test_find_rowid_in_a_page_that_is_not_a_table():
+    assert find_rowid(reader(bytes(PAGE_SIZE)), 2, 1, PAGE_SIZE) is None
+
+
+def test_iter_rowid_range():
+    assert [(page, rowid) for page, rowid, _ in iter_rowid_range(table_tree(), 2, 2, 10, PAGE_SIZE)] == [
+        (3, 2), (3, 3), (4, 10)]
+
+
+def test_decode_leaf_table_page():
+    pages = reader(btree_page(LEAF_TABLE_PAGE, [table_cell(1, "a", 10), table_cell(2, None, -1)]))
+    assert decode_leaf_table_page(pages, 2, PAGE_SIZE) == [(1, ["a", 10]), (2, [None, -1])]
+
+
+def test_decode_leaf_table_page_skips_bad_cell_pointers():
+    # A cell whose payload size varint runs off the end of the page, then a good one
+    cell = table_cell(1, "a")
+    good = PAGE_SIZE - 1 - len(cell)
+    # Pointers into the cell pointer array and past the usable size are skipped too
+    page = btree_page(LEAF_TABLE_PAGE, [b'\xff', cell], pointers=[good, 8, PAGE_SIZE + 10, PAGE_SIZE - 1])
+    assert decode_leaf_table_page(reader(page), 2, PAGE_SIZE) == [(1, ["a"])]
+
+
+def test_decode_leaf_table_page_skips_payload_past_the_page():
+    cell = table_cell(1, "abc")
+    page = bytearray(btree_page(LEAF_TABLE_PAGE, [cell]))
+    # A payload size of 40 for the last 6 bytes of the page
+    page[PAGE_SIZE - len(cell)] = 40
+    assert decode_leaf_table_page(reader(bytes(page)), 2, PAGE_SIZE) == []
+
+
+def test_iter_table_rows_skips_bad_children():
+    leaves = [btree_page(LEAF_TABLE_PAGE, [table_cell(1, "a")]), btree_page(LEAF_TABLE_PAGE, [table_cell(2, "b")])]
+    # Left children: page 3, a page past the end of the file, and a cell pointer past the usable size
+    root = bytearray(btree_page(INTERIOR_TABLE_PAGE, [struct.pack('>I', 3) + varint(1), struct.pack('>I', 99) + varint(1)],
+                                right_most=4))
+    pointers = struct.unpack_from('>2H', root, 12)
+    struct.pack_into('>H', root, 3, 3)
+    struct.pack_into('>3H', root, 12, *pointers, PAGE_SIZE - 2)
+    assert list(iter_table_rows(reader(bytes(root), *leaves), 2, PAGE_SIZE)) == [(1, ["a"]), (2, ["b"])]
@@ -0,0 +1,98 @@
+import struct
+
+import pytest
+
+import sqlite_wal
+from sqlite_wal import FRAME_HEADER, WAL_HEADER, WAL_MAGIC_BE, WAL_MAGIC_LE, WALIndex, wal_checksum
+
+PAGE_SIZE = 512
+SALTS = (0x11111111, 0x22222222)
+
+
+def wal(frames, magic=WAL_MAGIC_BE, salts=SALTS):
+    """
+    A log of (page number, commit size, fill byte[, salts]) frames with a valid checksum chain,
+    where each page is filled with its fill byte.
+    """
+    big_endian = magic == WAL_MAGIC_BE
+    header = WAL_HEADER.pack(magic, 3007000, PAGE_SIZE, 0, *salts, 0, 0)[:24]
+    s0, s1 = wal_checksum(header, 0, 0, big_endian)
+    data = bytearray(header + struct.pack('>2I', s0, s1))
+    for page_number, commit_size, fill, *frame_salts in frames:
+        frame_header = struct.pack('>4I', page_number, commit_size, *(frame_salts or salts))
+        page = bytes([fill]) * PAGE_SIZE
+        s0, s1 = wal_checksum(frame_header[:8], s0, s1, big_endian)
+        s0, s1 = wal_checksum(page, s0, s1, big_endian)
+        data += frame_header + struct.pack('>2I', s0, s1) + page
+    return bytes(data)
+
+
+def test_only_committed_frames_are_latest():
+    index = WALIndex(wal([(1, 0, 0xA1), (2, 2, 0xA2), (1, 0, 0xB1)]))
+    assert index.page_size == PAGE_SIZE
+    assert (index.valid_count, index.committed_count, index.database_size) == (3, 2, 2)
+    assert {page: frame.index for page, frame in index.latest.items()} == {1: 0, 2: 1}
+    assert not index.is_committed(index.frames[2])
+    assert bytes(index.page(1)) == b'\xa1' * PAGE_SIZE
+    assert index.page(3) is None
+    # The uncommitted frame is still in the history of its page
+    assert [frame.index for frame in index.history[1]] == [0, 2]
+
+
+def test_a_later_commit_replaces_pages():
+    index = WALIndex(wal([(1, 1, 0xA1), (1, 0, 0xB1), (2, 3, 0xB2)]))
+    assert {page: frame.index for page, frame in index.latest.items()} == {1: 1, 2: 2}
+    assert index.database_size == 3
+
+
+def test_frames_with_other_salts_end_the_log():
+    # Frames left over from before a checkpoint: their salts differ, and so frames after them
+    # do not belong to the log either, even with the right salts
+    index = WALIndex(wal([(1, 1, 0xA1), (2, 2, 0xA2, 1, 2), (3, 3, 0xA3)]))
+    assert (index.valid_count, index.committed_count, index.database_size) == (1, 1, 1)
+    assert set(index.latest) == {1}
+    assert len(index.frames) == 3
+
+
+def test_no_commit():
+    index = WALIndex(wal([(1, 0, 0xA1)], magic=WAL_MAGIC_LE))
+    assert (index.valid_count, index.committed_count, index.database_size) == (1, 0, 0)
+    assert index.latest == {}
+
+
+def test_trailing_bytes_of_an_incomplete_frame():
+    index = WALIndex(wal([(1, 1, 0xA1)]) + bytes(100))
+    assert len(index.frames) == 1
+    assert index.trailing == 100
+
+
+@pytest.mark.parametrize("magic", [WAL_MAGIC_LE, WAL_MAGIC_BE])
+def test_a_checksum_mismatch_ends_the_log(magic):
+    data = wal([(1, 0, 0xA1), (2, 2, 0xA2), (3, 3, 0xA3)], magic=magic)
+    assert WALIndex(data).valid_count == 3
+    # A changed byte in the page of frame 1 breaks the chain from there on, so frame 1 is not
+    # committed and frame 0 is the only one left
+    corrupt = bytearray(data)
+    corrupt[32 + FRAME_HEADER.size + PAGE_SIZE + FRAME_HEADER.size + 10] ^= 0xFF
+    index = WALIndex(bytes(corrupt))
+    assert (index.valid_count, index.committed_count, index.database_size) == (1, 0, 0)
+    assert index.latest == {}
+    assert len(index.frames) == 3
+    # A log header with a bad checksum has no frames in the log
+    corrupt = bytearray(data)
+    corrupt[12] ^= 0xFF
+    assert WALIndex(bytes(corrupt)).valid_count == 0
+
+
+@pytest.mark.parametrize("big_endian", [True, False])
+def test_wal_checksum_with_and_without_numpy(monkeypatch, big_endian):
+    data = bytes(range(256)) * 16
+    checksums = [wal_checksum(data[:size], 0x89ABCDEF, 0xFEDCBA98, big_endian) for size in (8, 64, 4096)]
+    monkeypatch.setattr(sqlite_wal, "np", None)
+    assert checksums == [wal_checksum(data[:size], 0x89ABCDEF, 0xFEDCBA98, big_endian) for size in (8, 64, 4096)]
+
+
+@pytest.mark.parametrize("data", [b'', bytes(32), WAL_HEADER.pack(WAL_MAGIC_BE, 3007000, 1000, 0, 0, 0, 0, 0)])
+def test_not_a_log(data):
+    with pytest.raises(ValueError):
+        WALIndex(data)